@@ -0,0 +1,185 @@
+from __future__ import annotations
+import hashlib
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+from .html_text import ProfileText
+from .logging_config import get_logger
+
+try:
+    import tiktoken
+except ImportError:  # in requirements.txt; without it token counts are only estimated from length
+    tiktoken = None
+
+logger = get_logger(__name__)
+
+# How much each profile section is worth to the parse prompt (higher is kept first)
+SECTION_PRIORITY = {
+    "top_card": 100,
+    "experience": 90,
+    "education": 85,
+    "about": 70,
+    "skills": 50,
+    "certifications": 45,
+    "honors": 40,
+    "projects": 40,
+    "publications": 40,
+    "volunteering": 30,
+    "languages": 25,
+    "section": 20,
+    "interests": 10,
+    "activity": 5,
+}
+# Sections that are about other people; never sent
+NOISE_SECTIONS = {"people_also_viewed", "people_you_may_know", "more_profiles"}
+# Sections worth keeping partially when they do not fit whole
+CORE_SECTIONS = {"top_card", "experience", "education", "about"}
+
+_encoding = None
+# Set once the fallback has been logged, so it is only logged once
+_estimating = False
+
+
+def load_tokenizer():
+    """The gpt-4o tokenizer, or None (logged once) when tiktoken or its encoding file is unavailable.
+
+    The first call may download the encoding; the app calls it in a thread at startup.
+    """
+    global _encoding, _estimating
+    if _encoding is None and not _estimating:
+        try:
+            if tiktoken is None:
+                raise ImportError("tiktoken is not installed")
+            # Downloaded on first use unless TIKTOKEN_CACHE_DIR already has it
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            _estimating = True
+            logger.warning(f"⚠️ No tokenizer ({e}); estimating profile tokens as characters / 4")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in ``text`` for gpt-4o models (estimated as ~4 characters per token without the tokenizer)."""
+    encoding = load_tokenizer()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0:
+        return ""
+    encoding = load_tokenizer()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    return encoding.decode(encoding.encode(text)[:max_tokens])
+
+
+@dataclass
+class _Piece:
+    name: str
+    text: str
+    order: int
+    tokens: int = 0
+
+
+@dataclass
+class CompactedText:
+    text: str
+    tokens: int
+    original_tokens: int
+    dropped: List[str] = field(default_factory=list)
+    truncated: List[str] = field(default_factory=list)
+
+
+def _pieces(profile_text: ProfileText) -> List[_Piece]:
+    """Split extracted text into named pieces; everything before the first named section is the top card."""
+    text = profile_text.text
+    pieces: List[_Piece] = []
+    cursor = 0
+    seen_named = False
+    for sec in profile_text.sections:
+        if sec.start > cursor and text[cursor:sec.start].strip():
+            pieces.append(_Piece("top_card" if not seen_named else "section", text[cursor:sec.start].strip(), len(pieces)))
+        name = sec.name
+        if name == "section" and not seen_named:
+            name = "top_card"
+        elif name != "section":
+            seen_named = True
+        chunk = text[sec.start:sec.end].strip()
+        if chunk:
+            pieces.append(_Piece(name, chunk, len(pieces)))
+        cursor = max(cursor, sec.end)
+    if text[cursor:].strip():
+        pieces.append(_Piece("top_card" if not pieces else "section", text[cursor:].strip(), len(pieces)))
+    return pieces
+
+
+def section_texts(profile_text: ProfileText) -> Dict[str, str]:
+    """Text per section name (top_card, experience, ...), without sections about other people or repeats."""
+    texts: Dict[str, List[str]] = {}
+    seen: set = set()
+    for piece in _pieces(profile_text):
+        digest = hashlib.blake2b(" ".join(piece.text.split()).lower().encode(), digest_size=8).digest()
+        if piece.name in NOISE_SECTIONS or digest in seen:
+            continue
+        seen.add(digest)
+        texts.setdefault(piece.name, []).append(piece.text)
+    return {name: "\n\n".join(parts) for name, parts in texts.items()}
+
+
+def compact_profile_text(profile_text: ProfileText, budget_tokens: int) -> CompactedText:
+    """Keep the most useful profile sections within ``budget_tokens``.
+
+    Sections about other people are dropped, repeated sections (the
+    extension can capture a card twice) are sent once, and the rest is
+    added by priority. A core section (top card, experience, education,
+    about) that does not fit whole is truncated, leaving room for the core
+    sections after it. The kept sections are returned in page order.
+    """
+    original_tokens = count_tokens(profile_text.text)
+    dropped: List[str] = []
+    seen: set = set()
+    candidates: List[_Piece] = []
+    for piece in _pieces(profile_text):
+        digest = hashlib.blake2b(" ".join(piece.text.split()).lower().encode(), digest_size=8).digest()
+        if piece.name in NOISE_SECTIONS or digest in seen:
+            dropped.append(piece.name)
+            continue
+        seen.add(digest)
+        piece.tokens = count_tokens(piece.text)
+        candidates.append(piece)
+
+    ranked = sorted(candidates, key=lambda p: (-SECTION_PRIORITY.get(p.name, 20), p.order))
+    kept: List[_Piece] = []
+    truncated: List[str] = []
+    remaining = budget_tokens
+    for index, piece in enumerate(ranked):
+        if piece.tokens <= remaining:
+            kept.append(piece)
+            remaining -= piece.tokens
+            continue
+        if piece.name in CORE_SECTIONS and remaining > 0:
+            # Leave room for the core sections still to come (up to half of what is left)
+            core_after = sum(p.tokens for p in ranked[index + 1:] if p.name in CORE_SECTIONS)
+            allowance = remaining - min(core_after, remaining // 2)
+            text = truncate_to_tokens(piece.text, allowance - 1)  # room for the "..."
+            if text:
+                kept.append(_Piece(piece.name, text + "...", piece.order, count_tokens(text + "...")))
+                remaining -= kept[-1].tokens
+                truncated.append(piece.name)
+                continue
+        dropped.append(piece.name)
+
+    kept.sort(key=lambda p: p.order)
+    text = "\n\n".join(p.text for p in kept)
+    if profile_text.truncated and text:
+        text += "..."
+    return CompactedText(
+        text=text,
+        tokens=count_tokens(text),
+        original_tokens=original_tokens,
+        dropped=dropped,
+        truncated=truncated,
+    )
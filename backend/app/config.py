@@ -24,4 +24,106 @@ ALLOWED_ORIGINS: List[str] = get_env_list(
     "ALLOWED_ORIGINS", "http://127.0.0.1:8000,chrome-extension://*"
 )
 
-BACKEND_BASE_URL: str = os.getenv("BACKEND_BASE_URL", "http://127.0.0.1:8000") 
\ No newline at end of file
+BACKEND_BASE_URL: str = os.getenv("BACKEND_BASE_URL", "http://127.0.0.1:8000")
+
+# Event-loop lag sampling for /metrics (0 disables)
+EVENT_LOOP_MONITOR_INTERVAL_SECONDS: float = float(os.getenv("EVENT_LOOP_MONITOR_INTERVAL_SECONDS", "0.25"))
+
+# Logging. Async mode writes console/file logs from a background thread instead of the event loop.
+LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_ASYNC: bool = os.getenv("LOG_ASYNC", "true").lower() in ("1", "true", "yes")
+LOG_DIR: str = os.getenv("LOG_DIR", str(_here.parents[1] / "logs"))
+# Rotate at this size (0 = rotate daily at midnight), keeping LOG_BACKUP_COUNT old files
+LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", "0"))
+LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "14"))
+# Large payloads (LLM responses, parsed profiles; logged at DEBUG) are logged for this fraction of calls, truncated
+LOG_PAYLOAD_SAMPLE_RATE: float = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.1"))
+LOG_PAYLOAD_MAX_CHARS: int = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+
+# Profile extraction cache ("memory" is per-process, "sqlite" is shared by all workers)
+DATA_DIR: str = os.getenv("DATA_DIR", str(_here.parents[1] / "data"))
+PROFILE_CACHE_BACKEND: str = os.getenv("PROFILE_CACHE_BACKEND", "sqlite").lower()
+PROFILE_CACHE_PATH: str = os.getenv("PROFILE_CACHE_PATH", str(Path(DATA_DIR) / "cache.sqlite3"))
+PROFILE_CACHE_MAX_ENTRIES: int = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "1000"))
+PROFILE_CACHE_TTL_SECONDS: int = int(os.getenv("PROFILE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Skip the LLM parse when the rule-based DOM parser scores at least this (0-1; >1 always uses the LLM)
+LOCAL_PARSE_MIN_CONFIDENCE: float = float(os.getenv("LOCAL_PARSE_MIN_CONFIDENCE", "0.9"))
+
+# Shared OpenAI client (created at startup, one keep-alive connection pool for all calls)
+OPENAI_BASE_URL: str | None = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "64"))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "32"))
+OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "60"))
+OPENAI_MAX_CONCURRENCY: int = int(os.getenv("OPENAI_MAX_CONCURRENCY", "32"))
+OPENAI_TIMEOUT_SECONDS: float = float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+
+# OpenAI call resilience. Deadlines cover all retries of one call; each try is also capped at OPENAI_TIMEOUT_SECONDS.
+LLM_PARSE_DEADLINE_SECONDS: float = float(os.getenv("LLM_PARSE_DEADLINE_SECONDS", "30"))
+LLM_CLASSIFY_DEADLINE_SECONDS: float = float(os.getenv("LLM_CLASSIFY_DEADLINE_SECONDS", "10"))
+LLM_DRAFT_DEADLINE_SECONDS: float = float(os.getenv("LLM_DRAFT_DEADLINE_SECONDS", "60"))
+# A streamed completion that sends no chunk for this long is abandoned
+LLM_STREAM_IDLE_TIMEOUT_SECONDS: float = float(os.getenv("LLM_STREAM_IDLE_TIMEOUT_SECONDS", "15"))
+# Retries on 429 / 5xx / timeouts, with full-jitter exponential backoff (or the server's Retry-After)
+LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_SECONDS: float = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS: float = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+# Send a second, racing request when one is slower than this percentile of recent calls (0 = no hedging)
+LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "0"))
+LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+# After this many consecutive failures, fail fast for LLM_BREAKER_RESET_SECONDS (0 = never)
+LLM_BREAKER_FAILURES: int = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET_SECONDS: float = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+
+# Shared Notion client
+NOTION_BASE_URL: str = os.getenv("NOTION_BASE_URL", "https://api.notion.com")
+NOTION_MAX_CONNECTIONS: int = int(os.getenv("NOTION_MAX_CONNECTIONS", "10"))
+NOTION_TIMEOUT_SECONDS: float = float(os.getenv("NOTION_TIMEOUT_SECONDS", "30"))
+
+# Local LinkedIn URL -> Notion page index (rebuilt from the database every N seconds)
+NOTION_INDEX_PATH: str = os.getenv("NOTION_INDEX_PATH", str(Path(DATA_DIR) / "notion_index.json"))
+NOTION_INDEX_REFRESH_SECONDS: float = float(os.getenv("NOTION_INDEX_REFRESH_SECONDS", "900"))
+
+# Merge Notion updates to the same page that arrive within this window into one API call
+NOTION_WRITE_COALESCE_SECONDS: float = float(os.getenv("NOTION_WRITE_COALESCE_SECONDS", "0"))
+
+# Client-side Notion rate limit (Notion allows an average of 3 requests/second per integration)
+NOTION_REQUESTS_PER_SECOND: float = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
+NOTION_RATE_BURST: float = float(os.getenv("NOTION_RATE_BURST", "3"))
+
+# Write-ahead queue: /draft returns before Notion is written; a background flusher sends the writes (opt-in)
+NOTION_WRITE_QUEUE_ENABLED: bool = os.getenv("NOTION_WRITE_QUEUE_ENABLED", "false").lower() in ("1", "true", "yes")
+NOTION_WRITE_QUEUE_PATH: str = os.getenv("NOTION_WRITE_QUEUE_PATH", str(Path(DATA_DIR) / "notion_writes.sqlite3"))
+NOTION_WRITE_MAX_ATTEMPTS: int = int(os.getenv("NOTION_WRITE_MAX_ATTEMPTS", "8"))
+NOTION_WRITE_CONCURRENCY: int = int(os.getenv("NOTION_WRITE_CONCURRENCY", "3"))
+
+# Bulk import (CLI and POST /notion/import): writes in flight; throughput is still capped by the rate limit above
+NOTION_IMPORT_CONCURRENCY: int = int(os.getenv("NOTION_IMPORT_CONCURRENCY", "3"))
+
+# POST /draft/batch
+BATCH_MAX_ITEMS: int = int(os.getenv("BATCH_MAX_ITEMS", "100"))
+BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "4"))
+
+# POST /prefetch: speculative extraction when the popup opens. Jobs run this many at a time, and their
+# OpenAI calls only start while a slot is free, so interactive requests never queue behind them.
+PREFETCH_MAX_CONCURRENCY: int = int(os.getenv("PREFETCH_MAX_CONCURRENCY", "2"))
+PREFETCH_MAX_PENDING: int = int(os.getenv("PREFETCH_MAX_PENDING", "50"))
+# How long a Notion page id found by a prefetch answers lookups of that URL (without the local index)
+PREFETCH_LOOKUP_TTL_SECONDS: int = int(os.getenv("PREFETCH_LOOKUP_TTL_SECONDS", "600"))
+
+# Request bodies: limit on the wire, and after gzip/brotli decoding
+MAX_REQUEST_BODY_BYTES: int = int(os.getenv("MAX_REQUEST_BODY_BYTES", str(25 * 1024 * 1024)))
+MAX_DECOMPRESSED_BODY_BYTES: int = int(os.getenv("MAX_DECOMPRESSED_BODY_BYTES", str(100 * 1024 * 1024)))
+
+# Generated-draft cache (opt-in; stored in the profile cache backend, table "drafts")
+DRAFT_CACHE_ENABLED: bool = os.getenv("DRAFT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+DRAFT_CACHE_MAX_ENTRIES: int = int(os.getenv("DRAFT_CACHE_MAX_ENTRIES", "2000"))
+DRAFT_CACHE_TTL_SECONDS: int = int(os.getenv("DRAFT_CACHE_TTL_SECONDS", str(24 * 3600)))
+
+# Field classification: the local classifier's answer is used at or above this confidence (0-1), else gpt-4o-mini.
+# Answers are memoized per (role, companies, degree) in the profile cache backend.
+FIELD_CLASSIFIER_MIN_CONFIDENCE: float = float(os.getenv("FIELD_CLASSIFIER_MIN_CONFIDENCE", "0.7"))
+FIELD_MEMO_MAX_ENTRIES: int = int(os.getenv("FIELD_MEMO_MAX_ENTRIES", "5000"))
+
+# Profile text sent to the parse prompt is compacted to this many tokens, highest-value sections first
+PROFILE_TOKEN_BUDGET: int = int(os.getenv("PROFILE_TOKEN_BUDGET", "6000"))
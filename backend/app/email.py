@@ -1,18 +1,92 @@
 from __future__ import annotations
-import asyncio
 import os
-from typing import Optional, Tuple, List
+from typing import AsyncIterator, Dict, Optional, Tuple, List
 
 import httpx
-from openai import OpenAI
 
 from .schemas import Draft, Profile, ExperienceDetail
+from .html_text import extract_text
+from .compaction import compact_profile_text, section_texts
+from .timing import current_timer
+from .metrics import registry
+from .logging_config import get_logger, log_payload, truncate
+from .llm_client import LLMUnavailableError, chat_completion, stream_chat_completion
 from . import config
 import json
 
+logger = get_logger(__name__)
 
-async def parse_linkedin_profile_with_llm(html_content: str, linkedin_url: str) -> Optional[Profile]:
-    """Use LLM to parse LinkedIn profile HTML and extract structured data."""
+# How much of the page is scanned; the token budget then decides what is sent
+PROFILE_TEXT_MAX_CHARS = 200_000
+
+
+def extract_profile_text(html_content: str) -> str:
+    """Strip markup from profile HTML and return the text sent to the LLM.
+
+    Sections are ranked and compacted to PROFILE_TOKEN_BUDGET tokens (see compaction.py).
+    """
+    return extract_profile_content(html_content)[0]
+
+
+def extract_profile_content(html_content: str) -> Tuple[str, Dict[str, str]]:
+    """``extract_profile_text`` and the uncompacted text of each profile section
+    (top_card, about, experience, education, ...), from one pass over the HTML."""
+    with current_timer().stage("html_clean"):
+        extracted = extract_text(html_content, PROFILE_TEXT_MAX_CHARS)
+        compacted = compact_profile_text(extracted, config.PROFILE_TOKEN_BUDGET)
+        sections = section_texts(extracted)
+    logger.info(
+        f"✂️ Profile text: {compacted.original_tokens} -> {compacted.tokens} tokens"
+        f" (dropped: {', '.join(compacted.dropped) or 'none'}; truncated: {', '.join(compacted.truncated) or 'none'})"
+    )
+    current_timer().count("profile_text_tokens", compacted.tokens)
+    registry.inc("connoction_profile_text_tokens_total", compacted.tokens)
+    return compacted.text, sections
+
+
+PROFILE_SCHEMA_LINES = {
+    "name": '"name": "Full name"',
+    "role": '"role": "Current job title"',
+    "currentCompany": '"currentCompany": "Current company"',
+    "companies": '"companies": ["All work companies (exclude schools)"]',
+    "highestDegree": '"highestDegree": "PhD/Master\'s/Bachelor\'s"',
+    "schools": '"schools": ["Educational institutions"]',
+    "location": '"location": "Location"',
+    "field": '"field": "Field classification"',
+    "bio": '"bio": "About section text"',
+    "headline": '"headline": "Tagline under name"',
+    "experience_details": '"experience_details": [{"company": "X", "title": "Y", "description": "Z"}]',
+}
+
+
+def build_profile_system_prompt(fields: Optional[List[str]] = None) -> str:
+    """System prompt for profile parsing, asking only for ``fields`` (default: all)."""
+    wanted = [name for name in PROFILE_SCHEMA_LINES if fields is None or name in fields]
+    schema = ",\n".join(f"  {PROFILE_SCHEMA_LINES[name]}" for name in wanted)
+    prompt = f"Extract LinkedIn profile data as JSON:\n\n{{\n{schema}\n}}\n\n"
+    if "field" in wanted:
+        prompt += """Field options:
+- "industry - SWE" (software engineering)
+- "industry - PM" (product management) 
+- "industry - AI/ML" (AI/ML engineering)
+- "industry - Other" (other industry)
+- "research - [field]" (researchers, PhD students)
+
+"""
+    return prompt + "Rules: Extract all companies from work history. Use current role for field classification. Return JSON only."
+
+
+async def parse_linkedin_profile_with_llm(
+    html_content: str,
+    linkedin_url: str,
+    text_content: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+) -> Optional[Profile]:
+    """Use LLM to parse LinkedIn profile HTML and extract structured data.
+
+    Pass ``text_content`` when the caller already ran ``extract_profile_text``,
+    and ``fields`` to extract only the fields a local parse could not fill.
+    """
     import logging
     logger = logging.getLogger(__name__)
     
@@ -24,55 +98,12 @@ async def parse_linkedin_profile_with_llm(html_content: str, linkedin_url: str)
         logger.error("❌ OPENAI_API_KEY not found in environment")
         return None
     
-    client = OpenAI(api_key=api_key)
-    
-    # Strip HTML tags and clean content
-    import re
-    from html import unescape
-    
-    # Remove script and style tags completely
-    text_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-    text_content = re.sub(r'<style[^>]*>.*?</style>', '', text_content, flags=re.DOTALL | re.IGNORECASE)
-    
-    # Strip all HTML tags
-    text_content = re.sub(r'<[^>]+>', ' ', text_content)
-    
-    # Clean up whitespace and decode HTML entities
-    text_content = unescape(text_content)
-    text_content = re.sub(r'\s+', ' ', text_content).strip()
-    
+    if text_content is None:
+        text_content = extract_profile_text(html_content)
     logger.debug(f"🧹 Cleaned text content length: {len(text_content)} characters")
-    logger.debug(f"📝 First 500 chars of cleaned content: {text_content[:500]}...")
-    
-    # Truncate if too long (keep within reasonable token limits)
-    if len(text_content) > 25000:
-        text_content = text_content[:25000] + "..."
-        logger.info(f"✂️ Truncated content to 25000 characters")
+    log_payload(logger, "📝 Cleaned content", text_content)
     
-    system_prompt = """Extract LinkedIn profile data as JSON:
-
-{
-  "name": "Full name",
-  "role": "Current job title", 
-  "currentCompany": "Current company",
-  "companies": ["All work companies (exclude schools)"],
-  "highestDegree": "PhD/Master's/Bachelor's",
-  "schools": ["Educational institutions"],
-  "location": "Location",
-  "field": "Field classification",
-  "bio": "About section text",
-  "headline": "Tagline under name",
-  "experience_details": [{"company": "X", "title": "Y", "description": "Z"}]
-}
-
-Field options:
-- "industry - SWE" (software engineering)
-- "industry - PM" (product management) 
-- "industry - AI/ML" (AI/ML engineering)
-- "industry - Other" (other industry)
-- "research - [field]" (researchers, PhD students)
-
-Rules: Extract all companies from work history. Use current role for field classification. Return JSON only."""
+    system_prompt = build_profile_system_prompt(fields)
 
     user_prompt = f"""Parse this LinkedIn profile content and extract the structured information:
 
@@ -88,27 +119,27 @@ Return the extracted profile data as JSON."""
         logger.debug(f"📤 System prompt: {system_prompt[:200]}...")
         logger.debug(f"📤 User prompt length: {len(user_prompt)} characters")
         
-        response = await asyncio.to_thread(
-            client.chat.completions.create,
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"},
-            temperature=0.1,
-            max_tokens=800
-        )
+        with current_timer().stage("llm_parse"):
+            response = await chat_completion(
+                deadline=config.LLM_PARSE_DEADLINE_SECONDS,
+                model="gpt-4o-mini",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                response_format={"type": "json_object"},
+                temperature=0.1,
+                max_tokens=800
+            )
         
         content = response.choices[0].message.content or ""
-        logger.info(f"📥 GPT-4o-mini raw response: {content}")
+        log_payload(logger, "📥 GPT-4o-mini raw response", content)
         
         try:
             result = json.loads(content)
-            logger.info(f"✅ Successfully parsed JSON response: {result}")
         except json.JSONDecodeError as json_err:
             logger.error(f"❌ Failed to parse JSON response: {json_err}")
-            logger.error(f"Raw content: {content}")
+            logger.error(f"Raw content: {truncate(content)}")
             return None
         
         # Create Profile object with extracted data
@@ -136,25 +167,18 @@ Return the extracted profile data as JSON."""
             experience_details=experience_details
         )
         
-        logger.info(f"🎯 Created Profile object:")
-        logger.info(f"   Name: {profile.name}")
-        logger.info(f"   Role: {profile.role}")
-        logger.info(f"   Current Company: {profile.currentCompany}")
-        logger.info(f"   Companies: {profile.companies}")
-        logger.info(f"   Location: {profile.location}")
-        logger.info(f"   Schools: {profile.schools}")
-        logger.info(f"   Highest Degree: {profile.highestDegree}")
-        logger.info(f"   Field: {profile.field}")
-        logger.info(f"   Bio: {profile.bio[:100] + '...' if profile.bio and len(profile.bio) > 100 else profile.bio}")
-        logger.info(f"   Headline: {profile.headline}")
-        logger.info(f"   Experience Details: {len(profile.experience_details)} entries")
-        for i, exp in enumerate(profile.experience_details[:3]):  # Log first 3 experiences
-            logger.info(f"     [{i+1}] {exp.title} at {exp.company}")
-            if exp.description:
-                logger.info(f"         Description: {exp.description[:100] + '...' if len(exp.description) > 100 else exp.description}")
+        logger.info(
+            f"🎯 Parsed profile: {profile.name!r}, {profile.role!r} at {profile.currentCompany!r} "
+            f"({len(profile.companies)} companies, {len(profile.schools)} schools, "
+            f"{len(profile.experience_details)} experience details)"
+        )
+        log_payload(logger, "🎯 Parsed profile fields", profile.model_dump(exclude={"htmlContent"}, exclude_none=True))
         
         return profile
         
+    except LLMUnavailableError:
+        # Not a parsing problem: let the caller answer 503 instead of "failed to parse"
+        raise
     except Exception as e:
         logger.error(f"❌ LLM profile parsing error: {e}")
         import traceback
@@ -168,8 +192,6 @@ async def classify_field_with_llm(profile: Profile) -> Optional[str]:
     if not api_key:
         return None
     
-    client = OpenAI(api_key=api_key)
-    
     # Build profile context for classification
     profile_info = []
     if profile.role:
@@ -216,8 +238,8 @@ Respond with valid JSON in this exact format:
 Respond with JSON only."""
 
     try:
-        response = await asyncio.to_thread(
-            client.chat.completions.create,
+        response = await chat_completion(
+            deadline=config.LLM_CLASSIFY_DEADLINE_SECONDS,
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -239,35 +261,37 @@ Respond with JSON only."""
         return None
         
     except Exception as e:
-        print(f"Field classification error: {e}")
+        logger.warning(f"⚠️ Field classification error: {e}")
         return None
 
 
+def draft_provider_error() -> Optional[str]:
+    """Why drafts cannot be generated, or None when OpenAI is configured."""
+    if config.EMAIL_PROVIDER != "openai":
+        return f"EMAIL_PROVIDER must be set to 'openai', currently: '{config.EMAIL_PROVIDER}'"
+    if not config.OPENAI_API_KEY:
+        return "OPENAI_API_KEY is missing or empty"
+    return None
+
+
 async def maybe_generate_draft(profile: Profile, ask: str, message_type: str = "email") -> tuple[Optional[Draft], Optional[str], Optional[str]]:
-    provider_env = config.EMAIL_PROVIDER
-    api_key = config.OPENAI_API_KEY
-    
-    print(f"DEBUG: EMAIL_PROVIDER = '{provider_env}'")
-    print(f"DEBUG: OPENAI_API_KEY exists = {bool(api_key)}")
-    print(f"DEBUG: OPENAI_API_KEY length = {len(api_key) if api_key else 0}")
+    logger.debug(f"📧 EMAIL_PROVIDER = '{config.EMAIL_PROVIDER}', OPENAI_API_KEY set: {bool(config.OPENAI_API_KEY)}")
 
-    if provider_env != "openai" or not api_key:
-        if provider_env != "openai":
-            return None, None, f"EMAIL_PROVIDER must be set to 'openai', currently: '{provider_env}'"
-        if not api_key:
-            return None, None, "OPENAI_API_KEY is missing or empty"
-        return None, None, "OpenAI not configured"
+    error = draft_provider_error()
+    if error:
+        return None, None, error
 
     try:
-        draft = await _generate_with_openai(profile, ask, api_key, message_type)
+        draft = await _generate_with_openai(profile, ask, message_type)
         return draft, "openai", None
+    except LLMUnavailableError as exc:
+        return None, None, f"OpenAI unavailable: {exc}"
     except Exception as exc:  # noqa: BLE001
         return None, None, f"OpenAI error: {exc.__class__.__name__}"
 
 
-async def _generate_with_openai(profile: Profile, ask: str, api_key: str, message_type: str) -> Draft:
-    client = OpenAI(api_key=api_key)
-    
+def build_draft_messages(profile: Profile, ask: str, message_type: str) -> List[Dict[str, str]]:
+    """System and user messages for drafting a LinkedIn message or an email to ``profile``."""
     # Build enriched profile context
     profile_context = f"Name: {profile.name or 'Unknown'}"
     if profile.role:
@@ -351,19 +375,30 @@ Request: {ask}
 
 Generate both a subject line and email body. Make it personal and specific to their background."""
 
-    response = await asyncio.to_thread(
-        client.chat.completions.create,
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def draft_max_tokens(message_type: str) -> int:
+    return 500 if message_type == "linkedin" else 800
+
+
+async def _generate_with_openai(profile: Profile, ask: str, message_type: str) -> Draft:
+    response = await chat_completion(
+        deadline=config.LLM_DRAFT_DEADLINE_SECONDS,
         model="gpt-4o",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
+        messages=build_draft_messages(profile, ask, message_type),
         temperature=0.7,
-        max_tokens=500 if message_type == "linkedin" else 800
+        max_tokens=draft_max_tokens(message_type)
     )
     
-    content = response.choices[0].message.content or ""
-    
+    return parse_draft(response.choices[0].message.content or "", message_type)
+
+
+def parse_draft(content: str, message_type: str) -> Draft:
+    """Split a completion into subject and body (emails) or just the body (LinkedIn)."""
     if message_type == "email":
         # Try to parse subject and body
         lines = content.strip().split('\n')
@@ -386,4 +421,65 @@ Generate both a subject line and email body. Make it personal and specific to th
         return Draft(subject=subject_line, body=body)
     else:
         # LinkedIn message - just return the body
-        return Draft(body=content.strip()) 
\ No newline at end of file
+        return Draft(body=content.strip()) 
+
+
+class SubjectSplitter:
+    """Incrementally splits a streamed email completion into its subject line and body.
+
+    ``feed`` returns ``(subject, body_delta)``: the subject once its
+    ``Subject:`` line is complete, then body text as it arrives. Text that
+    cannot start with ``Subject:`` is passed through as body straight away.
+    The final Draft still comes from ``parse_draft`` on the full text; this
+    only drives the live display.
+    """
+
+    def __init__(self) -> None:
+        self.subject: Optional[str] = None
+        self._head = ""
+        self._no_subject = False
+        self._body_started = False
+
+    def feed(self, delta: str) -> Tuple[Optional[str], str]:
+        if self.subject is not None or self._no_subject:
+            return None, self._body(delta)
+        self._head += delta
+        head = self._head.lstrip()
+        if not "subject:".startswith(head[:8].lower()):
+            self._no_subject = True
+            return None, self._body(head)
+        if "\n" not in head:
+            return None, ""
+        line, rest = head.split("\n", 1)
+        self.subject = line[8:].strip().strip('"')
+        return self.subject, self._body(rest)
+
+    def _body(self, delta: str) -> str:
+        if not self._body_started:
+            # parse_draft strips the blank lines between subject and body
+            delta = delta.lstrip()
+            self._body_started = bool(delta)
+        return delta
+
+
+async def stream_draft_with_openai(profile: Profile, ask: str, message_type: str) -> AsyncIterator[Tuple[str, str]]:
+    """Stream a draft as ``("subject", text)`` and ``("delta", text)`` events, then ``("done", full_text)``."""
+    splitter = SubjectSplitter() if message_type == "email" else None
+    parts: List[str] = []
+    async for delta in stream_chat_completion(
+        deadline=config.LLM_DRAFT_DEADLINE_SECONDS,
+        model="gpt-4o",
+        messages=build_draft_messages(profile, ask, message_type),
+        temperature=0.7,
+        max_tokens=draft_max_tokens(message_type),
+    ):
+        parts.append(delta)
+        if splitter is None:
+            yield "delta", delta if len(parts) > 1 else delta.lstrip()
+            continue
+        subject, body = splitter.feed(delta)
+        if subject is not None:
+            yield "subject", subject
+        if body:
+            yield "delta", body
+    yield "done", "".join(parts)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+from .schemas import Profile
+
+def _terms(*words: str) -> "re.Pattern[str]":
+    return re.compile(r"\b(?:" + "|".join(words) + r")\b", re.IGNORECASE)
+
+
+# Signals that the person's current track is research rather than industry
+_RESEARCH_ROLE = _terms(
+    r"research(?:er)?", r"scientist", r"ph\.?d", r"doctoral", r"postdoc(?:toral)?", r"professor",
+    r"lecturer", r"fellow", r"graduate student", r"grad student", r"lab",
+)
+# Research-sounding titles that are industry roles
+_INDUSTRY_OVERRIDE = _terms(
+    r"research engineer", r"applied scientist", r"research software engineer", r"data scientist", r"user research(?:er)?",
+)
+_ACADEMIC_ORG = _terms(r"university", r"universit[äa]t", r"college", r"institute", r"école", r"laborator(?:y|ies)", r"school of")
+
+# Industry categories, most specific first
+_INDUSTRY_RULES: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("PM", _terms(r"product manager", r"product management", r"product lead", r"head of product",
+                  r"(?:senior |group |associate |technical )?pm", r"product owner", r"apm", r"tpm",
+                  r"program manager")),
+    ("AI/ML", _terms(r"machine learning", r"ml", r"mle", r"ai", r"artificial intelligence", r"deep learning",
+                     r"data scientist", r"data science", r"applied scientist", r"nlp", r"computer vision",
+                     r"llms?", r"research engineer")),
+    ("SWE", _terms(r"software", r"swe", r"sde", r"developer", r"programmer", r"back[- ]?end", r"front[- ]?end",
+                   r"full[- ]?stack", r"web engineer", r"mobile engineer", r"ios", r"android", r"devops",
+                   r"site reliability", r"sre", r"infrastructure engineer", r"platform engineer")),
+]
+# A bare "engineer" is usually software here, unless another discipline is named
+_ENGINEER = _terms(r"engineer(?:ing)?")
+_OTHER_ENGINEERING = _terms(r"mechanical", r"electrical", r"civil", r"chemical", r"hardware", r"aerospace",
+                            r"manufacturing", r"sales", r"solutions", r"process", r"quality", r"field")
+# Research disciplines, most specific first
+_RESEARCH_RULES: List[Tuple[str, "re.Pattern[str]"]] = [
+    ("Machine Learning", _terms(r"machine learning", r"ml", r"ai", r"artificial intelligence", r"deep learning",
+                                r"nlp", r"natural language", r"computer vision", r"reinforcement learning",
+                                r"llms?", r"ai safety", r"interpretability")),
+    ("Computer Science", _terms(r"computer science", r"cs", r"eecs", r"computing", r"systems", r"security",
+                                r"hci", r"human-computer interaction", r"robotics", r"algorithms")),
+    ("Physics", _terms(r"physics", r"physicist", r"astrophysics", r"quantum", r"cosmology")),
+    ("Biology", _terms(r"biology", r"biologist", r"bio\w*", r"genomics", r"genetics", r"molecular",
+                       r"life sciences", r"biomedical", r"immunology")),
+    ("Neuroscience", _terms(r"neuroscience", r"neuroscientist", r"cognitive science", r"brain")),
+    ("Chemistry", _terms(r"chemistry", r"chemist", r"chemical")),
+    ("Mathematics", _terms(r"mathematics", r"mathematician", r"math", r"statistics", r"statistician")),
+    ("Economics", _terms(r"economics", r"economist")),
+]
+
+
+@dataclass
+class FieldPrediction:
+    field: Optional[str]
+    confidence: float
+
+
+def _first_match(rules: Sequence[Tuple[str, "re.Pattern[str]"]], text: str) -> Optional[str]:
+    for label, pattern in rules:
+        if pattern.search(text):
+            return label
+    return None
+
+
+def classify_field_locally(profile: Profile) -> FieldPrediction:
+    """Guess the Notion field ("industry - SWE", "research - Physics", ...) from the profile.
+
+    Confidence is high when the current role alone decides the category,
+    lower when only the headline, employer, degree or bio hint at it, and low
+    for the catch-all "industry - Other", so callers can fall back to the LLM.
+    """
+    role = profile.role or ""
+    headline = profile.headline or ""
+    company = profile.currentCompany or (profile.companies[0] if profile.companies else "")
+    if not (role or headline):
+        return FieldPrediction(None, 0.0)
+
+    research = bool(_RESEARCH_ROLE.search(role)) and not _INDUSTRY_OVERRIDE.search(role)
+    if not role and _RESEARCH_ROLE.search(headline):
+        research = True
+    # Research assistants etc. at a university whose role text has no research word
+    academic = bool(_ACADEMIC_ORG.search(company))
+
+    if research or (academic and not _first_match(_INDUSTRY_RULES[:2], role)):
+        # Discipline often lives in the headline or degree ("PhD in Physics")
+        texts = ((role, 0.9), (headline, 0.8), (profile.highestDegree or "", 0.7), (profile.bio or "", 0.6))
+        for text, confidence in texts:
+            discipline = _first_match(_RESEARCH_RULES, text)
+            if discipline:
+                if not research:
+                    confidence -= 0.15
+                return FieldPrediction(f"research - {discipline}", round(confidence, 2))
+        return FieldPrediction(None, 0.3)
+
+    for text, confidence in ((role, 0.9), (headline, 0.75)):
+        category = _first_match(_INDUSTRY_RULES, text)
+        if category:
+            return FieldPrediction(f"industry - {category}", confidence)
+        if _ENGINEER.search(text):
+            if _OTHER_ENGINEERING.search(text):
+                return FieldPrediction("industry - Other", confidence - 0.1)
+            return FieldPrediction("industry - SWE", round(confidence - 0.2, 2))
+    return FieldPrediction("industry - Other", 0.4)
@@ -0,0 +1,268 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass, field
+from html import unescape
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Elements whose contents are never profile text
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head", "iframe", "code", "textarea"}
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+# Profile sections callers care about, keyed by LinkedIn's anchor ids / heading text
+KNOWN_SECTIONS = {
+    "about": "about",
+    "experience": "experience",
+    "education": "education",
+    "skills": "skills",
+    "licenses & certifications": "certifications",
+    "licenses_and_certifications": "certifications",
+    "projects": "projects",
+    "publications": "publications",
+    "honors & awards": "honors",
+    "honors_and_awards": "honors",
+    "volunteering": "volunteering",
+    "volunteering_experience": "volunteering",
+    "languages": "languages",
+    "activity": "activity",
+    "content_collections": "activity",
+    "interests": "interests",
+    "people also viewed": "people_also_viewed",
+    "people you may know": "people_you_may_know",
+    "more profiles for you": "more_profiles",
+}
+
+_TAG = re.compile(r"<(/?)([a-zA-Z][a-zA-Z0-9:-]*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>")
+_ATTR = re.compile(r"([a-zA-Z_:][-a-zA-Z0-9_:.]*)(?:\s*=\s*(\"[^\"]*\"|'[^']*'|[^\s\"'>]+))?")
+_HIDDEN_STYLE = re.compile(r"display\s*:\s*none|visibility\s*:\s*hidden", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+# The extension sends visible text with "--- Section 3-0 (.artdeco-card) ---" separators
+_TEXT_SECTION_MARKER = re.compile(r"--- Section [\d-]+ \([^)]*\) ---")
+_end_tag_patterns: Dict[str, "re.Pattern[str]"] = {}
+_nesting_patterns: Dict[str, "re.Pattern[str]"] = {}
+
+
+@dataclass
+class TextSection:
+    name: str
+    start: int
+    end: int
+
+
+@dataclass
+class ProfileText:
+    """Text extracted from a profile page plus the offsets of its sections."""
+
+    text: str
+    sections: List[TextSection] = field(default_factory=list)
+    truncated: bool = False
+
+    def section(self, name: str) -> Optional[str]:
+        """Text of the first section called ``name`` (e.g. "experience"), if present."""
+        for sec in self.sections:
+            if sec.name == name:
+                return self.text[sec.start:sec.end]
+        return None
+
+    def section_map(self) -> Dict[str, Tuple[int, int]]:
+        """First (start, end) offsets per section name."""
+        spans: Dict[str, Tuple[int, int]] = {}
+        for sec in self.sections:
+            spans.setdefault(sec.name, (sec.start, sec.end))
+        return spans
+
+
+def _section_name(label: str) -> Optional[str]:
+    return KNOWN_SECTIONS.get(" ".join(label.split()).lower())
+
+
+def _parse_attrs(raw: str) -> Dict[str, str]:
+    attrs: Dict[str, str] = {}
+    for name, value in _ATTR.findall(raw):
+        if value[:1] in ("'", '"'):
+            value = value[1:-1]
+        attrs[name.lower()] = value
+    return attrs
+
+
+def _skip_element(html: str, tag: str, pos: int) -> int:
+    """Return the index just past the element opened before ``pos``, honoring nesting."""
+    if tag in SKIP_TAGS and tag not in ("svg", "head"):
+        # Raw-text-like elements: their content cannot contain a nested copy
+        pattern = _end_tag_patterns.get(tag)
+        if pattern is None:
+            pattern = _end_tag_patterns[tag] = re.compile(rf"</{tag}\s*>", re.IGNORECASE)
+        match = pattern.search(html, pos)
+        return match.end() if match else len(html)
+    pattern = _nesting_patterns.get(tag)
+    if pattern is None:
+        pattern = _nesting_patterns[tag] = re.compile(rf"<(/?){tag}(?=[\s>/])[^>]*>", re.IGNORECASE)
+    depth = 1
+    for match in pattern.finditer(html, pos):
+        if match.group(1):
+            depth -= 1
+            if depth == 0:
+                return match.end()
+        elif not match.group(0).endswith("/>"):
+            depth += 1
+    return len(html)
+
+
+class _TextCollector:
+    """Accumulates normalized text and section boundaries up to a character budget."""
+
+    def __init__(self, max_chars: int) -> None:
+        self.max_chars = max_chars
+        self.parts: List[str] = []
+        self.length = 0
+        self.done = False
+        self.sections: List[TextSection] = []
+        self.heading: Optional[List[str]] = None
+        self.section_named = True
+
+    def append(self, text: str) -> None:
+        if self.done:
+            return
+        if self.parts:
+            text = " " + text
+        remaining = self.max_chars - self.length
+        if len(text) > remaining:
+            text = text[:remaining]
+            self.done = True
+        self.parts.append(text)
+        self.length += len(text)
+
+    def start_section(self, name: Optional[str]) -> None:
+        offset = self.length + (1 if self.parts else 0)
+        if self.sections and self.sections[-1].start == offset:
+            # Anchor div directly inside a <section>: just name the open one
+            if name:
+                self.sections[-1].name = name
+                self.section_named = True
+            return
+        self.sections.append(TextSection(name=name or "section", start=offset, end=offset))
+        self.section_named = name is not None
+
+    def data(self, raw: str) -> None:
+        if "&" in raw:
+            raw = unescape(raw)
+        if "--- Section " in raw:
+            self._marked_text(raw)
+            return
+        text = _WHITESPACE.sub(" ", raw).strip()
+        if not text:
+            return
+        if self.heading is not None:
+            self.heading.append(text)
+        self.append(text)
+
+    def _marked_text(self, raw: str) -> None:
+        """Split extension-style plain text on its section markers."""
+        pos = 0
+        for match in _TEXT_SECTION_MARKER.finditer(raw):
+            self._plain(raw[pos:match.start()])
+            words = raw[match.end():match.end() + 64].split()
+            name = None
+            for count in (3, 2, 1):
+                name = _section_name(" ".join(words[:count]))
+                if name:
+                    break
+            self.start_section(name)
+            self.section_named = True
+            pos = match.start()
+        self._plain(raw[pos:])
+
+    def _plain(self, raw: str) -> None:
+        text = _WHITESPACE.sub(" ", raw).strip()
+        if text:
+            self.append(text)
+
+
+def iter_visible_tokens(html: str) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+    """Tokenize HTML into ("start" | "end" | "data", tag-or-text, attrs) tuples.
+
+    Non-content elements (scripts, styles, hidden and screen-reader-only
+    nodes) are jumped over without being tokenized. Data is raw (entities not
+    yet decoded). The generator is lazy, so callers can stop early.
+    """
+    n = len(html)
+    pos = 0
+    no_attrs: Dict[str, str] = {}
+    while pos < n:
+        lt = html.find("<", pos)
+        if lt == -1:
+            yield "data", html[pos:], no_attrs
+            return
+        if lt > pos:
+            yield "data", html[pos:lt], no_attrs
+        if html.startswith("<!--", lt):
+            end = html.find("-->", lt + 4)
+            pos = n if end == -1 else end + 3
+            continue
+        match = _TAG.match(html, lt)
+        if match is None:
+            # Doctype, processing instruction or a stray "<"
+            if html.startswith("<!", lt) or html.startswith("<?", lt):
+                end = html.find(">", lt)
+                pos = n if end == -1 else end + 1
+            else:
+                yield "data", "<", no_attrs
+                pos = lt + 1
+            continue
+        pos = match.end()
+        closing, tag, raw_attrs = match.group(1), match.group(2).lower(), match.group(3)
+        if closing:
+            yield "end", tag, no_attrs
+            continue
+
+        self_closing = raw_attrs.endswith("/") or tag in VOID_TAGS
+        attrs = _parse_attrs(raw_attrs) if raw_attrs.strip() else no_attrs
+        hidden = (
+            tag in SKIP_TAGS
+            or "hidden" in attrs
+            or "visually-hidden" in attrs.get("class", "")
+            or ("style" in attrs and _HIDDEN_STYLE.search(attrs["style"]) is not None)
+        )
+        if hidden:
+            if not self_closing:
+                pos = _skip_element(html, tag, pos)
+            continue
+        yield "start", tag, attrs
+        if self_closing:
+            yield "end", tag, no_attrs
+
+
+def extract_text(html_content: str, max_chars: int) -> ProfileText:
+    """Extract visible text from profile HTML (or extension plain text) in one pass.
+
+    Tags are tokenized left to right; non-content elements are jumped over,
+    and scanning stops once ``max_chars`` of text have been collected, so the
+    tail of a large page is never touched.
+    """
+    out = _TextCollector(max_chars)
+    for kind, value, attrs in iter_visible_tokens(html_content):
+        if kind == "data":
+            out.data(value)
+            if out.done:
+                break
+        elif kind == "start":
+            if value == "section":
+                out.start_section(None)
+            anchor = _section_name(attrs.get("id", "")) if attrs else None
+            if anchor:
+                out.start_section(anchor)
+            if value in ("h2", "h3") and out.sections and not out.section_named:
+                out.heading = []
+        elif out.heading is not None and value in ("h2", "h3"):
+            name = _section_name(" ".join(out.heading))
+            if name:
+                out.sections[-1].name = name
+            out.section_named = True
+            out.heading = None
+
+    text = "".join(out.parts)
+    sections = out.sections
+    for current, following in zip(sections, sections[1:]):
+        # Next section starts after the joining space
+        current.end = max(current.start, min(following.start - 1, len(text)))
+    if sections:
+        sections[-1].end = len(text)
+    return ProfileText(text=text, sections=sections, truncated=out.done)
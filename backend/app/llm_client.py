@@ -0,0 +1,364 @@
+from __future__ import annotations
+import asyncio
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional, TypeVar
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from . import config
+from .logging_config import get_logger
+from .resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, backoff_delay, parse_retry_after
+from .timing import current_timer
+from .metrics import registry, upstream_error
+
+T = TypeVar("T")
+
+logger = get_logger(__name__)
+
+# App-lifetime client: one connection pool shared by every OpenAI call
+_client: Optional[AsyncOpenAI] = None
+_http_client: Optional[httpx.AsyncClient] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+# Shared by every call: consecutive upstream failures open it, and calls fail fast until it resets
+_breaker = CircuitBreaker(config.LLM_BREAKER_FAILURES, config.LLM_BREAKER_RESET_SECONDS)
+_latency: Dict[str, LatencyTracker] = {}
+# Set for speculative work (prefetches): its calls only start while an OpenAI slot is free
+_background: contextvars.ContextVar[Optional["BackgroundPriority"]] = contextvars.ContextVar("llm_background", default=None)
+_BACKGROUND_POLL_SECONDS = 0.05
+_stats = {"calls": 0, "retries": 0, "hedges": 0, "hedgeWins": 0, "unavailable": 0, "queueTimeouts": 0, "streamStalls": 0}
+
+
+class LLMUnavailableError(Exception):
+    """OpenAI did not answer: circuit open, deadline exceeded or retries exhausted."""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def start_llm_client() -> Optional[AsyncOpenAI]:
+    """Create the shared OpenAI client and its HTTP pool (called at app startup)."""
+    global _client, _http_client, _semaphore
+    if _client is not None:
+        return _client
+    if not config.OPENAI_API_KEY:
+        logger.warning("⚠️ OPENAI_API_KEY not set - LLM client not started")
+        return None
+
+    _http_client = httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=config.OPENAI_MAX_CONNECTIONS,
+            max_keepalive_connections=config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(config.OPENAI_TIMEOUT_SECONDS, connect=10.0),
+    )
+    _client = AsyncOpenAI(
+        api_key=config.OPENAI_API_KEY,
+        base_url=config.OPENAI_BASE_URL,
+        http_client=_http_client,
+        # Retries are ours (see _with_retries), so the SDK's would only multiply them
+        max_retries=0,
+    )
+    _semaphore = asyncio.Semaphore(config.OPENAI_MAX_CONCURRENCY)
+    logger.info(
+        f"🔌 LLM client started (pool {config.OPENAI_MAX_CONNECTIONS}, "
+        f"concurrency {config.OPENAI_MAX_CONCURRENCY})"
+    )
+    return _client
+
+
+async def close_llm_client() -> None:
+    """Close the shared client and its connection pool (called at app shutdown)."""
+    global _client, _http_client, _semaphore
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _http_client = None
+    _semaphore = None
+
+
+class BackgroundPriority:
+    """Low priority for the LLM calls of one piece of speculative work, until ``boost``ed."""
+
+    def __init__(self) -> None:
+        self.active = True
+
+    def boost(self) -> None:
+        """Someone is waiting for the result now: calls still waiting go ahead like interactive ones."""
+        self.active = False
+
+
+@contextmanager
+def background_priority() -> Iterator[BackgroundPriority]:
+    """Run the LLM calls made inside (and in tasks started inside) at low priority.
+
+    They never queue ahead of interactive calls, and their waits for a slot
+    have no deadline: they end when a slot frees up or the work is cancelled.
+    """
+    priority = BackgroundPriority()
+    token = _background.set(priority)
+    try:
+        yield priority
+    finally:
+        _background.reset(token)
+
+
+def current_background_priority() -> Optional[BackgroundPriority]:
+    """The priority of the background work running in this context, if it has not been boosted."""
+    priority = _background.get()
+    return priority if priority is not None and priority.active else None
+
+
+def _is_background() -> bool:
+    priority = _background.get()
+    return priority is not None and priority.active
+
+
+async def _background_turn() -> None:
+    """For background calls, wait until no interactive call is queued for a slot."""
+    assert _semaphore is not None
+    # Interactive callers queue on the semaphore itself, so it is locked while any are waiting
+    while _is_background() and _semaphore.locked():
+        await asyncio.sleep(_BACKGROUND_POLL_SECONDS)
+
+
+async def _acquire_slot() -> None:
+    assert _semaphore is not None
+    await _background_turn()
+    await _semaphore.acquire()
+
+
+def get_llm_client() -> Optional[AsyncOpenAI]:
+    """The shared client, started on first use outside the app (scripts, benchmarks)."""
+    return _client or start_llm_client()
+
+
+def _is_retryable(e: BaseException) -> bool:
+    """Timeouts, connection errors, 429 and 5xx are worth retrying (and count against the breaker)."""
+    if isinstance(e, (asyncio.TimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(e, openai.APIStatusError) and (e.status_code == 429 or e.status_code >= 500)
+
+
+async def _attempt(model: str, timeout: float, create: Callable[[], Awaitable[T]]) -> T:
+    """One upstream request, bounded by ``timeout`` and guarded by the circuit breaker."""
+    started = time.perf_counter()
+    try:
+        with _breaker.call(_is_retryable):
+            result = await asyncio.wait_for(create(), timeout)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        registry.inc("connoction_upstream_errors_total", upstream="openai", model=model, error=upstream_error(e))
+        raise
+    elapsed = time.perf_counter() - started
+    _latency.setdefault(model, LatencyTracker(min_samples=config.LLM_HEDGE_MIN_SAMPLES)).observe(elapsed)
+    registry.observe("connoction_upstream_seconds", elapsed, upstream="openai", model=model)
+    return result
+
+
+async def _take_slot(timeout: float) -> float:
+    """Acquire an OPENAI_MAX_CONCURRENCY slot within ``timeout``; returns the time left. The caller releases it.
+
+    Queueing for a slot is local: it is not upstream latency, so it happens
+    outside ``_attempt``'s timeout and never reaches the circuit breaker.
+    """
+    assert _semaphore is not None
+    if _is_background():
+        # No deadline on a background wait: it ends with a slot or with the prefetch being cancelled
+        await _acquire_slot()
+        return timeout
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(_acquire_slot(), timeout)
+    except asyncio.TimeoutError:
+        _stats["queueTimeouts"] += 1
+        raise LLMUnavailableError(f"no free OpenAI slot within {timeout:.1f}s (OPENAI_MAX_CONCURRENCY)")
+    remaining = timeout - (time.monotonic() - started)
+    if remaining <= 0:
+        _semaphore.release()
+        _stats["queueTimeouts"] += 1
+        raise LLMUnavailableError(f"no free OpenAI slot within {timeout:.1f}s (OPENAI_MAX_CONCURRENCY)")
+    return remaining
+
+
+async def _in_slot(timeout: float, attempt: Callable[[float], Awaitable[T]]) -> T:
+    """Wait for an OPENAI_MAX_CONCURRENCY slot, then run ``attempt`` with what is left of ``timeout``."""
+    assert _semaphore is not None
+    remaining = await _take_slot(timeout)
+    try:
+        return await attempt(remaining)
+    finally:
+        _semaphore.release()
+
+
+async def _hedged(model: str, timeout: float, attempt: Callable[[float], Awaitable[T]]) -> T:
+    """Run ``attempt(timeout)``; if it is slower than the model's LLM_HEDGE_PERCENTILE latency, race a second one."""
+    tracker = _latency.get(model)
+    delay = tracker.percentile(config.LLM_HEDGE_PERCENTILE) if tracker and config.LLM_HEDGE_PERCENTILE > 0 else None
+    if delay is None or delay >= timeout or _breaker.state != "closed" or _is_background():
+        return await attempt(timeout)
+    assert _semaphore is not None
+
+    first = asyncio.ensure_future(attempt(timeout))
+    tasks = [first]
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+        # A hedge only helps if it can go out now, not queue behind the local concurrency limit
+        if not done and not _semaphore.locked():
+            _stats["hedges"] += 1
+            logger.info(f"🪞 {model} slower than p{config.LLM_HEDGE_PERCENTILE:g} ({delay:.2f}s), sending hedge request")
+            # Same end time as the first request
+            tasks.append(asyncio.ensure_future(attempt(timeout - delay)))
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is not first:
+                        _stats["hedgeWins"] += 1
+                    return task.result()
+        # Every request failed: report the original one's error
+        return first.result()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # retrieved, so asyncio does not warn about it
+
+
+async def _with_retries(model: str, deadline: float, attempt: Callable[[float], Awaitable[T]]) -> T:
+    """Call ``attempt(timeout)`` until it succeeds, retrying retryable errors with jittered backoff.
+
+    Gives up with LLMUnavailableError when the circuit is open, after
+    LLM_MAX_RETRIES retries, or when the next try would end past ``deadline``
+    seconds from now.
+    """
+    _stats["calls"] += 1
+    give_up_at = time.monotonic() + deadline
+    retries = 0
+    while True:
+        try:
+            return await attempt(min(give_up_at - time.monotonic(), config.OPENAI_TIMEOUT_SECONDS))
+        except CircuitOpenError as e:
+            _stats["unavailable"] += 1
+            raise LLMUnavailableError(f"{model}: {e}", retry_after=e.retry_after) from e
+        except Exception as e:
+            if not _is_retryable(e):
+                raise
+            error = e
+
+        retries += 1
+        response = getattr(error, "response", None)
+        delay = backoff_delay(
+            retries, config.LLM_RETRY_BASE_SECONDS, config.LLM_RETRY_MAX_SECONDS,
+            parse_retry_after(response.headers if response is not None else None),
+        )
+        if retries > config.LLM_MAX_RETRIES or time.monotonic() + delay >= give_up_at:
+            _stats["unavailable"] += 1
+            reason = "timed out" if isinstance(error, asyncio.TimeoutError) else error.__class__.__name__
+            raise LLMUnavailableError(
+                f"{model}: {reason} after {retries} attempt(s)",
+                retry_after=_breaker.retry_after() if _breaker.state == "open" else None,
+            ) from error
+        _stats["retries"] += 1
+        logger.warning(f"🔁 {model} {error.__class__.__name__}, retry {retries}/{config.LLM_MAX_RETRIES} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+
+async def chat_completion(deadline: Optional[float] = None, **kwargs: Any) -> Any:
+    """``chat.completions.create`` on the shared client, bounded by OPENAI_MAX_CONCURRENCY.
+
+    Retried on 429 / 5xx / timeouts within ``deadline`` seconds (default
+    OPENAI_TIMEOUT_SECONDS) and hedged when LLM_HEDGE_PERCENTILE is set.
+    Raises LLMUnavailableError when OpenAI cannot answer in time.
+    """
+    client = get_llm_client()
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY is missing or empty")
+    assert _semaphore is not None
+    model = kwargs.get("model", "unknown")
+
+    def create() -> Awaitable[Any]:
+        return client.chat.completions.create(**kwargs)
+
+    # Background calls wait for their turn before the deadline starts
+    await _background_turn()
+    response = await _with_retries(
+        model,
+        deadline or config.OPENAI_TIMEOUT_SECONDS,
+        lambda timeout: _hedged(
+            model, timeout, lambda remaining: _in_slot(remaining, lambda left: _attempt(model, left, create))
+        ),
+    )
+    record_usage(model, response.usage)
+    return response
+
+
+def record_usage(model: str, usage: Any) -> None:
+    """Add a completion's token usage to the current request's timer."""
+    if usage is None:
+        return
+    timer = current_timer()
+    timer.count(f"{model}.prompt_tokens", usage.prompt_tokens)
+    timer.count(f"{model}.completion_tokens", usage.completion_tokens)
+    registry.inc("connoction_llm_tokens_total", usage.prompt_tokens, model=model, type="prompt")
+    registry.inc("connoction_llm_tokens_total", usage.completion_tokens, model=model, type="completion")
+
+
+async def stream_chat_completion(deadline: Optional[float] = None, **kwargs: Any) -> AsyncIterator[str]:
+    """Stream a chat completion, yielding content deltas as they arrive.
+
+    Opening the stream is retried like ``chat_completion`` (never hedged);
+    once tokens flow it is not, and a gap of LLM_STREAM_IDLE_TIMEOUT_SECONDS
+    between chunks raises LLMUnavailableError. The concurrency slot is taken
+    within ``deadline`` like ``chat_completion``'s and held until the stream
+    ends (or the caller stops iterating).
+    """
+    client = get_llm_client()
+    if client is None:
+        raise RuntimeError("OPENAI_API_KEY is missing or empty")
+    assert _semaphore is not None
+    model = kwargs.get("model", "unknown")
+    await _background_turn()
+    remaining = await _take_slot(deadline or config.OPENAI_TIMEOUT_SECONDS)
+    try:
+        stream = await _with_retries(
+            model,
+            remaining,
+            lambda timeout: _attempt(model, timeout, lambda: client.chat.completions.create(
+                stream=True, stream_options={"include_usage": True}, **kwargs
+            )),
+        )
+        chunks = stream.__aiter__()
+        try:
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(chunks.__anext__(), config.LLM_STREAM_IDLE_TIMEOUT_SECONDS)
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    _stats["streamStalls"] += 1
+                    raise LLMUnavailableError(
+                        f"stream stalled: no chunk for {config.LLM_STREAM_IDLE_TIMEOUT_SECONDS}s"
+                    ) from None
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+                if getattr(chunk, "usage", None):
+                    # Final chunk (no choices) carries the usage
+                    record_usage(model, chunk.usage)
+        finally:
+            await stream.close()
+    finally:
+        _semaphore.release()
+
+
+def llm_stats() -> Dict[str, Any]:
+    return {**_stats, "breaker": _breaker.state, "rejected": _breaker.rejected}
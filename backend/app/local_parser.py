@@ -0,0 +1,236 @@
+from __future__ import annotations
+import re
+from dataclasses import dataclass, field
+from html import unescape
+from typing import Dict, List, Optional
+
+from .html_text import iter_visible_tokens
+from .normalization import clean_text, degree_level, pick_highest_degree
+from .schemas import ExperienceDetail, Profile
+
+# How much each field contributes to the confidence score
+FIELD_WEIGHTS: Dict[str, float] = {
+    "name": 0.2,
+    "role": 0.15,
+    "currentCompany": 0.15,
+    "companies": 0.1,
+    "schools": 0.1,
+    "highestDegree": 0.1,
+    "location": 0.1,
+    "headline": 0.1,
+}
+# Fields the LLM parse can fill (see parse_linkedin_profile_with_llm)
+LLM_FIELDS = [
+    "name", "role", "currentCompany", "companies", "highestDegree", "schools",
+    "location", "field", "bio", "headline", "experience_details",
+]
+
+_DATE_LIKE = re.compile(r"\b(?:19|20)\d{2}\b|\bPresent\b|\b\d+\s+(?:yrs?|mos?)\b", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+@dataclass
+class LocalParseResult:
+    profile: Profile
+    confidence: float
+    missing: List[str] = field(default_factory=list)
+
+
+@dataclass
+class _Entry:
+    texts: List[str] = field(default_factory=list)
+    children: List[List[str]] = field(default_factory=list)
+
+
+class _ProfileDomScanner:
+    """Walks LinkedIn profile markup and collects the top card and list sections."""
+
+    def __init__(self) -> None:
+        self.name: Optional[str] = None
+        self.headline: Optional[str] = None
+        self.location: Optional[str] = None
+        self.about: List[str] = []
+        self.entries: Dict[str, List[_Entry]] = {"experience": [], "education": []}
+
+        self._section: Optional[str] = None
+        self._past_top_card = False
+        self._li_depth = 0
+        self._in_heading = 0
+        # Element whose text is being captured: (target, tag, depth, parts)
+        self._capture: Optional[list] = None
+        self._span_depth = 0
+        self._span_parts: List[str] = []
+
+    def scan(self, html: str) -> None:
+        for kind, value, attrs in iter_visible_tokens(html):
+            if kind == "start":
+                self._start(value, attrs)
+            elif kind == "end":
+                self._end(value)
+            else:
+                self._data(value)
+
+    def _start(self, tag: str, attrs: Dict[str, str]) -> None:
+        if self._capture is not None:
+            if tag == self._capture[1]:
+                self._capture[2] += 1
+        else:
+            cls = attrs.get("class", "")
+            if tag == "h1" and self.name is None:
+                self._capture = ["name", tag, 1, []]
+            elif self.name is not None and not self._past_top_card:
+                if self.headline is None and "text-body-medium" in cls:
+                    self._capture = ["headline", tag, 1, []]
+                elif self.location is None and "text-body-small" in cls and "inline" in cls:
+                    self._capture = ["location", tag, 1, []]
+
+        if tag == "section":
+            self._section = "other"
+            self._li_depth = 0
+        section = attrs.get("id")
+        if section in ("about", "experience", "education"):
+            self._section = section
+            self._past_top_card = True
+            self._li_depth = 0
+        if tag in ("h2", "h3"):
+            self._in_heading += 1
+        elif tag == "li" and self._section in self.entries:
+            self._li_depth += 1
+            if self._li_depth == 1:
+                self.entries[self._section].append(_Entry())
+            elif self._li_depth == 2 and self.entries[self._section]:
+                self.entries[self._section][-1].children.append([])
+        elif tag == "span":
+            if self._span_depth:
+                self._span_depth += 1
+            elif attrs.get("aria-hidden") == "true":
+                self._span_depth = 1
+                self._span_parts = []
+
+    def _end(self, tag: str) -> None:
+        if self._capture is not None and tag == self._capture[1]:
+            self._capture[2] -= 1
+            if self._capture[2] == 0:
+                target, _, _, parts = self._capture
+                setattr(self, target, clean_text(" ".join(parts)))
+                self._capture = None
+        if tag in ("h2", "h3"):
+            self._in_heading = max(0, self._in_heading - 1)
+        elif tag == "li" and self._li_depth:
+            self._li_depth -= 1
+        elif tag == "span" and self._span_depth:
+            self._span_depth -= 1
+            if self._span_depth == 0:
+                self._span_done(clean_text(" ".join(self._span_parts)))
+
+    def _data(self, raw: str) -> None:
+        text = _WHITESPACE.sub(" ", unescape(raw) if "&" in raw else raw).strip()
+        if not text:
+            return
+        if self._capture is not None:
+            self._capture[3].append(text)
+        if self._span_depth:
+            self._span_parts.append(text)
+
+    def _span_done(self, text: Optional[str]) -> None:
+        if not text or self._in_heading:
+            return
+        if self._section == "about":
+            self.about.append(text)
+        elif self._section in self.entries and self._li_depth and self.entries[self._section]:
+            entry = self.entries[self._section][-1]
+            if self._li_depth >= 2 and entry.children:
+                entry.children[-1].append(text)
+            else:
+                entry.texts.append(text)
+
+
+def _description(texts: List[str]) -> Optional[str]:
+    for text in texts:
+        if len(text) > 40 and not _DATE_LIKE.search(text[:40]):
+            return text
+    return None
+
+
+def _experience(entries: List[_Entry]) -> tuple[List[ExperienceDetail], Optional[int]]:
+    """Experience details plus the index of the first current position."""
+    details: List[ExperienceDetail] = []
+    current: Optional[int] = None
+    for entry in entries:
+        children = [c for c in entry.children if c]
+        if children and entry.texts:
+            # Several positions grouped under one company
+            company = entry.texts[0]
+            for child in children:
+                if current is None and any("present" in t.lower() for t in child[1:3]):
+                    current = len(details)
+                details.append(ExperienceDetail(company=company, title=child[0], description=_description(child[1:])))
+        elif len(entry.texts) >= 2:
+            title = entry.texts[0]
+            company = entry.texts[1].split(" · ")[0].strip()
+            if current is None and any("present" in t.lower() for t in entry.texts[1:4]):
+                current = len(details)
+            details.append(ExperienceDetail(company=company, title=title, description=_description(entry.texts[2:])))
+    return details, current
+
+
+def parse_profile_locally(html_content: str, linkedin_url: Optional[str]) -> LocalParseResult:
+    """Fill a Profile from LinkedIn's DOM structure without calling the LLM.
+
+    Plain text (what the extension sends when it cannot read the DOM) yields an
+    empty profile with confidence 0, so callers fall back to the LLM parse.
+    """
+    scanner = _ProfileDomScanner()
+    scanner.scan(html_content)
+
+    details, current = _experience(scanner.entries["experience"])
+    companies: List[str] = []
+    for detail in details:
+        if detail.company not in companies:
+            companies.append(detail.company)
+
+    role = current_company = None
+    if details:
+        position = details[current if current is not None else 0]
+        role, current_company = position.title, position.company
+    elif scanner.headline and " at " in scanner.headline:
+        role, _, current_company = scanner.headline.partition(" at ")
+        role, current_company = clean_text(role), clean_text(current_company.split("|")[0])
+
+    schools: List[str] = []
+    degrees: List[str] = []
+    for entry in scanner.entries["education"]:
+        if not entry.texts:
+            continue
+        if entry.texts[0] not in schools:
+            schools.append(entry.texts[0])
+        if len(entry.texts) > 1 and not _DATE_LIKE.fullmatch(entry.texts[1].split(" ")[0]):
+            degrees.append(entry.texts[1])
+
+    profile = Profile(
+        name=scanner.name,
+        role=role,
+        currentCompany=current_company,
+        companies=companies,
+        highestDegree=degree_level(pick_highest_degree(degrees)),
+        schools=schools,
+        location=scanner.location,
+        linkedinUrl=linkedin_url,
+        bio=clean_text(" ".join(scanner.about)),
+        headline=scanner.headline,
+        experience_details=details,
+    )
+
+    confidence = sum(weight for name, weight in FIELD_WEIGHTS.items() if getattr(profile, name))
+    missing = [name for name in LLM_FIELDS if not getattr(profile, name)]
+    return LocalParseResult(profile=profile, confidence=round(confidence, 2), missing=missing)
+
+
+def merge_profiles(primary: Profile, fallback: Profile) -> Profile:
+    """Fill the empty fields of ``primary`` from ``fallback``."""
+    updates = {
+        name: getattr(fallback, name)
+        for name in LLM_FIELDS
+        if not getattr(primary, name) and getattr(fallback, name)
+    }
+    return primary.model_copy(update=updates)
@@ -1,52 +1,123 @@
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import sys
-from datetime import datetime
 from pathlib import Path
+from typing import Any, List, Optional
+
+from . import config
+
+# Background thread that drains the log queue into the real handlers (async mode only)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _file_handler(path: Path) -> logging.Handler:
+    """Size-based rotation when LOG_MAX_BYTES is set, else a new file every midnight."""
+    if config.LOG_MAX_BYTES > 0:
+        return logging.handlers.RotatingFileHandler(
+            path, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8"
+        )
+    return logging.handlers.TimedRotatingFileHandler(
+        path, when="midnight", backupCount=config.LOG_BACKUP_COUNT, encoding="utf-8"
+    )
+
+
+def build_handlers(log_dir: Path) -> List[logging.Handler]:
+    """Console (INFO), full log (DEBUG) and error log (ERROR) handlers."""
+    log_dir.mkdir(parents=True, exist_ok=True)
 
-def setup_logging(log_level: str = "INFO"):
-    """Setup structured logging for the application."""
-    
-    # Create logs directory
-    log_dir = Path(__file__).parent.parent / "logs"
-    log_dir.mkdir(exist_ok=True)
-    
     # Create formatters
     detailed_formatter = logging.Formatter(
         '%(asctime)s | %(levelname)-8s | %(name)s | %(funcName)s:%(lineno)d | %(message)s'
     )
-    
+
     simple_formatter = logging.Formatter(
         '%(asctime)s | %(levelname)-8s | %(message)s'
     )
-    
-    # Root logger
-    root_logger = logging.getLogger()
-    root_logger.setLevel(getattr(logging, log_level.upper()))
-    
-    # Clear existing handlers
-    root_logger.handlers.clear()
-    
+
     # Console handler (simple format)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(simple_formatter)
     console_handler.setLevel(logging.INFO)
-    root_logger.addHandler(console_handler)
-    
+
     # File handler (detailed format)
-    today = datetime.now().strftime("%Y-%m-%d")
-    file_handler = logging.FileHandler(log_dir / f"connoction-{today}.log")
+    file_handler = _file_handler(log_dir / "connoction.log")
     file_handler.setFormatter(detailed_formatter)
     file_handler.setLevel(logging.DEBUG)
-    root_logger.addHandler(file_handler)
-    
+
     # Error file handler
-    error_handler = logging.FileHandler(log_dir / f"errors-{today}.log")
+    error_handler = _file_handler(log_dir / "errors.log")
     error_handler.setFormatter(detailed_formatter)
     error_handler.setLevel(logging.ERROR)
-    root_logger.addHandler(error_handler)
-    
+    return [console_handler, file_handler, error_handler]
+
+
+def setup_logging(log_level: Optional[str] = None, async_mode: Optional[bool] = None, log_dir: Optional[Path] = None):
+    """Setup structured logging for the application.
+
+    ``log_level`` defaults to LOG_LEVEL. In async mode (LOG_ASYNC, the default)
+    the root logger only puts records on a queue; console and file writes
+    happen on a background thread, off the event loop.
+    """
+    global _listener
+    stop_logging()
+    async_mode = config.LOG_ASYNC if async_mode is None else async_mode
+
+    # Root logger
+    root_logger = logging.getLogger()
+    root_logger.setLevel(getattr(logging, (log_level or config.LOG_LEVEL).upper()))
+
+    # Clear existing handlers
+    root_logger.handlers.clear()
+
+    handlers = build_handlers(log_dir or Path(config.LOG_DIR))
+    if async_mode:
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            root_logger.addHandler(handler)
+
     return root_logger
 
+
+def stop_logging() -> None:
+    """Flush queued records and stop the background writer (called at shutdown and exit)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
 def get_logger(name: str):
     """Get a logger for a specific module."""
     return logging.getLogger(name)
+
+
+def truncate(value: Any, max_chars: Optional[int] = None) -> str:
+    """``str(value)`` cut to LOG_PAYLOAD_MAX_CHARS, noting how much was dropped."""
+    text = str(value)
+    max_chars = config.LOG_PAYLOAD_MAX_CHARS if max_chars is None else max_chars
+    if len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... [{len(text) - max_chars} more chars]"
+
+
+def log_payload(logger: logging.Logger, message: str, payload: Any, level: int = logging.DEBUG) -> None:
+    """Log a large payload (LLM responses, parsed dicts) for a sample of calls, truncated.
+
+    Nothing is formatted unless ``level`` is enabled and the call is sampled
+    (LOG_PAYLOAD_SAMPLE_RATE, 0-1).
+    """
+    if not logger.isEnabledFor(level) or random.random() >= config.LOG_PAYLOAD_SAMPLE_RATE:
+        return
+    logger.log(level, f"{message}: {truncate(payload)}", stacklevel=2)
@@ -1,29 +1,143 @@
 from __future__ import annotations
+import asyncio
 import os
-from typing import Optional, Dict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
 import hashlib
+import json
+import math
 import datetime as dt
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import time
 
-from .schemas import DraftRequest, DraftResponse, NotionResult, Profile
-from .normalization import clean_text, derive_field, pick_highest_degree
-from .email import maybe_generate_draft, classify_field_with_llm, parse_linkedin_profile_with_llm
-from .notion_client import NotionWrapper
+from .schemas import (
+    BatchDraftItem, BatchDraftRequest, Draft, DraftOptions, DraftRequest, DraftResponse, ExtractResponse, NotionResult,
+    Profile,
+)
+from .normalization import clean_text, derive_field, pick_highest_degree, canonicalize_profile_text, canonicalize_linkedin_url
+from .email import (
+    build_draft_messages,
+    draft_provider_error,
+    maybe_generate_draft,
+    parse_draft,
+    stream_draft_with_openai,
+    classify_field_with_llm,
+    parse_linkedin_profile_with_llm,
+    extract_profile_content,
+)
+from .notion_client import NotionWrapper, get_notion, start_notion, close_notion, message_properties
+from .notion_sync import export_lines, import_records, iter_jsonl, iter_text_lines
 from . import config
 from .logging_config import setup_logging, get_logger
+from .cache import build_cache
+from .compaction import load_tokenizer
+from .local_parser import parse_profile_locally, merge_profiles
+from .profile_sections import (
+    SECTION_FIELDS, SectionSnapshot, apply_section_updates, changed_sections, fingerprint_sections,
+    section_fields, section_prompt_text,
+)
+from .llm_client import (
+    BackgroundPriority, LLMUnavailableError, current_background_priority, start_llm_client, close_llm_client, llm_stats,
+)
+from .timing import start_timer, current_timer
+from .metrics import monitor_event_loop, registry
+from .middleware import RequestBodyMiddleware, RequestLogMiddleware
+from .singleflight import SingleFlight
+from .prefetch import Prefetcher
+from .field_classifier import classify_field_locally
 
-# Setup logging
-setup_logging("DEBUG")
+# Setup logging (LOG_LEVEL, queued to a background writer unless LOG_ASYNC=false)
+setup_logging()
 logger = get_logger(__name__)
 
-# Simple in-memory cache for extracted profiles
-profile_cache: Dict[str, Profile] = {}
+# Cache for extracted profiles (LRU + TTL, optionally shared on disk across workers)
+profile_cache = build_cache(
+    config.PROFILE_CACHE_BACKEND,
+    table="profiles",
+    max_entries=config.PROFILE_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.PROFILE_CACHE_TTL_SECONDS,
+    path=config.PROFILE_CACHE_PATH,
+)
+# Generated drafts (opt-in): same profile, ask and message type -> no new gpt-4o call
+draft_cache = build_cache(
+    config.PROFILE_CACHE_BACKEND,
+    table="drafts",
+    max_entries=config.DRAFT_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.DRAFT_CACHE_TTL_SECONDS,
+    path=config.PROFILE_CACHE_PATH,
+) if config.DRAFT_CACHE_ENABLED else None
+# Field classification memo: (role, companies, degree) -> Notion field
+field_memo = build_cache(
+    config.PROFILE_CACHE_BACKEND,
+    table="fields",
+    max_entries=config.FIELD_MEMO_MAX_ENTRIES,
+    ttl_seconds=config.PROFILE_CACHE_TTL_SECONDS,
+    path=config.PROFILE_CACHE_PATH,
+)
+# Last extraction per canonical LinkedIn URL with its section fingerprints, for incremental re-extraction
+section_cache = build_cache(
+    config.PROFILE_CACHE_BACKEND,
+    table="profile_sections",
+    max_entries=config.PROFILE_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.PROFILE_CACHE_TTL_SECONDS,
+    path=config.PROFILE_CACHE_PATH,
+)
+# Parsed profiles by handle (hash of the uploaded page), so follow-up requests can skip the HTML
+handle_cache = build_cache(
+    config.PROFILE_CACHE_BACKEND,
+    table="profile_handles",
+    max_entries=config.PROFILE_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.PROFILE_CACHE_TTL_SECONDS,
+    path=config.PROFILE_CACHE_PATH,
+)
+# Concurrent requests for the same uncached profile share one extraction (keyed like the cache)
+extraction_flights: SingleFlight[Profile] = SingleFlight()
+# Prefetch priority of the extraction flights a prefetch started; a request joining one boosts it
+extraction_priorities: Dict[str, BackgroundPriority] = {}
+# POST /prefetch jobs, keyed by profile handle
+prefetcher = Prefetcher(config.PREFETCH_MAX_CONCURRENCY, config.PREFETCH_MAX_PENDING)
+# Notion lookups a prefetch started and left running once its profile was ready
+prefetch_lookups: Set[asyncio.Task] = set()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    start_llm_client()
+    # Load (possibly download) the tokenizer now, so no request blocks the event loop on it
+    await asyncio.to_thread(load_tokenizer)
+    notion = start_notion()
+    reconciler = None
+    flusher = None
+    if notion and notion.index is not None:
+        reconciler = asyncio.create_task(
+            notion.index.run_reconciler(notion, config.NOTION_INDEX_REFRESH_SECONDS)
+        )
+    if notion and notion.queue is not None:
+        flusher = asyncio.create_task(notion.queue.run_flusher(notion, config.NOTION_WRITE_CONCURRENCY))
+    loop_monitor = None
+    if config.EVENT_LOOP_MONITOR_INTERVAL_SECONDS > 0:
+        loop_monitor = asyncio.create_task(monitor_event_loop(config.EVENT_LOOP_MONITOR_INTERVAL_SECONDS))
+    yield
+    prefetcher.cancel_all()
+    _cancel(*prefetch_lookups)
+    if loop_monitor:
+        loop_monitor.cancel()
+    if reconciler:
+        reconciler.cancel()
+    if flusher:
+        # Unsent writes stay in the queue file and go out after the next start
+        flusher.cancel()
+    await close_llm_client()
+    await close_notion()
 
-app = FastAPI(title="Connoction Backend")
 
+app = FastAPI(title="Connoction Backend", lifespan=lifespan)
+
+# Innermost first: body limits/decoding, then CORS (so rejections carry CORS headers), then logging
+app.add_middleware(RequestBodyMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=config.ALLOWED_ORIGINS or ["*"],
@@ -31,106 +145,397 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestLogMiddleware)
 
-# Add request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start_time = time.time()
-    
-    # Log incoming request
-    logger.info(f"📨 {request.method} {request.url}")
+
+@app.exception_handler(LLMUnavailableError)
+async def llm_unavailable(request: Request, exc: LLMUnavailableError) -> JSONResponse:
+    logger.error(f"❌ LLM unavailable: {exc}")
+    headers = {"Retry-After": str(math.ceil(exc.retry_after))} if exc.retry_after else None
+    return JSONResponse({"detail": f"OpenAI unavailable: {exc}"}, status_code=503, headers=headers)
+
+
+
+def get_cache_key(linkedin_url: str, profile_text: str) -> str:
+    """Generate a cache key from the LinkedIn URL and the canonicalized profile text.
+
+    ``profile_text`` is the cleaned text from ``extract_profile_content``, so markup-only
+    changes on LinkedIn's side do not produce a miss.
+    """
+    canonical = canonicalize_profile_text(profile_text)
+    content_hash = hashlib.blake2b(canonical.encode(), digest_size=8).hexdigest()
+    return f"{canonicalize_linkedin_url(linkedin_url)}_{content_hash}"
+
+
+def get_cached_profile(cache_key: str) -> Optional[Profile]:
+    """Get cached profile if available."""
+    raw = profile_cache.get(cache_key)
+    if raw is None:
+        return None
+    return Profile.model_validate_json(raw)
+
+
+def cache_profile(cache_key: str, profile: Profile) -> None:
+    """Cache a profile; size and TTL limits are enforced by the cache backend."""
+    profile_cache.set(cache_key, profile.model_dump_json(exclude={"htmlContent"}))
+
+
+def get_profile_handle(html_content: str) -> str:
+    """Handle of an uploaded page: SHA-256 of the HTML, which clients can compute without uploading it."""
+    return hashlib.sha256(html_content.encode()).hexdigest()
+
+
+def get_handle_profile(handle: str) -> Optional[Profile]:
+    raw = handle_cache.get(handle)
+    if raw is None:
+        return None
+    return Profile.model_validate_json(raw)
+
+
+def get_section_snapshot(linkedin_url: str) -> Optional[SectionSnapshot]:
+    raw = section_cache.get(canonicalize_linkedin_url(linkedin_url))
+    if raw is None:
+        return None
+    return SectionSnapshot.from_json(raw)
+
+
+def cache_section_snapshot(linkedin_url: str, snapshot: SectionSnapshot) -> None:
+    section_cache.set(canonicalize_linkedin_url(linkedin_url), snapshot.to_json())
+
+
+async def extract_profile(
+    html_content: str,
+    linkedin_url: str,
+    profile_text: str,
+    sections: Optional[Dict[str, str]] = None,
+    previous: Optional[SectionSnapshot] = None,
+) -> Optional[Profile]:
+    """Parse a profile locally from the DOM, asking the LLM only for what is missing.
+
+    With the ``previous`` extraction of the same URL, only the sections whose
+    text changed since are sent to the LLM; the rest of the profile is reused.
+    """
+    local = parse_profile_locally(html_content, linkedin_url)
+    logger.info(f"🧩 Local parse confidence: {local.confidence} (missing: {', '.join(local.missing) or 'none'})")
+    if local.confidence >= config.LOCAL_PARSE_MIN_CONFIDENCE:
+        return local.profile
     
-    # For POST requests, log body size (don't log full body as it's huge HTML)
-    if request.method == "POST":
-        body = await request.body()
-        logger.info(f"📦 Request body size: {len(body)} bytes")
-        
-        # Recreate request with body for downstream processing
-        async def receive():
-            return {"type": "http.request", "body": body}
-        request._receive = receive
+    if previous is not None and sections is not None:
+        changed = changed_sections(previous.fingerprints, fingerprint_sections(sections))
+        if not changed:
+            logger.info("♻️ No profile section changed since the last extraction - reusing it")
+            registry.inc("connoction_incremental_extractions_total", result="unchanged")
+            return merge_profiles(local.profile, previous.profile)
+        if len(changed) < len(SECTION_FIELDS):
+            logger.info(f"♻️ Re-extracting changed sections only: {', '.join(changed)}")
+            fields = section_fields(changed)
+            llm_profile = await parse_linkedin_profile_with_llm(
+                html_content,
+                linkedin_url,
+                text_content=section_prompt_text(sections, changed, config.PROFILE_TOKEN_BUDGET),
+                fields=fields,
+            )
+            if llm_profile:
+                registry.inc("connoction_incremental_extractions_total", result="partial")
+                return merge_profiles(local.profile, apply_section_updates(previous.profile, llm_profile, fields))
     
-    response = await call_next(request)
+    registry.inc("connoction_incremental_extractions_total", result="full")
+    # Use LLM to parse the fields the local parser could not fill
+    llm_profile = await parse_linkedin_profile_with_llm(
+        html_content,
+        linkedin_url,
+        text_content=profile_text,
+        fields=local.missing if local.confidence > 0 else None,
+    )
+    if not llm_profile:
+        return local.profile if local.profile.name else None
+    return merge_profiles(local.profile, llm_profile)
+
+
+def get_field_memo_key(profile: Profile) -> str:
+    """Key on the inputs of the field classification prompt: role, companies and degree."""
+    parts = [
+        (profile.role or "").casefold(),
+        sorted(c.casefold() for c in profile.companies),
+        (profile.highestDegree or "").casefold(),
+    ]
+    return hashlib.blake2b(json.dumps(parts).encode(), digest_size=16).hexdigest()
+
+
+async def classify_field(profile: Profile) -> Optional[str]:
+    """Notion field for a profile: memoized, else local classifier, else gpt-4o-mini for unclear cases."""
+    memo_key = get_field_memo_key(profile)
+    field = field_memo.get(memo_key)
+    if field:
+        return field
     
-    # Log response
-    process_time = time.time() - start_time
-    logger.info(f"📤 Response: {response.status_code} | Time: {process_time:.3f}s")
+    prediction = classify_field_locally(profile)
+    logger.info(f"🏷️ Local field: {prediction.field} (confidence {prediction.confidence})")
+    if prediction.field and prediction.confidence >= config.FIELD_CLASSIFIER_MIN_CONFIDENCE:
+        field = prediction.field
+    else:
+        field = await classify_field_with_llm(profile)
+        if not field:
+            # LLM unavailable: use the unsure local guess, but don't memoize it so a later call can do better
+            return prediction.field
     
-    return response
+    field_memo.set(memo_key, field)
+    return field
 
 
-def get_cache_key(linkedin_url: str, html_content: str) -> str:
-    """Generate a cache key based on LinkedIn URL and content hash."""
-    content_hash = hashlib.md5(html_content.encode()).hexdigest()[:12]
-    return f"{linkedin_url}_{content_hash}"
+def get_draft_cache_key(profile: Profile, ask: str, message_type: str) -> str:
+    """Key a draft on exactly the prompt gpt-4o would see (profile fields, ask, message type)."""
+    prompt = json.dumps(build_draft_messages(profile, ask, message_type), sort_keys=True)
+    prompt_hash = hashlib.blake2b(prompt.encode(), digest_size=16).hexdigest()
+    url = canonicalize_linkedin_url(str(profile.linkedinUrl)) if profile.linkedinUrl else ""
+    return f"{message_type}_{url}_{prompt_hash}"
 
 
-def get_cached_profile(cache_key: str) -> Optional[Profile]:
-    """Get cached profile if available."""
-    return profile_cache.get(cache_key)
+def get_cached_draft(cache_key: str) -> Optional[Draft]:
+    if draft_cache is None:
+        return None
+    raw = draft_cache.get(cache_key)
+    if raw is None:
+        return None
+    return Draft.model_validate_json(raw)
 
 
-def cache_profile(cache_key: str, profile: Profile) -> None:
-    """Cache a profile with size limit."""
-    # Simple LRU: keep only last 50 profiles
-    if len(profile_cache) >= 50:
-        oldest_key = next(iter(profile_cache))
-        del profile_cache[oldest_key]
-    profile_cache[cache_key] = profile
+def cache_draft(cache_key: str, draft: Draft) -> None:
+    if draft_cache is not None:
+        draft_cache.set(cache_key, draft.model_dump_json())
+
+
+async def generate_draft(
+    profile: Profile, ask: str, message_type: str, regenerate: bool = False
+) -> tuple[Optional[Draft], Optional[str], Optional[str]]:
+    """``maybe_generate_draft`` behind the draft cache; ``regenerate`` skips the lookup."""
+    if draft_cache is None:
+        return await maybe_generate_draft(profile, ask, message_type)
+    cache_key = get_draft_cache_key(profile, ask, message_type)
+    if not regenerate:
+        draft = get_cached_draft(cache_key)
+        if draft:
+            logger.info(f"🎯 Using cached {message_type} draft - no gpt-4o call")
+            return draft, "cache", None
+    draft, provider, error = await maybe_generate_draft(profile, ask, message_type)
+    if draft:
+        cache_draft(cache_key, draft)
+    return draft, provider, error
+
+
+async def extract_and_cache_profile(
+    cache_key: str, html_content: str, linkedin_url: str, profile_text: str, sections: Dict[str, str]
+) -> Profile:
+    profile = await extract_profile(
+        html_content, linkedin_url, profile_text, sections, get_section_snapshot(linkedin_url)
+    )
+    if not profile:
+        logger.error("❌ LLM parsing returned None - no profile data extracted")
+        raise HTTPException(
+            status_code=500, 
+            detail="Failed to parse LinkedIn profile with LLM"
+        )
+    
+    # Cache the extracted profile
+    cache_profile(cache_key, profile)
+    cache_section_snapshot(linkedin_url, SectionSnapshot(profile, fingerprint_sections(sections)))
+    logger.info("✅ Profile extracted and cached for future use")
+    return profile
 
 
 @app.get("/healthz")
 def healthz() -> dict:
-    return {"status": "ok"}
+    return {"status": "ok", "llm": llm_stats()}
 
 
-@app.post("/draft", response_model=DraftResponse)
-async def create_draft(request: DraftRequest) -> DraftResponse:
-    logger.info(f"🎯 Processing draft request for: {request.profile.linkedinUrl}")
-    logger.info(f"📊 Request details: ask='{request.ask}', has_html={bool(request.profile.htmlContent)}")
-    
+@app.get("/notion/writes/{write_id}")
+def notion_write_status(write_id: str) -> dict:
+    """Progress of a queued Notion write: pending, sending, done (with pageId/url) or failed (with error)."""
+    notion = get_notion()
+    if notion is None or notion.queue is None:
+        raise HTTPException(status_code=404, detail="Notion write queue is not enabled")
+    status = notion.queue.status(write_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Unknown write id")
+    return status
+
+
+@app.get("/notion/export")
+async def notion_export(format: str = "jsonl", properties: Optional[str] = None) -> StreamingResponse:
+    """Stream every page of the contacts database as JSONL or CSV (``properties``: comma-separated names)."""
+    notion = get_notion()
+    if notion is None:
+        raise HTTPException(status_code=503, detail="Notion is not configured")
+    if format not in ("jsonl", "csv"):
+        raise HTTPException(status_code=400, detail="format must be jsonl or csv")
+    names = [p.strip() for p in properties.split(",") if p.strip()] if properties else None
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(export_lines(notion, format, names), media_type=media_type)
+
+
+@app.post("/notion/import")
+async def notion_import(request: Request, dryRun: bool = False) -> dict:
+    """Create/update pages from a JSONL body (one record per line), writing only changed properties."""
+    notion = get_notion()
+    if notion is None:
+        raise HTTPException(status_code=503, detail="Notion is not configured")
+    try:
+        return await import_records(
+            notion, iter_jsonl(iter_text_lines(request.stream())), config.NOTION_IMPORT_CONCURRENCY, dryRun
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSONL: {e}")
+
+
+def collect_app_metrics() -> List[Any]:
+    """Cache, single-flight, LLM and Notion queue counters, read at scrape time."""
+    samples: List[Any] = []
+    caches = {"profiles": profile_cache, "sections": section_cache, "handles": handle_cache, "fields": field_memo}
+    if draft_cache is not None:
+        caches["drafts"] = draft_cache
+    for name, cache in caches.items():
+        stats = cache.stats
+        for result, value in (("hit", stats.hits), ("miss", stats.misses)):
+            samples.append(("connoction_cache_lookups_total", "counter", {"cache": name, "result": result}, value))
+        samples.append(("connoction_cache_evictions_total", "counter", {"cache": name}, stats.evictions + stats.expirations))
+        samples.append(("connoction_cache_entries", "gauge", {"cache": name}, len(cache)))
+    flights = {"extraction": extraction_flights}
+    notion = get_notion()
+    if notion:
+        flights["notionLookup"] = notion.lookups
+    for name, flight in flights.items():
+        samples.append(("connoction_singleflight_calls_total", "counter", {"flight": name}, flight.calls))
+        samples.append(("connoction_singleflight_shared_total", "counter", {"flight": name}, flight.shared))
+    for result, value in prefetcher.counts.items():
+        samples.append(("connoction_prefetches_total", "counter", {"result": result}, value))
+    llm = llm_stats()
+    for key in ("calls", "retries", "hedges", "hedgeWins", "unavailable", "queueTimeouts", "streamStalls", "rejected"):
+        samples.append(("connoction_llm_events_total", "counter", {"event": key}, llm[key]))
+    samples.append(("connoction_llm_breaker_open", "gauge", {}, 0 if llm["breaker"] == "closed" else 1))
+    if notion:
+        samples.append(("connoction_notion_rate_wait_seconds_total", "counter", {}, notion.limiter.waited))
+        if notion.queue is not None:
+            queue = notion.queue.stats()
+            for status in ("pending", "sending", "done", "failed"):
+                samples.append(("connoction_notion_writes", "gauge", {"status": status}, queue[status]))
+    return samples
+
+
+registry.register_collector(collect_app_metrics)
+
+
+@app.get("/metrics")
+def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of stage/upstream latencies, tokens, cache and error counters."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/cache/stats")
+def cache_stats() -> dict:
+    return {
+        "profiles": {
+            "backend": config.PROFILE_CACHE_BACKEND,
+            "entries": len(profile_cache),
+            **profile_cache.stats.as_dict(),
+        },
+        "sections": {
+            "entries": len(section_cache),
+            **section_cache.stats.as_dict(),
+        },
+        "handles": {
+            "entries": len(handle_cache),
+            **handle_cache.stats.as_dict(),
+        },
+        "fields": {
+            "entries": len(field_memo),
+            **field_memo.stats.as_dict(),
+        },
+        "drafts": {
+            "enabled": draft_cache is not None,
+            "entries": len(draft_cache) if draft_cache is not None else 0,
+            **(draft_cache.stats.as_dict() if draft_cache is not None else {}),
+            # Every hit is a gpt-4o completion not paid for
+            "gpt4oCallsSaved": draft_cache.stats.hits if draft_cache is not None else 0,
+        },
+        "inFlight": {
+            "extraction": extraction_flights.stats(),
+            "notionLookup": notion.lookups.stats() if (notion := get_notion()) else None,
+        },
+        "notionWrites": notion.queue.stats() if notion and notion.queue is not None else None,
+        "prefetch": prefetcher.stats(),
+    }
+
+
+async def extract_in_flight(cache_key: str, fn: Callable[[], Awaitable[Profile]]) -> Profile:
+    """``extraction_flights.do``; a flight started by a prefetch runs at normal priority once a request joins it."""
+    priority = current_background_priority()
+    if priority is None and (flight_priority := extraction_priorities.get(cache_key)) is not None:
+        flight_priority.boost()
+
+    def start() -> Awaitable[Profile]:
+        # Registered as the flight starts, so a request joining right after finds it
+        if priority is not None:
+            extraction_priorities[cache_key] = priority
+        return fn()
+
+    try:
+        return await extraction_flights.do(cache_key, start)
+    finally:
+        if priority is not None and extraction_priorities.get(cache_key) is priority:
+            del extraction_priorities[cache_key]
+
+
+async def resolve_profile(request_profile: Profile) -> Profile:
+    """Parsed, normalized profile for a request: by handle, cached, extracted from HTML, or manual fields."""
+    if request_profile.handle and not request_profile.htmlContent:
+        profile = get_handle_profile(request_profile.handle)
+        if profile is None:
+            # The popup may have sent the page with /prefetch moments ago
+            prefetched = await prefetcher.join(request_profile.handle)
+            profile = prefetched.model_copy(deep=True) if prefetched else None
+        if profile is None:
+            # Expired or evicted: the client re-uploads the page with /extract
+            raise HTTPException(status_code=404, detail="Unknown profile handle; upload the page with POST /extract")
+        logger.info(f"🎯 Using profile for handle {request_profile.handle[:12]} - no HTML sent")
     # Check if we have HTML content for LLM parsing
-    if request.profile.htmlContent and request.profile.linkedinUrl:
-        # Generate cache key and check if profile is already cached
-        cache_key = get_cache_key(str(request.profile.linkedinUrl), request.profile.htmlContent)
+    elif request_profile.htmlContent and request_profile.linkedinUrl:
+        # Generate cache key from the cleaned profile text and check if profile is already cached
+        profile_text, sections = extract_profile_content(request_profile.htmlContent)
+        cache_key = get_cache_key(str(request_profile.linkedinUrl), profile_text)
         profile = get_cached_profile(cache_key)
         
         if profile:
             logger.info("🎯 Using cached profile - no re-extraction needed")
             logger.info(f"📋 Cache key: {cache_key}")
         else:
-            logger.info("🔄 Profile not cached, performing LLM parsing")
-            logger.debug(f"📄 HTML content length: {len(request.profile.htmlContent)} chars")
+            logger.info("🔄 Profile not cached, extracting")
+            logger.debug(f"📄 HTML content length: {len(request_profile.htmlContent)} chars")
             
-            # Use LLM to parse the profile from HTML
-            profile = await parse_linkedin_profile_with_llm(
-                request.profile.htmlContent, 
-                str(request.profile.linkedinUrl)
+            shared = await extract_in_flight(
+                cache_key,
+                lambda: extract_and_cache_profile(
+                    cache_key,
+                    request_profile.htmlContent,
+                    str(request_profile.linkedinUrl),
+                    profile_text,
+                    sections,
+                ),
             )
-            
-            if not profile:
-                logger.error("❌ LLM parsing returned None - no profile data extracted")
-                raise HTTPException(
-                    status_code=500, 
-                    detail="Failed to parse LinkedIn profile with LLM"
-                )
-            
-            # Cache the extracted profile
-            cache_profile(cache_key, profile)
-            logger.info("✅ LLM parsing successful, profile cached for future use")
+            # Callers normalize and classify in place, so each gets its own copy
+            profile = shared.model_copy(deep=True)
     else:
         logger.info("🔄 Using manual extraction data (fallback)")
         # Fallback: use manually extracted data (shouldn't happen with new flow)
         profile = Profile(
-            name=clean_text(request.profile.name),
-            role=clean_text(request.profile.role),
-            currentCompany=clean_text(request.profile.currentCompany),
-            companies=[clean_text(c) for c in request.profile.companies if clean_text(c)],
-            highestDegree=clean_text(request.profile.highestDegree),
-            field=request.profile.field,
-            schools=[clean_text(s) for s in request.profile.schools if clean_text(s)],
-            location=clean_text(request.profile.location),
-            linkedinUrl=request.profile.linkedinUrl,
+            name=clean_text(request_profile.name),
+            role=clean_text(request_profile.role),
+            currentCompany=clean_text(request_profile.currentCompany),
+            companies=[clean_text(c) for c in request_profile.companies if clean_text(c)],
+            highestDegree=clean_text(request_profile.highestDegree),
+            field=request_profile.field,
+            schools=[clean_text(s) for s in request_profile.schools if clean_text(s)],
+            location=clean_text(request_profile.location),
+            linkedinUrl=request_profile.linkedinUrl,
         )
     
     # Apply normalization to LLM-extracted data
@@ -144,108 +549,489 @@ async def create_draft(request: DraftRequest) -> DraftResponse:
     
     # Field is now classified directly during parsing, but fallback if needed
     if not profile.field:
-        profile.field = await classify_field_with_llm(profile)
+        with current_timer().stage("classify"):
+            profile.field = await classify_field(profile)
+    return profile
+
+
+@app.post("/extract", response_model=ExtractResponse, response_model_exclude={"profile": {"htmlContent", "handle"}})
+async def extract(request_profile: Profile) -> ExtractResponse:
+    """Parse an uploaded page once; later requests send ``{"linkedinUrl", "handle"}`` instead of the HTML."""
+    if not request_profile.htmlContent or not request_profile.linkedinUrl:
+        raise HTTPException(status_code=400, detail="linkedinUrl and htmlContent are required")
+    handle = get_profile_handle(request_profile.htmlContent)
+    with current_timer().stage("parse"):
+        profile = await extract_handle(request_profile, handle)
+    return ExtractResponse(handle=handle, profile=profile)
+
+
+async def extract_handle(request_profile: Profile, handle: str) -> Profile:
+    """Parsed profile of an uploaded page, stored under its handle."""
+    profile = get_handle_profile(handle)
+    if profile is None:
+        profile = await resolve_profile(request_profile)
+        handle_cache.set(handle, profile.model_dump_json(exclude={"htmlContent", "handle"}))
+    return profile
+
+
+@app.get("/extract/{handle}", response_model=ExtractResponse, response_model_exclude={"profile": {"htmlContent", "handle"}})
+def extract_status(handle: str) -> ExtractResponse:
+    """Whether the server still has the page behind ``handle`` (404: upload it with POST /extract)."""
+    profile = get_handle_profile(handle)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Unknown profile handle")
+    return ExtractResponse(handle=handle, profile=profile)
+
+
+async def prefetch_profile(request_profile: Profile, handle: str) -> Profile:
+    """Background job behind POST /prefetch: warm the profile caches and the Notion lookup."""
+    # Runs in its own task, so this timer only sees the prefetch's stages
+    start_timer()
+    notion = get_notion()
+    lookup_task: Optional[asyncio.Task] = None
+    if notion:
+        lookup_task = asyncio.create_task(notion.prefetch_profile_lookup(str(request_profile.linkedinUrl)))
+    try:
+        profile = await extract_handle(request_profile, handle)
+    except BaseException:
+        _cancel(lookup_task)
+        raise
+    if lookup_task is not None and not lookup_task.done():
+        # A request joining this prefetch needs the profile, not the lookup, which finishes on its own
+        prefetch_lookups.add(lookup_task)
+        lookup_task.add_done_callback(prefetch_lookups.discard)
+    logger.info(f"🔮 Prefetched {request_profile.linkedinUrl} ({handle[:12]})")
+    return profile
+
+
+@app.post("/prefetch", status_code=202)
+async def prefetch(request_profile: Profile) -> dict:
+    """Start extracting a page (and looking it up in Notion) in the background; returns its handle at once.
+
+    Later requests can send the handle right away: one arriving before the
+    prefetch is done waits for it (or takes over a prefetch still queued).
+    """
+    if not request_profile.htmlContent or not request_profile.linkedinUrl:
+        raise HTTPException(status_code=400, detail="linkedinUrl and htmlContent are required")
+    handle = get_profile_handle(request_profile.htmlContent)
+    if handle_cache.get(handle) is not None:
+        return {"handle": handle, "status": "done"}
+    status = prefetcher.start(
+        handle,
+        lambda: prefetch_profile(request_profile, handle),
+        # A request taking over a queued prefetch only needs the profile, in its own timer and priority
+        inline=lambda: extract_handle(request_profile, handle),
+    )
+    if status == "rejected":
+        raise HTTPException(status_code=429, detail="Too many prefetches pending")
+    return {"handle": handle, "status": status}
+
+
+@app.delete("/prefetch/{handle}")
+def cancel_prefetch(handle: str) -> dict:
+    """Cancel a pending prefetch (e.g. the popup closed) unless a request is already waiting on it."""
+    return {"handle": handle, "cancelled": prefetcher.cancel(handle)}
+
+
+async def save_profile_to_notion(
+    notion: NotionWrapper,
+    profile: Profile,
+    request: DraftRequest,
+    existing_page_id: Optional[str],
+    response: DraftResponse,
+    message_props: Optional[Dict[str, Any]] = None,
+) -> Optional[str]:
+    """Create the profile page, or update the existing one; returns the page id.
+
+    ``message_props`` (a generated message) are written in the same API call.
+    With the write queue enabled the write is only queued, and a page that
+    does not exist yet has no id to return.
+    """
+    options = request.options or DraftOptions()
+    linkedin_message = options.linkedinMessage
+    email_message = options.emailMessage
+    
+    if existing_page_id:
+        logger.info(f"📝 Updating existing Notion entry: {existing_page_id}")
+        # Update existing entry with any new messages
+        props_to_update = {"Last Interaction Date": {"date": {"start": dt.date.today().isoformat()}}}
+        
+        if linkedin_message:
+            props_to_update["LinkedIn Message"] = {"rich_text": [{"text": {"content": linkedin_message}}]}
+            props_to_update["LinkedIn Reached Out"] = {"checkbox": True}
+        if email_message:
+            props_to_update["Email Message"] = {"rich_text": [{"text": {"content": email_message}}]}
+            props_to_update["Email Reached Out"] = {"checkbox": True}
+        
+        if linkedin_message or email_message:
+            props_to_update["Status"] = {"status": {"name": "Contacted"}}
+        if message_props:
+            props_to_update.update(message_props)
+        
+        write_id = None
+        if notion.queue is not None:
+            write_id = notion.queue.enqueue(props_to_update, page_id=existing_page_id)
+        else:
+            await notion.update_profile_page(existing_page_id, props_to_update)
+        
+        saved_fields = {"updated": True}
+        if message_props:
+            saved_fields["updated_with_message"] = True
+        response.notion = NotionResult(
+            pageId=existing_page_id,
+            url=f"https://notion.so/{existing_page_id.replace('-', '')}",
+            savedFields=saved_fields,
+            status="pending" if write_id else None,
+            writeId=write_id,
+        )
+        return existing_page_id
+    
+    if notion.queue is not None:
+        logger.info("📝 Queueing new Notion entry")
+        props = notion.profile_page_properties(profile, linkedin_message, email_message, message_props)
+        write_id = notion.queue.enqueue(props, linkedin_url=str(profile.linkedinUrl) if profile.linkedinUrl else None)
+        saved_fields = notion.saved_fields(profile)
+        if message_props:
+            saved_fields["updated_with_message"] = True
+        response.notion = NotionResult(savedFields=saved_fields, status="pending", writeId=write_id)
+        return None
+    
+    logger.info("📝 Creating new Notion entry")
+    result = await notion.create_profile_page(
+        profile, 
+        request.ask, 
+        linkedin_message=linkedin_message,
+        email_message=email_message,
+        extra_props=message_props,
+    )
+    
+    saved_fields = result.get("savedFields", {})
+    if message_props:
+        saved_fields["updated_with_message"] = True
+    response.notion = NotionResult(
+        pageId=result["pageId"],
+        url=result.get("url"),
+        savedFields=saved_fields
+    )
+    return result["pageId"]
+
+
+async def write_message_to_notion(
+    notion: NotionWrapper,
+    page_id: Optional[str],
+    message_type: str,
+    draft: Draft,
+    response: DraftResponse,
+    linkedin_url: Optional[str] = None,
+) -> None:
+    """Store a generated message on the profile page.
+
+    Without a page id the profile has no page in Notion yet; with the write
+    queue enabled the message goes with a queued create of its page, if any.
+    """
+    if notion.queue is not None:
+        props = message_properties(message_type, draft.body, draft.subject or None)
+        if page_id:
+            write_id = notion.queue.enqueue(props, page_id=page_id)
+        elif linkedin_url:
+            write_id = notion.queue.attach(props, linkedin_url)
+        else:
+            write_id = None
+        if write_id is None:
+            return
+        logger.info(f"📝 Queued generated {message_type} message for Notion entry")
+        if not response.notion:
+            response.notion = NotionResult(
+                pageId=page_id,
+                url=f"https://notion.so/{page_id.replace('-', '')}" if page_id else None,
+                savedFields={"updated_with_message": True},
+                status="pending",
+                writeId=write_id,
+            )
+        return
+    if not page_id:
+        return
+    
+    logger.info(f"📝 Updating Notion entry with generated {message_type} message")
+    update_result = await notion.update_profile_page_with_message(
+        page_id,
+        message_type,
+        draft.body,
+        draft.subject or None
+    )
+    
+    # If we haven't set response.notion yet (message-only operation), set it now
+    if not response.notion:
+        response.notion = NotionResult(
+            pageId=update_result["pageId"],
+            url=update_result.get("url"),
+            savedFields={"updated_with_message": True}
+        )
+
+
+def _cancel(*tasks: Optional[asyncio.Task]) -> None:
+    for task in tasks:
+        if task is not None and not task.done():
+            task.cancel()
+
+
+@app.post("/draft", response_model=DraftResponse)
+async def create_draft(request: DraftRequest, http_response: Response) -> DraftResponse:
+    timer = current_timer()
+    try:
+        return await run_draft_pipeline(request)
+    finally:
+        http_response.headers["X-Stage-Timings"] = timer.header_value()
+        if timer.counts:
+            http_response.headers["X-Token-Usage"] = timer.counts_header_value()
+
+
+async def run_draft_pipeline(request: DraftRequest) -> DraftResponse:
+    """Run the /draft stages, overlapping the ones that do not depend on each other.
+
+    parse ─┬─> draft ──────┐
+    lookup ┴───────────────┴─> notion_save
+
+    When the profile is saved and a message drafted, the save waits for the
+    draft so page and message go to Notion in one write. Otherwise the save
+    overlaps with the draft and the message is written afterwards.
+    """
+    logger.info(f"🎯 Processing draft request for: {request.profile.linkedinUrl}")
+    logger.info(
+        f"📊 Request details: ask='{request.ask}', has_html={bool(request.profile.htmlContent)}, "
+        f"has_handle={bool(request.profile.handle)}"
+    )
+    timer = current_timer()
+    options = request.options or DraftOptions()
+    notion = get_notion()
+    
+    # The Notion lookup only needs the URL, so it overlaps with parsing
+    lookup_task: Optional[asyncio.Task] = None
+    if notion and request.profile.linkedinUrl:
+        lookup_task = asyncio.create_task(
+            timer.timed("notion_lookup", notion.find_profile_by_linkedin_url(str(request.profile.linkedinUrl)))
+        )
+    try:
+        with timer.stage("parse"):
+            profile = await resolve_profile(request.profile)
+    except BaseException:
+        _cancel(lookup_task)
+        raise
 
     response = DraftResponse()
+    
+    # Draft generation only needs the profile, so it overlaps with the Notion save
+    draft_task: Optional[asyncio.Task] = None
+    if options.messageType:
+        draft_task = asyncio.create_task(
+            timer.timed("draft", generate_draft(profile, request.ask, options.messageType, options.regenerate))
+        )
 
-    # Handle Notion operations (both saving and message updates)
-    if config.NOTION_API_KEY and config.NOTION_DATABASE_ID and profile.linkedinUrl:
+    page_id: Optional[str] = None
+    message_props: Optional[Dict[str, Any]] = None
+    if notion and profile.linkedinUrl:
         try:
-            notion = NotionWrapper(config.NOTION_API_KEY, config.NOTION_DATABASE_ID)
-            
-            # Check if profile already exists in Notion
-            existing_page_id = notion.find_profile_by_linkedin_url(str(profile.linkedinUrl))
-            
-            # Handle Notion saving (create new or update existing)
-            if request.options and request.options.saveDraftToNotion:
-                linkedin_message = request.options.linkedinMessage
-                email_message = request.options.emailMessage
-                
-                if existing_page_id:
-                    logger.info(f"📝 Updating existing Notion entry: {existing_page_id}")
-                    # Update existing entry with any new messages
-                    props_to_update = {"Last Interaction Date": {"date": {"start": dt.date.today().isoformat()}}}
-                    
-                    if linkedin_message:
-                        props_to_update["LinkedIn Message"] = {"rich_text": [{"text": {"content": linkedin_message}}]}
-                        props_to_update["LinkedIn Reached Out"] = {"checkbox": True}
-                    if email_message:
-                        props_to_update["Email Message"] = {"rich_text": [{"text": {"content": email_message}}]}
-                        props_to_update["Email Reached Out"] = {"checkbox": True}
-                    
-                    if linkedin_message or email_message:
-                        props_to_update["Status"] = {"status": {"name": "Contacted"}}
-                    
-                    notion.client.pages.update(page_id=existing_page_id, properties=props_to_update)
-                    
-                    response.notion = NotionResult(
-                        pageId=existing_page_id,
-                        url=f"https://notion.so/{existing_page_id.replace('-', '')}",
-                        savedFields={"updated": True}
-                    )
-                else:
-                    logger.info("📝 Creating new Notion entry")
-                    result = notion.create_profile_page(
-                        profile, 
-                        request.ask, 
-                        linkedin_message=linkedin_message,
-                        email_message=email_message
-                    )
-                    
-                    response.notion = NotionResult(
-                        pageId=result["pageId"],
-                        url=result.get("url"),
-                        savedFields=result.get("savedFields", {})
-                    )
-                    existing_page_id = result["pageId"]  # Update for potential message generation below
-            
-            # Handle message generation and Notion updates
-            if request.options and request.options.messageType:
-                message_type = request.options.messageType
-                draft, provider, error = await maybe_generate_draft(profile, request.ask, message_type)
-                
-                if error:
-                    response.message = error
-                elif draft:
-                    response.draft = draft
-                    response.provider = provider
-                    
-                    # Update Notion with generated message (whether entry was just created or already existed)
-                    if existing_page_id:
-                        logger.info(f"📝 Updating Notion entry with generated {message_type} message")
-                        message_content = draft.body
-                        subject = draft.subject if hasattr(draft, 'subject') and draft.subject else None
-                        
-                        update_result = notion.update_profile_page_with_message(
-                            existing_page_id,
-                            message_type,
-                            message_content,
-                            subject
-                        )
-                        
-                        # If we haven't set response.notion yet (message-only operation), set it now
-                        if not response.notion:
-                            response.notion = NotionResult(
-                                pageId=update_result["pageId"],
-                                url=update_result.get("url"),
-                                savedFields={"updated_with_message": True}
-                            )
-            
+            if lookup_task is None:
+                lookup_task = asyncio.create_task(
+                    timer.timed("notion_lookup", notion.find_profile_by_linkedin_url(str(profile.linkedinUrl)))
+                )
+            page_id = await lookup_task
+            if options.saveDraftToNotion:
+                if draft_task is not None:
+                    draft, _, _ = await draft_task
+                    if draft:
+                        message_props = message_properties(options.messageType, draft.body, draft.subject or None)
+                with timer.stage("notion_save"):
+                    page_id = await save_profile_to_notion(notion, profile, request, page_id, response, message_props)
         except Exception as e:
             # Don't fail the whole request if Notion operations fail
             logger.error(f"❌ Notion operation failed: {e}")
-            if request.options and request.options.saveDraftToNotion:
+            if options.saveDraftToNotion:
+                _cancel(draft_task)
                 raise HTTPException(status_code=502, detail=f"Notion error: {e}")
-    
-    # Handle message generation without Notion (if Notion not configured)
-    elif request.options and request.options.messageType:
-        message_type = request.options.messageType
-        draft, provider, error = await maybe_generate_draft(profile, request.ask, message_type)
-        
+    else:
+        _cancel(lookup_task)
+
+    if draft_task is not None:
+        draft, provider, error = await draft_task
         if error:
             response.message = error
         elif draft:
             response.draft = draft
             response.provider = provider
+            
+            # Update Notion with generated message unless it went out with the save
+            if notion and (page_id or notion.queue is not None) and message_props is None:
+                try:
+                    with timer.stage("notion_message"):
+                        await write_message_to_notion(
+                            notion, page_id, options.messageType, draft, response,
+                            str(profile.linkedinUrl) if profile.linkedinUrl else None,
+                        )
+                except Exception as e:
+                    logger.error(f"❌ Notion operation failed: {e}")
+                    if options.saveDraftToNotion:
+                        raise HTTPException(status_code=502, detail=f"Notion error: {e}")
+
+    return response
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/draft/stream")
+async def stream_draft(request: DraftRequest) -> StreamingResponse:
+    """Like /draft with a messageType, but streams the message as Server-Sent Events.
+
+    Events: ``subject`` (emails, once the subject line is complete), ``delta``
+    for each chunk of body text, then ``done`` with the DraftResponse after the
+    Notion write, or ``error``.
+    """
+    error = draft_provider_error()
+    if error:
+        raise HTTPException(status_code=503, detail=error)
+    timer = current_timer()
+    notion = get_notion()
+
+    # Parse before streaming starts, so bad input still gets a plain HTTP error
+    lookup_task: Optional[asyncio.Task] = None
+    if notion and request.profile.linkedinUrl:
+        lookup_task = asyncio.create_task(
+            timer.timed("notion_lookup", notion.find_profile_by_linkedin_url(str(request.profile.linkedinUrl)))
+        )
+    try:
+        with timer.stage("parse"):
+            profile = await resolve_profile(request.profile)
+    except BaseException:
+        _cancel(lookup_task)
+        raise
+    if lookup_task is None and notion and profile.linkedinUrl:
+        lookup_task = asyncio.create_task(
+            timer.timed("notion_lookup", notion.find_profile_by_linkedin_url(str(profile.linkedinUrl)))
+        )
+
+    return StreamingResponse(
+        draft_events(request, profile, lookup_task),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def draft_events(request: DraftRequest, profile: Profile, lookup_task: Optional[asyncio.Task]) -> AsyncIterator[str]:
+    timer = current_timer()
+    options = request.options or DraftOptions()
+    message_type = options.messageType or "email"
+    notion = get_notion()
+    response = DraftResponse(provider="openai")
+    try:
+        cache_key = get_draft_cache_key(profile, request.ask, message_type) if draft_cache is not None else None
+        draft = get_cached_draft(cache_key) if cache_key and not options.regenerate else None
+        if draft:
+            logger.info(f"🎯 Using cached {message_type} draft - no gpt-4o call")
+            response.provider = "cache"
+            if draft.subject:
+                yield _sse("subject", {"subject": draft.subject})
+            yield _sse("delta", {"text": draft.body})
+        else:
+            started = time.perf_counter()
+            text = ""
+            try:
+                with timer.stage("draft"):
+                    async for kind, value in stream_draft_with_openai(profile, request.ask, message_type):
+                        if kind == "done":
+                            text = value
+                            continue
+                        if "first_token" not in timer.stages:
+                            timer.record("first_token", time.perf_counter() - started)
+                        yield _sse(kind, {"subject": value} if kind == "subject" else {"text": value})
+            except LLMUnavailableError as e:
+                logger.error(f"❌ Draft stream failed: {e}")
+                yield _sse("error", {"status": 503, "detail": f"OpenAI unavailable: {e}"})
+                return
+            except Exception as e:
+                logger.error(f"❌ Draft stream failed: {e}")
+                yield _sse("error", {"status": 502, "detail": f"OpenAI error: {e.__class__.__name__}"})
+                return
+            draft = parse_draft(text, message_type)
+            if cache_key:
+                cache_draft(cache_key, draft)
+        response.draft = draft
+
+        # Same Notion writes as /draft, once the full text is known
+        if lookup_task is not None:
+            try:
+                page_id = await lookup_task
+                if options.saveDraftToNotion:
+                    message_props = message_properties(message_type, draft.body, draft.subject or None)
+                    with timer.stage("notion_save"):
+                        await save_profile_to_notion(notion, profile, request, page_id, response, message_props)
+                elif page_id or notion.queue is not None:
+                    with timer.stage("notion_message"):
+                        await write_message_to_notion(
+                            notion, page_id, message_type, draft, response,
+                            str(profile.linkedinUrl) if profile.linkedinUrl else None,
+                        )
+            except Exception as e:
+                logger.error(f"❌ Notion operation failed: {e}")
+                if options.saveDraftToNotion:
+                    yield _sse("error", {"status": 502, "detail": f"Notion error: {e}"})
+                    return
+
+        yield _sse("done", {**response.model_dump(mode="json", exclude_none=True), "timings": timer.header_value(), "tokens": timer.counts})
+    finally:
+        _cancel(lookup_task)
+
+
+async def run_batch_item(index: int, request: DraftRequest, semaphore: asyncio.Semaphore) -> BatchDraftItem:
+    """Run one batch entry through the /draft pipeline, turning failures into an error item."""
+    url = str(request.profile.linkedinUrl) if request.profile.linkedinUrl else None
+    async with semaphore:
+        # Runs in its own task, so this timer only sees this item's stages
+        timer = start_timer()
+        try:
+            response = await run_draft_pipeline(request)
+            return BatchDraftItem(index=index, linkedinUrl=url, response=response, timings=timer.header_value(), tokens=timer.counts or None)
+        except HTTPException as e:
+            return BatchDraftItem(index=index, linkedinUrl=url, status=e.status_code, error=str(e.detail), timings=timer.header_value(), tokens=timer.counts or None)
+        except LLMUnavailableError as e:
+            return BatchDraftItem(index=index, linkedinUrl=url, status=503, error=f"OpenAI unavailable: {e}", timings=timer.header_value(), tokens=timer.counts or None)
+        except Exception as e:
+            logger.error(f"❌ Batch item {index} failed: {e}")
+            return BatchDraftItem(index=index, linkedinUrl=url, status=500, error=str(e), timings=timer.header_value(), tokens=timer.counts or None)
+
+
+async def stream_batch(requests: List[DraftRequest]) -> AsyncIterator[str]:
+    """Yield one NDJSON line per request, in completion order."""
+    started = time.time()
+    semaphore = asyncio.Semaphore(config.BATCH_MAX_CONCURRENCY)
+    first_index: Dict[str, int] = {}
+    tasks: List[asyncio.Task] = []
+    for index, request in enumerate(requests):
+        url = str(request.profile.linkedinUrl) if request.profile.linkedinUrl else None
+        key = canonicalize_linkedin_url(url) if url else None
+        if key in first_index:
+            # Processing the same profile twice would also race to create two Notion pages
+            yield BatchDraftItem(index=index, linkedinUrl=url, duplicateOf=first_index[key]).model_dump_json(exclude_none=True) + "\n"
+            continue
+        if key:
+            first_index[key] = index
+        tasks.append(asyncio.create_task(run_batch_item(index, request, semaphore)))
+
+    try:
+        for next_item in asyncio.as_completed(tasks):
+            item = await next_item
+            yield item.model_dump_json(exclude_none=True) + "\n"
+    finally:
+        # Client went away: don't keep generating drafts nobody will read
+        _cancel(*tasks)
+    logger.info(f"📦 Batch of {len(requests)} ({len(tasks)} unique) done in {time.time() - started:.1f}s")
+
 
-    return response 
\ No newline at end of file
+@app.post("/draft/batch")
+async def create_draft_batch(batch: BatchDraftRequest) -> StreamingResponse:
+    """Run many /draft requests at once, streaming NDJSON results as each one finishes."""
+    if len(batch.requests) > config.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {config.BATCH_MAX_ITEMS} requests)")
+    logger.info(f"📦 Batch draft request with {len(batch.requests)} profiles")
+    return StreamingResponse(stream_batch(batch.requests), media_type="application/x-ndjson")
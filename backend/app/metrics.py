@@ -0,0 +1,141 @@
+from __future__ import annotations
+import asyncio
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Seconds; covers cache hits (ms) up to slow gpt-4o drafts (tens of seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+# Event-loop lag is usually well under a millisecond; anything past 100ms is a visible stall
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+# (metric name, type, labels, value) reported by a collector at scrape time
+Sample = Tuple[str, str, Dict[str, str], float]
+
+
+def _labels(labels: Dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for key, value in labels:
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Histogram:
+    def __init__(self, buckets: Tuple[float, ...]) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            self.counts[index] += 1
+        self.total += 1
+        self.sum += value
+
+
+class Registry:
+    """Process-wide counters and histograms, rendered in the Prometheus text format.
+
+    Values owned elsewhere (cache stats, queue depth) are read at scrape time
+    from registered collectors instead of being mirrored here.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def inc(self, name: str, amount: float = 1, **labels: object) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels: object) -> None:
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def register_collector(self, collector: Callable[[], Iterable[Sample]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str, kind: str) -> None:
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                header(name, "counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+            for name, series in sorted(self._histograms.items()):
+                header(name, "histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.total}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.total}")
+
+        collected: Dict[str, Tuple[str, List[Tuple[Dict[str, str], float]]]] = {}
+        for collector in self._collectors:
+            for name, kind, labels, value in collector():
+                collected.setdefault(name, (kind, []))[1].append((labels, value))
+        for name, (kind, samples) in sorted(collected.items()):
+            header(name, kind)
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(sorted(labels.items()))} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+registry.describe("connoction_request_seconds", "HTTP request duration by route and status.")
+registry.describe("connoction_stage_seconds", "Duration of one request stage (parse, llm_parse, notion_lookup, draft, ...).")
+registry.describe("connoction_upstream_seconds", "Duration of one OpenAI / Notion API call.")
+registry.describe("connoction_upstream_errors_total", "Failed OpenAI / Notion API calls by error (HTTP status or exception).")
+registry.describe("connoction_llm_tokens_total", "OpenAI tokens by model and type (prompt / completion).")
+registry.describe("connoction_profile_text_tokens_total", "Tokens of compacted profile text sent for parsing.")
+registry.describe("connoction_cache_lookups_total", "Profile / field / draft cache lookups by result (hit / miss).")
+registry.describe("connoction_event_loop_lag_seconds", "How late the event loop ran a timer (time blocked by synchronous work).")
+registry.describe("connoction_notion_rate_wait_seconds_total", "Time Notion calls spent waiting for the client-side rate limiter.")
+
+
+async def monitor_event_loop(interval_seconds: float) -> None:
+    """Sleep ``interval_seconds`` in a loop and record how much later than asked each wakeup came."""
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval_seconds)
+        lag = max(0.0, time.perf_counter() - started - interval_seconds)
+        registry.observe("connoction_event_loop_lag_seconds", lag, buckets=LAG_BUCKETS)
+
+
+def upstream_error(e: BaseException) -> str:
+    """Label for a failed upstream call: the HTTP status when there is one, else the exception class."""
+    status = getattr(e, "status_code", None) or getattr(e, "status", None)
+    if isinstance(status, int):
+        return str(status)
+    return e.__class__.__name__
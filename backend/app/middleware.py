@@ -0,0 +1,213 @@
+from __future__ import annotations
+import time
+import zlib
+from typing import Optional
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from . import config
+from .logging_config import get_logger
+from .metrics import registry
+from .timing import start_timer
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; without it Content-Encoding: br gets a 415
+    brotli = None
+
+logger = get_logger(__name__)
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestLogMiddleware:
+    """Logs each request's method, URL, body size, status and duration.
+
+    Pure ASGI so the body is never buffered here: the size comes from
+    Content-Length, or is counted as the app reads the body. Also starts the
+    request's stage timer, sends its stages as a ``Server-Timing`` header and
+    records the duration in ``connoction_request_seconds``.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.time()
+        path = scope["path"] + (f"?{scope['query_string'].decode('latin-1')}" if scope.get("query_string") else "")
+        logger.info(f"📨 {scope['method']} {path}")
+
+        content_length = _header(scope, b"content-length")
+        received = 0
+        if content_length is not None:
+            logger.info(f"📦 Request body size: {content_length} bytes")
+        elif scope["method"] in ("POST", "PUT", "PATCH"):
+            inner_receive = receive
+
+            async def receive() -> Message:
+                nonlocal received
+                message = await inner_receive()
+                if message["type"] == "http.request":
+                    received += len(message.get("body", b""))
+                return message
+
+        status = 500
+        timer = start_timer()
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                # Stages finished before the first byte (streamed responses report the rest in-band)
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timer.header_value().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if received:
+                logger.info(f"📦 Request body size: {received} bytes (chunked)")
+            elapsed = time.time() - start_time
+            logger.info(f"📤 Response: {status} | Time: {elapsed:.3f}s")
+            # Route template, not the raw path, so ids do not create a series each
+            route = scope.get("route")
+            registry.observe(
+                "connoction_request_seconds", elapsed,
+                method=scope["method"], route=getattr(route, "path", "unmatched"), status=status,
+            )
+
+
+class _Decoder:
+    """Incremental gzip / deflate / brotli decoder that stops at ``max_bytes`` of output."""
+
+    def __init__(self, encoding: str, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.total = 0
+        self._brotli = None
+        self._zlib = None
+        if encoding == "br":
+            self._brotli = brotli.Decompressor()
+        else:
+            # gzip header (16 + MAX_WBITS) or zlib-wrapped deflate
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS)
+
+    def decode(self, data: bytes) -> bytes:
+        try:
+            # Never inflate more than one byte past the limit, so compression bombs stay cheap
+            if self._zlib is not None:
+                out = self._zlib.decompress(data, self.max_bytes - self.total + 1)
+            else:
+                out = self._brotli.process(data, output_buffer_limit=self.max_bytes - self.total + 1)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid compressed body: {e}")
+        self.total += len(out)
+        if self.total > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Decompressed body exceeds {self.max_bytes} bytes")
+        return out
+
+    def flush(self) -> bytes:
+        if self._zlib is None:
+            return b""
+        out = self._zlib.flush()
+        self.total += len(out)
+        if self.total > self.max_bytes:
+            raise HTTPException(status_code=413, detail=f"Decompressed body exceeds {self.max_bytes} bytes")
+        return out
+
+
+class RequestBodyMiddleware:
+    """Enforces the request body size limit and decodes compressed bodies.
+
+    Bodies announcing a Content-Length over MAX_REQUEST_BODY_BYTES are
+    rejected before any of it is read; otherwise bytes are counted as they
+    stream in. ``Content-Encoding: gzip`` / ``deflate`` / ``br``
+    bodies are decoded chunk by chunk, capped at
+    MAX_DECOMPRESSED_BODY_BYTES.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_body_bytes: Optional[int] = None,
+        max_decompressed_bytes: Optional[int] = None,
+    ) -> None:
+        self.app = app
+        self.max_body_bytes = max_body_bytes or config.MAX_REQUEST_BODY_BYTES
+        self.max_decompressed_bytes = max_decompressed_bytes or config.MAX_DECOMPRESSED_BODY_BYTES
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        content_length = _header(scope, b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > self.max_body_bytes:
+            await self._reject(scope, receive, send, 413, f"Request body exceeds {self.max_body_bytes} bytes")
+            return
+
+        encoding = (_header(scope, b"content-encoding") or "identity").strip().lower()
+        decoder: Optional[_Decoder] = None
+        if encoding in ("gzip", "deflate") or (encoding == "br" and brotli is not None):
+            decoder = _Decoder(encoding, self.max_decompressed_bytes)
+            # Downstream sees a plain body of unknown length
+            scope = dict(scope)
+            scope["headers"] = [
+                (key, value) for key, value in scope["headers"]
+                if key not in (b"content-encoding", b"content-length")
+            ]
+        elif encoding != "identity":
+            await self._reject(scope, receive, send, 415, f"Unsupported Content-Encoding: {encoding}")
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] != "http.request":
+                return message
+            body = message.get("body", b"")
+            received += len(body)
+            if received > self.max_body_bytes:
+                raise HTTPException(status_code=413, detail=f"Request body exceeds {self.max_body_bytes} bytes")
+            if decoder is not None:
+                decoded = decoder.decode(body)
+                if not message.get("more_body", False):
+                    decoded += decoder.flush()
+                    logger.info(f"🗜️ {encoding} body: {received} -> {decoder.total} bytes")
+                message = {**message, "body": decoded}
+            return message
+
+        response_started = False
+
+        async def tracking_send(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except HTTPException as e:
+            # Raised while reading the body outside FastAPI's request handling
+            if response_started:
+                raise
+            await self._reject(scope, receive, send, e.status_code, str(e.detail))
+
+    @staticmethod
+    async def _reject(scope: Scope, receive: Receive, send: Send, status: int, detail: str) -> None:
+        logger.warning(f"⚠️ Rejected request body: {status} {detail}")
+        await JSONResponse({"detail": detail}, status_code=status)(scope, receive, send)
@@ -1,5 +1,27 @@
 from __future__ import annotations
+import re
+import unicodedata
 from typing import List, Optional
+from urllib.parse import unquote, urlsplit
+
+from . import config
+from .field_classifier import classify_field_locally
+from .schemas import Profile
+
+
+# LinkedIn page fragments that change between visits without the profile changing
+_VOLATILE_PATTERNS = [
+    re.compile(p, re.IGNORECASE)
+    for p in [
+        r"\b\d+\+?\s+(?:new\s+)?notifications?\b",
+        r"\b\d+\s+(?:second|minute|hour|day|week|month|year)s?\s+ago\b",
+        r"\b\d+\s*(?:s|m|h|d|w|mo|yr)s?\s*•",
+        r"\b[\d,.]+[KM]?\+?\s+(?:followers|connections|profile views|post impressions|search appearances)\b",
+        r"\bEdited\s*•",
+        r"\bStatus is (?:online|offline|reachable)\b",
+    ]
+]
+_WHITESPACE = re.compile(r"\s+")
 
 
 def clean_text(value: Optional[str]) -> Optional[str]:
@@ -9,42 +31,106 @@ def clean_text(value: Optional[str]) -> Optional[str]:
     return value or None
 
 
-def derive_field(role: Optional[str]) -> Optional[str]:
-    if not role:
+def canonicalize_profile_text(text: str) -> str:
+    """Reduce cleaned profile text to a form that is stable across page visits.
+
+    Used for cache keys only: volatile counters and timestamps are dropped and
+    unicode/whitespace is normalized, so re-visits of an unchanged profile
+    hash to the same value.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    for pattern in _VOLATILE_PATTERNS:
+        text = pattern.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+_PROFILE_PATH = re.compile(r"^/in/([^/]+)")
+
+
+def canonicalize_linkedin_url(url: Optional[str]) -> Optional[str]:
+    """Reduce a LinkedIn profile URL to ``https://www.linkedin.com/in/<slug>``.
+
+    Drops query strings, fragments, trailing slashes, locale and sub-page
+    suffixes (``/en``, ``/details/experience``, ``/overlay/...``) and country
+    subdomains, so every link to the same person maps to one key. Legacy
+    ``/pub/<name>/<a>/<b>/<c>`` URLs keep their whole (lowercased) path: the
+    name alone is shared by different people.
+    """
+    if not url:
         return None
-    r = role.lower()
-    if any(k in r for k in ["software", "engineer", "swe", "developer"]):
-        if any(k in r for k in ["ml", "ai", "machine learning", "artificial intelligence"]):
-            return "AI SWE"
-        return "SWE"
-    if any(k in r for k in ["product manager", "pm", "program manager", "product "]):
-        return "PM"
-    if any(k in r for k in ["machine learning", "ml", "data science", "mle"]):
-        return "MLE"
-    if any(k in r for k in ["research", "phd", "scientist"]):
-        return "Research"
-    return "Research"
+    url = url.strip()
+    parts = urlsplit(url if "://" in url else f"https://{url}")
+    host = parts.netloc.lower().split(":")[0]
+    if not (host == "linkedin.com" or host.endswith(".linkedin.com")):
+        return url.split("#")[0].split("?")[0].rstrip("/") or None
+    if parts.path.lower().startswith("/pub/"):
+        return f"https://www.linkedin.com{unquote(parts.path).lower().rstrip('/')}"
+    match = _PROFILE_PATH.match(parts.path)
+    if not match:
+        return f"https://www.linkedin.com{parts.path.rstrip('/')}"
+    slug = unquote(match.group(1)).lower()
+    return f"https://www.linkedin.com/in/{slug}"
+
+
+def derive_field(role: Optional[str]) -> Optional[str]:
+    """Notion field for a role title ("industry - SWE", "research - Physics", ...), if it is clear."""
+    prediction = classify_field_locally(Profile(role=role))
+    return prediction.field if prediction.confidence >= config.FIELD_CLASSIFIER_MIN_CONFIDENCE else None
+
+
+_DEGREE_ORDER = [
+    "phd",
+    "doctor",
+    "master",
+    "msc",
+    "mba",
+    "ma",
+    "ms",
+    "bachelor",
+    "bsc",
+    "ba",
+    "bs",
+    "associate",
+    "diploma",
+]
+# Abbreviations must match as whole words ("ma" is not "mathematics")
+_DEGREE_PATTERNS = [
+    re.compile(rf"\b{key}" if len(key) > 4 else rf"\b{key}\b") for key in _DEGREE_ORDER
+]
+_DEGREE_LEVELS = {
+    "phd": "PhD",
+    "doctor": "PhD",
+    "master": "Master's",
+    "msc": "Master's",
+    "mba": "Master's",
+    "ma": "Master's",
+    "ms": "Master's",
+    "bachelor": "Bachelor's",
+    "bsc": "Bachelor's",
+    "ba": "Bachelor's",
+    "bs": "Bachelor's",
+}
+
+
+def _degree_rank(degree: str) -> int:
+    d_low = degree.lower().replace(".", "")
+    for idx, pattern in enumerate(_DEGREE_PATTERNS):
+        if pattern.search(d_low):
+            return idx
+    return len(_DEGREE_ORDER)
 
 
 def pick_highest_degree(degrees: List[str]) -> Optional[str]:
     if not degrees:
         return None
-    order = [
-        "phd",
-        "doctor",
-        "master",
-        "msc",
-        "ma",
-        "bachelor",
-        "bsc",
-        "ba",
-        "associate",
-        "diploma",
-    ]
-    def rank(d: str) -> int:
-        d_low = d.lower()
-        for idx, key in enumerate(order):
-            if key in d_low:
-                return idx
-        return len(order)
-    return sorted(degrees, key=rank)[0] 
\ No newline at end of file
+    return sorted(degrees, key=_degree_rank)[0]
+
+
+def degree_level(degree: Optional[str]) -> Optional[str]:
+    """Map a free-form degree ("Master of Science - MS, CS") to PhD/Master's/Bachelor's."""
+    if not degree:
+        return None
+    rank = _degree_rank(degree)
+    if rank >= len(_DEGREE_ORDER):
+        return None
+    return _DEGREE_LEVELS.get(_DEGREE_ORDER[rank])
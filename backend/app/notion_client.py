@@ -1,24 +1,131 @@
 from __future__ import annotations
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
 import datetime as dt
+import time
 
-from notion_client import Client
+import httpx
+from notion_client import AsyncClient
 
 from .schemas import Profile
+from .cache import MemoryLRUCache
+from .normalization import canonicalize_linkedin_url
+from .notion_index import LinkedInPageIndex
+from .notion_queue import NotionWriteQueue
+from .rate_limit import TokenBucket
+from .singleflight import SingleFlight
+from .metrics import registry, upstream_error
+from . import config
+
+
+class WriteCoalescer:
+    """Merges property updates for the same page into a single ``pages.update``.
+
+    Updates for a page that arrive before its flush (the same event-loop tick,
+    or within ``window_seconds`` when set) are merged, later values winning,
+    and every caller receives the one API response.
+    """
+
+    def __init__(self, client: AsyncClient, window_seconds: float = 0.0) -> None:
+        self.client = client
+        self.window_seconds = window_seconds
+        self.writes = 0
+        self.coalesced = 0
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._flushes: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+    async def update(self, page_id: str, props: Dict[str, Any]) -> Dict[str, Any]:
+        self._pending.setdefault(page_id, {}).update(props)
+        flush = self._flushes.get(page_id)
+        if flush is None:
+            flush = self._flushes[page_id] = asyncio.create_task(self._flush(page_id))
+        else:
+            self.coalesced += 1
+        # Shield so one caller going away does not cancel the shared write
+        return await asyncio.shield(flush)
+
+    async def _flush(self, page_id: str) -> Dict[str, Any]:
+        await asyncio.sleep(self.window_seconds)
+        props = self._pending.pop(page_id)
+        del self._flushes[page_id]
+        self.writes += 1
+        return await self.client.pages.update(page_id=page_id, properties=props)
+
+
+def message_properties(message_type: str, message_content: str, subject: Optional[str] = None) -> Dict[str, Any]:
+    """Properties recording a generated message on a profile page."""
+    props: Dict[str, Any] = {
+        "Last Interaction Date": {"date": {"start": dt.date.today().isoformat()}},
+        "Status": {"status": {"name": "Contacted"}}
+    }
+    
+    if message_type == "linkedin":
+        props["LinkedIn Message"] = {"rich_text": [{"text": {"content": message_content}}]}
+        props["LinkedIn Reached Out"] = {"checkbox": True}
+    elif message_type == "email":
+        props["Email Message"] = {"rich_text": [{"text": {"content": message_content}}]}
+        props["Email Reached Out"] = {"checkbox": True}
+        if subject:
+            props["Email Subject"] = {"rich_text": [{"text": {"content": subject}}]}
+    return props
+
+
+class _RateLimitedClient(AsyncClient):
+    """AsyncClient whose every API call (pagination included) first takes a token from ``limiter``."""
+
+    def __init__(self, limiter: TokenBucket, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.limiter = limiter
+
+    async def request(self, *args: Any, **kwargs: Any) -> Any:
+        await self.limiter.acquire()
+        method = kwargs.get("method") or (args[1] if len(args) > 1 else "?")
+        started = time.perf_counter()
+        try:
+            response = await super().request(*args, **kwargs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            registry.inc("connoction_upstream_errors_total", upstream="notion", method=method, error=upstream_error(e))
+            raise
+        registry.observe("connoction_upstream_seconds", time.perf_counter() - started, upstream="notion", method=method)
+        return response
 
 
 class NotionWrapper:
-    def __init__(self, api_key: str, database_id: str) -> None:
-        self.client = Client(auth=api_key)
+    def __init__(self, api_key: str, database_id: str, http_client: Optional[httpx.AsyncClient] = None) -> None:
+        # Shared by every caller of this wrapper, so batches and the index refresh stay under Notion's limit
+        self.limiter = TokenBucket(config.NOTION_REQUESTS_PER_SECOND, config.NOTION_RATE_BURST)
+        self.client = _RateLimitedClient(
+            self.limiter,
+            client=http_client,
+            auth=api_key,
+            base_url=config.NOTION_BASE_URL,
+            timeout_ms=int(config.NOTION_TIMEOUT_SECONDS * 1000),
+        )
         self.database_id = database_id
+        self.index: Optional[LinkedInPageIndex] = None
+        # When set, /draft queues its writes here instead of waiting for Notion
+        self.queue: Optional[NotionWriteQueue] = None
+        self.writes = WriteCoalescer(self.client, config.NOTION_WRITE_COALESCE_SECONDS)
+        # Concurrent lookups of the same profile share one database query
+        self.lookups: SingleFlight[Optional[str]] = SingleFlight()
+        # Page ids found by prefetches, by canonical LinkedIn URL
+        self.prefetched = MemoryLRUCache(max_entries=1000, ttl_seconds=config.PREFETCH_LOOKUP_TTL_SECONDS)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+        if self.queue is not None:
+            self.queue.close()
 
-    def create_profile_page(
+    def profile_page_properties(
         self,
         profile: Profile,
-        ask: Optional[str],
         linkedin_message: Optional[str] = None,
         email_message: Optional[str] = None,
+        extra_props: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
+        """Properties of a new profile page; ``extra_props`` (e.g. a generated message) are merged in."""
         today = dt.date.today().isoformat()
 
         # Use only the confirmed properties from your schema
@@ -30,7 +137,7 @@ class NotionWrapper:
             "School(s)": self._multi_select(profile.schools),
             "Highest Degree": {"select": {"name": profile.highestDegree} if profile.highestDegree else None},
             "Field": {"select": {"name": profile.field} if profile.field else None},  # Fixed field extraction
-            "LinkedIn URL": {"url": str(profile.linkedinUrl) if profile.linkedinUrl else None},
+            "LinkedIn URL": {"url": canonicalize_linkedin_url(str(profile.linkedinUrl)) if profile.linkedinUrl else None},
             "Date Contacted": {"date": {"start": today}},
             "Last Interaction Date": {"date": {"start": today}},
         }
@@ -52,45 +159,132 @@ class NotionWrapper:
             # No checkboxes selected = "Need to contact"
             props["Status"] = {"status": {"name": "Need to contact"}}
 
-        response = self.client.pages.create(
+        if extra_props:
+            props.update(extra_props)
+        return props
+
+    async def create_page(self, props: Dict[str, Any], linkedin_url: Optional[str] = None) -> Dict[str, Any]:
+        """Create a database page from raw properties, recording it in the index."""
+        response = await self.client.pages.create(
             parent={"database_id": self.database_id},
             properties=props,
         )
+        if self.index is not None and linkedin_url:
+            self.index.record(linkedin_url, response["id"])
+        return response
+
+    async def create_profile_page(
+        self,
+        profile: Profile,
+        ask: Optional[str],
+        linkedin_message: Optional[str] = None,
+        email_message: Optional[str] = None,
+        extra_props: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Create the profile page; ``extra_props`` (e.g. a generated message) go in the same call."""
+        props = self.profile_page_properties(profile, linkedin_message, email_message, extra_props)
+        response = await self.create_page(props, str(profile.linkedinUrl) if profile.linkedinUrl else None)
 
         return {
             "pageId": response["id"],
             "url": response.get("url"),
-            "savedFields": {
-                "name": profile.name,
-                "role": profile.role,
-                "currentCompany": profile.currentCompany,
-                "companies": profile.companies,
-                "highestDegree": profile.highestDegree,
-                "field": profile.field,
-                "schools": profile.schools,
-                "location": profile.location,
-                "linkedinUrl": str(profile.linkedinUrl) if profile.linkedinUrl else None,
-            },
+            "savedFields": self.saved_fields(profile),
+        }
+
+    def saved_fields(self, profile: Profile) -> Dict[str, Any]:
+        """The profile fields written to a new page, as reported back to the caller."""
+        return {
+            "name": profile.name,
+            "role": profile.role,
+            "currentCompany": profile.currentCompany,
+            "companies": profile.companies,
+            "highestDegree": profile.highestDegree,
+            "field": profile.field,
+            "schools": profile.schools,
+            "location": profile.location,
+            "linkedinUrl": str(profile.linkedinUrl) if profile.linkedinUrl else None,
         }
 
-    def find_profile_by_linkedin_url(self, linkedin_url: str) -> Optional[str]:
-        """Find an existing profile page by LinkedIn URL. Returns page_id if found."""
+    async def find_profile_by_linkedin_url(self, linkedin_url: str) -> Optional[str]:
+        """Find an existing profile page by LinkedIn URL. Returns page_id if found.
+
+        Answered from the local index when it has the URL; otherwise (a page
+        created by hand since the last refresh, or no index) the database is
+        queried by URL.
+        """
+        if self.index is not None and self.index.loaded:
+            page_id = self.index.get(linkedin_url)
+            if page_id:
+                return page_id
+        canonical = canonicalize_linkedin_url(linkedin_url)
+        page_id = self.prefetched.get(canonical or linkedin_url)
+        if page_id:
+            return page_id
+        return await self.lookups.do(canonical or linkedin_url, lambda: self._query_profile_page(linkedin_url, canonical))
+
+    async def prefetch_profile_lookup(self, linkedin_url: str) -> Optional[str]:
+        """Look a profile up ahead of a request; a found page id answers lookups for PREFETCH_LOOKUP_TTL_SECONDS.
+
+        Only found pages are kept: a "not found" could go stale as soon as a
+        request creates the page.
+        """
+        page_id = await self.find_profile_by_linkedin_url(linkedin_url)
+        if page_id and self.index is None:
+            self.prefetched.set(canonicalize_linkedin_url(linkedin_url) or linkedin_url, page_id)
+        return page_id
+
+    async def _query_profile_page(self, linkedin_url: str, canonical: Optional[str]) -> Optional[str]:
+        urls = {linkedin_url, canonical} - {None}
         try:
-            response = self.client.databases.query(
+            response = await self.client.databases.query(
                 database_id=self.database_id,
-                filter={
-                    "property": "LinkedIn URL",
-                    "url": {"equals": linkedin_url}
-                }
+                filter={"or": [{"property": "LinkedIn URL", "url": {"equals": url}} for url in urls]},
+                sorts=[{"timestamp": "created_time", "direction": "ascending"}],
             )
             
             if response["results"]:
-                return response["results"][0]["id"]
+                page_id = response["results"][0]["id"]
+                if self.index is not None:
+                    self.index.record(linkedin_url, page_id)
+                return page_id
             return None
         except Exception:
             return None
-    
-    def update_profile_page_with_message(
+
+    async def iter_database_pages(
+        self,
+        properties: Optional[List[str]] = None,
+        sorts: Optional[List[Dict[str, Any]]] = None,
+        page_size: int = 100,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield every page in the database, paginating with ``start_cursor``.
+
+        ``properties`` limits the returned properties (by name) to cut payload size.
+        """
+        query: Dict[str, Any] = {"database_id": self.database_id, "page_size": page_size}
+        if sorts:
+            query["sorts"] = sorts
+        if properties:
+            database = await self.client.databases.retrieve(database_id=self.database_id)
+            ids = [database["properties"][name]["id"] for name in properties if name in database.get("properties", {})]
+            if ids:
+                query["filter_properties"] = ids
+        cursor: Optional[str] = None
+        while True:
+            if cursor:
+                query["start_cursor"] = cursor
+            response = await self.client.databases.query(**query)
+            for page in response["results"]:
+                yield page
+            if not response.get("has_more"):
+                return
+            cursor = response.get("next_cursor")
+
+    async def update_profile_page(self, page_id: str, props: Dict[str, Any]) -> Dict[str, Any]:
+        """Update properties of an existing profile page (coalesced with concurrent updates)."""
+        return await self.writes.update(page_id, props)
+
+    async def update_profile_page_with_message(
         self,
         page_id: str,
         message_type: str,
@@ -98,26 +292,8 @@ class NotionWrapper:
         subject: Optional[str] = None
     ) -> Dict[str, Any]:
         """Update an existing profile page with generated message."""
-        today = dt.date.today().isoformat()
-        
-        props: Dict[str, Any] = {
-            "Last Interaction Date": {"date": {"start": today}},
-            "Status": {"status": {"name": "Contacted"}}
-        }
-        
-        if message_type == "linkedin":
-            props["LinkedIn Message"] = {"rich_text": [{"text": {"content": message_content}}]}
-            props["LinkedIn Reached Out"] = {"checkbox": True}
-        elif message_type == "email":
-            props["Email Message"] = {"rich_text": [{"text": {"content": message_content}}]}
-            props["Email Reached Out"] = {"checkbox": True}
-            if subject:
-                props["Email Subject"] = {"rich_text": [{"text": {"content": subject}}]}
-        
-        response = self.client.pages.update(
-            page_id=page_id,
-            properties=props
-        )
+        props = message_properties(message_type, message_content, subject)
+        response = await self.update_profile_page(page_id, props)
         
         return {
             "pageId": response["id"],
@@ -126,4 +302,43 @@ class NotionWrapper:
         }
 
     def _multi_select(self, items: List[str]) -> Dict[str, Any]:
-        return {"multi_select": [{"name": item} for item in items if item]} 
\ No newline at end of file
+        return {"multi_select": [{"name": item} for item in items if item]}
+
+
+# App-lifetime wrapper: one keep-alive connection pool shared by every request
+_notion: Optional[NotionWrapper] = None
+
+
+def start_notion() -> Optional[NotionWrapper]:
+    """Create the shared Notion wrapper (called at app startup)."""
+    global _notion
+    if _notion is None and config.NOTION_API_KEY and config.NOTION_DATABASE_ID:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=config.NOTION_MAX_CONNECTIONS,
+                max_keepalive_connections=config.NOTION_MAX_CONNECTIONS,
+                keepalive_expiry=60.0,
+            )
+        )
+        _notion = NotionWrapper(config.NOTION_API_KEY, config.NOTION_DATABASE_ID, http_client=http_client)
+        _notion.index = LinkedInPageIndex(config.NOTION_INDEX_PATH)
+        if config.NOTION_WRITE_QUEUE_ENABLED:
+            _notion.queue = NotionWriteQueue(
+                config.NOTION_WRITE_QUEUE_PATH,
+                max_attempts=config.NOTION_WRITE_MAX_ATTEMPTS,
+                lease_seconds=config.NOTION_TIMEOUT_SECONDS * 4,
+            )
+    return _notion
+
+
+async def close_notion() -> None:
+    """Close the shared wrapper's connection pool (called at app shutdown)."""
+    global _notion
+    if _notion is not None:
+        await _notion.aclose()
+    _notion = None
+
+
+def get_notion() -> Optional[NotionWrapper]:
+    """The shared wrapper, or None when Notion is not configured."""
+    return _notion or start_notion()
@@ -0,0 +1,201 @@
+from __future__ import annotations
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+
+from .normalization import canonicalize_linkedin_url
+from .logging_config import get_logger
+
+if TYPE_CHECKING:
+    from .notion_client import NotionWrapper
+
+logger = get_logger(__name__)
+
+URL_PROPERTY = "LinkedIn URL"
+
+
+class LinkedInPageIndex:
+    """Canonical LinkedIn URL -> Notion page id, so lookups skip ``databases.query``.
+
+    Bulk-loaded by paginating the database, updated by our own writes,
+    reconciled periodically and snapshotted to a JSON file. Workers share the
+    snapshot: writes are merged with the file on disk (in a thread, off the
+    event loop), and before answering a miss a newer file written by another
+    worker is reloaded. A miss is not authoritative; callers still query Notion.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = Path(path)
+        self.pages: Dict[str, str] = {}
+        self.loaded = False
+        self.refreshed_at = 0.0
+        self._snapshot_mtime = 0.0
+        self._refresh_lock = asyncio.Lock()
+        # Writes recorded while a refresh may be paginating: key -> (page id, time)
+        self._recent: Dict[str, Tuple[str, float]] = {}
+        self._save_task: Optional["asyncio.Task[None]"] = None
+        self._save_pending = False
+        # One write at a time per worker (they share the temp file)
+        self._save_lock = asyncio.Lock()
+
+    def get(self, linkedin_url: str) -> Optional[str]:
+        key = canonicalize_linkedin_url(linkedin_url)
+        if not key:
+            return None
+        page_id = self.pages.get(key)
+        if page_id is None and self._snapshot_is_newer():
+            self.load_snapshot()
+            page_id = self.pages.get(key)
+        return page_id
+
+    def record(self, linkedin_url: str, page_id: str) -> None:
+        key = canonicalize_linkedin_url(linkedin_url)
+        if key and self.pages.get(key) != page_id:
+            self.pages[key] = page_id
+            self._recent[key] = (page_id, time.time())
+            self._schedule_save()
+
+    # -- persistence ---------------------------------------------------------
+    def _snapshot_is_newer(self) -> bool:
+        try:
+            return self.path.stat().st_mtime > self._snapshot_mtime
+        except OSError:
+            return False
+
+    def load_snapshot(self) -> bool:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            mtime = self.path.stat().st_mtime
+        except (OSError, ValueError):
+            return False
+        # Keep entries we recorded locally that the snapshot has not caught up with
+        self.pages = {**self.pages, **data.get("pages", {})}
+        self.refreshed_at = max(self.refreshed_at, data.get("refreshedAt", 0.0))
+        self._snapshot_mtime = mtime
+        self.loaded = True
+        return True
+
+    def _schedule_save(self) -> None:
+        """Save in the background; records arriving while a save runs are written by one more save."""
+        self._save_pending = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.get_running_loop().create_task(self._save_loop())
+
+    async def _save_loop(self) -> None:
+        while self._save_pending:
+            self._save_pending = False
+            await self.save_snapshot()
+
+    async def save_snapshot(self, rebuilt: bool = False) -> None:
+        """Write the snapshot, merged with the one on disk so workers don't drop each other's records.
+
+        ``rebuilt`` (after a refresh): our pages replace the file's, except pages
+        another worker recorded after the refresh started.
+        """
+        async with self._save_lock:
+            pages = dict(self.pages)
+            recent = dict(self._recent)
+            try:
+                merged, mtime = await asyncio.to_thread(
+                    _write_snapshot, self.path, pages, recent, self.refreshed_at, rebuilt
+                )
+            except OSError as e:
+                logger.warning(f"⚠️ Could not save the Notion index snapshot: {e}")
+                return
+        # Pick up what other workers recorded; our own records since the copy win
+        self.pages = {**merged, **self.pages}
+        self._snapshot_mtime = max(self._snapshot_mtime, mtime)
+
+    # -- bulk load / reconcile -----------------------------------------------
+    async def refresh(self, notion: "NotionWrapper") -> int:
+        """Rebuild the index from every page in the database; returns the page count."""
+        async with self._refresh_lock:
+            started = time.time()
+            pages: Dict[str, str] = {}
+            duplicates = 0
+            async for page in notion.iter_database_pages(
+                properties=[URL_PROPERTY],
+                sorts=[{"timestamp": "created_time", "direction": "ascending"}],
+            ):
+                key = canonicalize_linkedin_url(_url_property(page))
+                if not key:
+                    continue
+                if key in pages:
+                    # Keep the oldest page; later ones are duplicates
+                    duplicates += 1
+                    continue
+                pages[key] = page["id"]
+
+            # Pages we created after pagination started may not be in the listing yet
+            for key, (page_id, recorded_at) in list(self._recent.items()):
+                if recorded_at >= started:
+                    pages.setdefault(key, page_id)
+                else:
+                    del self._recent[key]
+            self.pages = pages
+            self.refreshed_at = started
+            self.loaded = True
+            await self.save_snapshot(rebuilt=True)
+            logger.info(
+                f"🗂️ Notion index refreshed: {len(pages)} profiles, {duplicates} duplicates "
+                f"in {time.time() - started:.1f}s"
+            )
+            return len(pages)
+
+    async def run_reconciler(self, notion: "NotionWrapper", interval_seconds: float) -> None:
+        """Refresh now if the snapshot is stale, then every ``interval_seconds``.
+
+        A refresh done by another worker (newer snapshot) postpones ours.
+        """
+        self.load_snapshot()
+        while True:
+            if self._snapshot_is_newer():
+                self.load_snapshot()
+            wait = self.refreshed_at + interval_seconds - time.time()
+            if wait > 0:
+                await asyncio.sleep(min(wait, 60))
+                continue
+            try:
+                await self.refresh(notion)
+            except Exception as e:
+                logger.error(f"❌ Notion index refresh failed: {e}")
+                await asyncio.sleep(min(interval_seconds, 60))
+
+
+def _write_snapshot(
+    path: Path, pages: Dict[str, str], recent: Dict[str, Tuple[str, float]], refreshed_at: float, rebuilt: bool
+) -> Tuple[Dict[str, str], float]:
+    """Merge ``pages`` into the snapshot at ``path`` and replace it atomically; returns the merged pages and mtime.
+
+    Two workers saving at once can still lose a record to the last writer;
+    it costs a Notion query on the next miss, not a duplicate page.
+    """
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        data = {}
+    if not rebuilt:
+        refreshed_at = max(refreshed_at, data.get("refreshedAt", 0.0))
+    # Records newer than the last refresh stay listed, so a refresh in another worker keeps them
+    stored_recent = {key: (value[0], value[1]) for key, value in data.get("recent", {}).items()}
+    recent = {key: value for key, value in {**stored_recent, **recent}.items() if value[1] >= refreshed_at}
+    if rebuilt:
+        merged = dict(pages)
+        for key, (page_id, _) in recent.items():
+            merged.setdefault(key, page_id)
+    else:
+        # Only our records: pages a newer refresh dropped (deleted in Notion) are not brought back
+        merged = {**data.get("pages", pages), **{key: page_id for key, (page_id, _) in recent.items()}}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp.write_text(json.dumps({"refreshedAt": refreshed_at, "pages": merged, "recent": recent}), encoding="utf-8")
+    os.replace(tmp, path)
+    return merged, path.stat().st_mtime
+
+
+def _url_property(page: Dict[str, Any]) -> Optional[str]:
+    prop = page.get("properties", {}).get(URL_PROPERTY) or {}
+    return prop.get("url")
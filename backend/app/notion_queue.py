@@ -0,0 +1,334 @@
+from __future__ import annotations
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+import httpx
+from notion_client.errors import APIResponseError, HTTPResponseError, RequestTimeoutError
+
+from .normalization import canonicalize_linkedin_url
+from .resilience import backoff_delay, parse_retry_after
+from .logging_config import get_logger
+
+if TYPE_CHECKING:
+    from .notion_client import NotionWrapper
+
+logger = get_logger(__name__)
+
+PENDING = "pending"
+SENDING = "sending"
+DONE = "done"
+FAILED = "failed"
+
+# Page statuses in the order a contact moves through them; a queued write never moves a page back
+STATUS_ORDER = ("Need to contact", "Contacted")
+
+
+def _status_rank(props: Dict[str, Any]) -> int:
+    name = ((props.get("Status") or {}).get("status") or {}).get("name")
+    if name is None:
+        return -1
+    # Statuses set by hand in Notion (e.g. "Replied") are further along than ours
+    return STATUS_ORDER.index(name) if name in STATUS_ORDER else len(STATUS_ORDER)
+
+
+def merge_props(stored: Dict[str, Any], props: Dict[str, Any]) -> Dict[str, Any]:
+    """``props`` over ``stored``, except that Status never goes back (Contacted stays Contacted)."""
+    merged = {**stored, **props}
+    if "Status" in stored and _status_rank(stored) > _status_rank(props):
+        merged["Status"] = stored["Status"]
+    return merged
+
+
+def create_as_update(props: Dict[str, Any]) -> Dict[str, Any]:
+    """A page create's properties as an update of the page an earlier create made for the same profile."""
+    update = {name: value for name, value in props.items() if name != "Date Contacted"}
+    if _status_rank(update) == 0:
+        # The initial status: the page already has it or a later one
+        del update["Status"]
+    return update
+
+
+class NotionWriteQueue:
+    """Write-ahead queue of Notion page creates/updates, flushed in the background.
+
+    Writes are stored in SQLite (shared by every worker, kept across restarts)
+    and the request returns right away with a write id to poll. A pending
+    write that targets the same page - or, for creates, the same LinkedIn URL -
+    absorbs later ones, and a create for a URL whose page is already being
+    (or has been) created becomes an update of that page, chained after the
+    first create. So a profile never gets two pages from the queue.
+    The flusher goes through the wrapper's rate-limited client and, on a 429,
+    pauses the shared token bucket for the server's Retry-After.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 1.0,
+        retry_max_seconds: float = 60.0,
+        lease_seconds: float = 120.0,
+        retention_seconds: float = 24 * 3600,
+    ) -> None:
+        self.path = path
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self.retention_seconds = retention_seconds
+        self.sent = 0
+        self.merged = 0
+        self.chained = 0
+        self.retried = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._wakeup = asyncio.Event()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS notion_writes ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, page_id TEXT, linkedin_url TEXT, "
+            "props TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "next_attempt_at REAL NOT NULL, url TEXT, error TEXT, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(notion_writes)")}
+        if "after_id" not in columns:
+            # Update of the page a still-unsent create will make (page_id is filled in once it is sent)
+            self._conn.execute("ALTER TABLE notion_writes ADD COLUMN after_id TEXT")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS notion_writes_due ON notion_writes(status, next_attempt_at)"
+        )
+
+    # -- enqueue -------------------------------------------------------------
+    def enqueue(
+        self,
+        props: Dict[str, Any],
+        page_id: Optional[str] = None,
+        linkedin_url: Optional[str] = None,
+    ) -> str:
+        """Queue an update of ``page_id``, or a page create when it is None; returns the write id."""
+        write_id = self._enqueue(props, page_id, linkedin_url, create=True)
+        assert write_id is not None
+        return write_id
+
+    def attach(self, props: Dict[str, Any], linkedin_url: str) -> Optional[str]:
+        """Queue ``props`` for the page a queued create of ``linkedin_url`` makes (e.g. a message generated
+        before the page exists); None when no create for it is queued."""
+        return self._enqueue(props, None, linkedin_url, create=False)
+
+    def _enqueue(
+        self, props: Dict[str, Any], page_id: Optional[str], linkedin_url: Optional[str], create: bool
+    ) -> Optional[str]:
+        url_key = canonicalize_linkedin_url(linkedin_url) if linkedin_url and not page_id else None
+        after_id: Optional[str] = None
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                first = self._conn.execute(
+                    "SELECT id, status, page_id FROM notion_writes WHERE kind = 'create' AND linkedin_url = ? "
+                    "AND status != ? ORDER BY created_at DESC LIMIT 1",
+                    (url_key, FAILED),
+                ).fetchone() if url_key else None
+                if first is not None and first[1] != PENDING:
+                    # The page is being or has been created: update it instead of making a second one
+                    props = create_as_update(props)
+                    page_id, after_id = (first[2], None) if first[1] == DONE else (None, first[0])
+                    self.chained += 1
+                elif first is None and not create:
+                    self._conn.execute("ROLLBACK")
+                    return None
+
+                if first is not None and first[1] == PENDING:
+                    row = self._conn.execute("SELECT id, props FROM notion_writes WHERE id = ?", (first[0],)).fetchone()
+                elif page_id or after_id:
+                    row = self._conn.execute(
+                        "SELECT id, props FROM notion_writes WHERE status = ? AND kind = 'update' "
+                        "AND (page_id = ? OR after_id = ?)",
+                        (PENDING, page_id, after_id),
+                    ).fetchone()
+                else:
+                    row = None
+                if row is not None:
+                    write_id, stored = row
+                    self._conn.execute(
+                        "UPDATE notion_writes SET props = ?, updated_at = ? WHERE id = ?",
+                        (json.dumps(merge_props(json.loads(stored), props)), now, write_id),
+                    )
+                    self.merged += 1
+                else:
+                    write_id = uuid.uuid4().hex
+                    kind = "update" if page_id or after_id else "create"
+                    self._conn.execute(
+                        "INSERT INTO notion_writes (id, kind, page_id, linkedin_url, after_id, props, status, "
+                        "next_attempt_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (write_id, kind, page_id, url_key if kind == "create" else None, after_id,
+                         json.dumps(props), PENDING, now, now, now),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self._wakeup.set()
+        return write_id
+
+    def status(self, write_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, page_id, url, attempts, error, created_at, updated_at "
+                "FROM notion_writes WHERE id = ?",
+                (write_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ("writeId", "kind", "status", "pageId", "url", "attempts", "error", "createdAt", "updatedAt")
+        return dict(zip(keys, row))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM notion_writes GROUP BY status").fetchall())
+        return {
+            **{status: counts.get(status, 0) for status in (PENDING, SENDING, DONE, FAILED)},
+            "sent": self.sent,
+            "merged": self.merged,
+            "chained": self.chained,
+            "retried": self.retried,
+            "rateLimited": self.rate_limited,
+        }
+
+    # -- flushing ------------------------------------------------------------
+    def _claim(self, limit: int) -> List[Dict[str, Any]]:
+        """Mark up to ``limit`` due writes as sending; other workers skip them.
+
+        Writes left sending by a worker that died are claimed again once their lease expires.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, kind, page_id, linkedin_url, props, attempts FROM notion_writes "
+                    "WHERE ((status = ? AND next_attempt_at <= ?) OR (status = ? AND updated_at < ?)) "
+                    # Chained updates wait until their create is sent and the page id is known
+                    "AND (kind = 'create' OR page_id IS NOT NULL) "
+                    "ORDER BY created_at LIMIT ?",
+                    (PENDING, now, SENDING, now - self.lease_seconds, limit),
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE notion_writes SET status = ?, updated_at = ? WHERE id = ?",
+                    [(SENDING, now, row[0]) for row in rows],
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        keys = ("id", "kind", "page_id", "linkedin_url", "props", "attempts")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def _finish(self, write_id: str, status: str, **fields: Any) -> None:
+        fields = {"status": status, "updated_at": time.time(), **fields}
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE notion_writes SET {assignments} WHERE id = ?", (*fields.values(), write_id))
+
+    def _next_wakeup(self) -> Optional[float]:
+        with self._lock:
+            (due,) = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM notion_writes WHERE status = ? "
+                "AND (kind = 'create' OR page_id IS NOT NULL)",
+                (PENDING,),
+            ).fetchone()
+        return due
+
+    def _fail(self, write: Dict[str, Any], attempts: int, error: str) -> None:
+        """Mark a write failed, along with the updates chained after it (they have no page to go to)."""
+        self._finish(write["id"], FAILED, attempts=attempts, error=error)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE notion_writes SET status = ?, error = ?, updated_at = ? WHERE after_id = ? AND page_id IS NULL",
+                (FAILED, f"page create {write['id']} failed", time.time(), write["id"]),
+            )
+
+    async def _send(self, notion: "NotionWrapper", write: Dict[str, Any]) -> None:
+        props = json.loads(write["props"])
+        attempts = write["attempts"] + 1
+        try:
+            if write["kind"] == "create":
+                response = await notion.create_page(props, write["linkedin_url"])
+            else:
+                response = await notion.client.pages.update(page_id=write["page_id"], properties=props)
+        except (APIResponseError, HTTPResponseError, RequestTimeoutError, httpx.TransportError) as e:
+            status = getattr(e, "status", None)
+            retryable = status is None or status == 429 or status >= 500
+            if not retryable or attempts >= self.max_attempts:
+                logger.error(f"❌ Notion {write['kind']} {write['id']} failed after {attempts} attempts: {e}")
+                self._fail(write, attempts, str(e))
+                return
+            retry_after = parse_retry_after(getattr(e, "headers", None)) if status == 429 else None
+            if status == 429:
+                self.rate_limited += 1
+                notion.limiter.pause(retry_after if retry_after is not None else self.retry_base_seconds)
+            delay = backoff_delay(attempts, self.retry_base_seconds, self.retry_max_seconds, retry_after)
+            self.retried += 1
+            logger.warning(f"⏳ Notion {write['kind']} {write['id']} retry {attempts} in {delay:.1f}s: {e}")
+            self._finish(write["id"], PENDING, attempts=attempts, error=str(e), next_attempt_at=time.time() + delay)
+            return
+        except Exception as e:
+            logger.error(f"❌ Notion {write['kind']} {write['id']} failed: {e}")
+            self._fail(write, attempts, str(e))
+            return
+        self.sent += 1
+        self._finish(
+            write["id"], DONE, attempts=attempts, error=None,
+            page_id=response["id"], url=response.get("url"),
+        )
+        if write["kind"] == "create":
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE notion_writes SET page_id = ?, updated_at = ? WHERE after_id = ? AND page_id IS NULL",
+                    (response["id"], time.time(), write["id"]),
+                )
+            self._wakeup.set()
+
+    def _purge(self) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM notion_writes WHERE status IN (?, ?) AND updated_at < ?",
+                (DONE, FAILED, time.time() - self.retention_seconds),
+            )
+
+    async def run_flusher(self, notion: "NotionWrapper", concurrency: int = 3, poll_seconds: float = 5.0) -> None:
+        """Send due writes, ``concurrency`` at a time, until cancelled.
+
+        Wakes on our own enqueues and every ``poll_seconds`` for writes queued by other workers.
+        """
+        purged_at = 0.0
+        while True:
+            if time.time() - purged_at > 3600:
+                self._purge()
+                purged_at = time.time()
+            self._wakeup.clear()
+            writes = self._claim(concurrency)
+            if writes:
+                await asyncio.gather(*(self._send(notion, write) for write in writes))
+                continue
+            due = self._next_wakeup()
+            wait = poll_seconds if due is None else min(poll_seconds, max(due - time.time(), 0.0))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
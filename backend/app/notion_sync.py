@@ -0,0 +1,402 @@
+"""Bulk export / import of the Notion contacts database.
+
+Export paginates the database and streams one record per page as JSONL or
+CSV. Import matches records to existing pages by canonical LinkedIn URL and
+sends only the properties that changed (a create for unknown profiles).
+
+Usage (from the repo root):
+    python -m backend.app.notion_sync export contacts.jsonl
+    python -m backend.app.notion_sync export contacts.csv --properties "Name,LinkedIn URL,Status"
+    python -m backend.app.notion_sync import contacts.csv --dry-run
+
+A record maps property names to plain values (text, select/status name,
+list of multi-select names, URL, checkbox, date start, number), plus
+``pageId`` / ``pageUrl``, which import ignores. In CSV, multi-select names
+are separated by ``;``.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import csv
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from notion_client.errors import APIResponseError
+
+from .normalization import canonicalize_linkedin_url
+from .resilience import backoff_delay, parse_retry_after
+from .logging_config import get_logger
+
+if TYPE_CHECKING:
+    from .notion_client import NotionWrapper
+
+logger = get_logger(__name__)
+
+URL_PROPERTY = "LinkedIn URL"
+META_COLUMNS = ["pageId", "pageUrl"]
+# Property types we can write; formulas, rollups, timestamps etc. are export-only
+WRITABLE_TYPES = {"title", "rich_text", "select", "status", "multi_select", "url", "checkbox", "date", "number", "email", "phone_number"}
+# Notion caps one rich text object at 2000 characters
+_TEXT_CHUNK = 2000
+_MAX_RETRIES = 5
+
+
+# -- value conversion ----------------------------------------------------------
+def property_value(prop: Dict[str, Any]) -> Any:
+    """Plain value of a Notion page property."""
+    kind = prop.get("type")
+    value = prop.get(kind)
+    if kind in ("title", "rich_text"):
+        return "".join(part.get("plain_text") or part.get("text", {}).get("content", "") for part in value or [])
+    if kind in ("select", "status"):
+        return value.get("name") if value else None
+    if kind == "multi_select":
+        return [option["name"] for option in value or []]
+    if kind == "date":
+        return value.get("start") if value else None
+    if kind in ("formula", "rollup") and isinstance(value, dict):
+        return value.get(value.get("type"))
+    if kind in ("created_by", "last_edited_by") and isinstance(value, dict):
+        return value.get("id")
+    return value
+
+
+def coerce_value(kind: str, value: Any) -> Any:
+    """A record value (typed from JSONL, or a string from CSV) as the plain value ``property_value`` returns."""
+    if value == "":
+        value = None
+    if kind in ("title", "rich_text"):
+        return "" if value is None else str(value)
+    if kind == "multi_select":
+        if value is None:
+            return []
+        if isinstance(value, str):
+            return [name.strip() for name in value.split(";") if name.strip()]
+        return [str(name) for name in value]
+    if kind == "checkbox":
+        return value.strip().lower() in ("true", "1", "yes") if isinstance(value, str) else bool(value)
+    if kind == "number" and isinstance(value, str):
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    return value
+
+
+def property_payload(kind: str, value: Any) -> Dict[str, Any]:
+    """Notion API property payload for a plain value."""
+    if kind in ("title", "rich_text"):
+        chunks = [value[i:i + _TEXT_CHUNK] for i in range(0, len(value), _TEXT_CHUNK)]
+        return {kind: [{"text": {"content": chunk}} for chunk in chunks]}
+    if kind in ("select", "status"):
+        return {kind: {"name": value} if value else None}
+    if kind == "multi_select":
+        return {kind: [{"name": name} for name in value]}
+    if kind == "date":
+        return {kind: {"start": value} if value else None}
+    return {kind: value}
+
+
+def page_record(page: Dict[str, Any], properties: Optional[List[str]] = None) -> Dict[str, Any]:
+    record: Dict[str, Any] = {"pageId": page["id"], "pageUrl": page.get("url")}
+    for name, prop in page.get("properties", {}).items():
+        if properties is None or name in properties:
+            record[name] = property_value(prop)
+    return record
+
+
+def _csv_cell(value: Any) -> Any:
+    if isinstance(value, list):
+        return "; ".join(str(item) for item in value)
+    if value is None:
+        return ""
+    return value
+
+
+# -- export ----------------------------------------------------------------------
+async def database_schema(notion: "NotionWrapper") -> Dict[str, str]:
+    """Property name -> type for the contacts database."""
+    database = await notion.client.databases.retrieve(database_id=notion.database_id)
+    return {name: prop["type"] for name, prop in database.get("properties", {}).items()}
+
+
+async def export_records(notion: "NotionWrapper", properties: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+    """Yield every page of the database as a record, one API page (100 rows) in memory at a time."""
+    async for page in notion.iter_database_pages(
+        properties=properties,
+        sorts=[{"timestamp": "created_time", "direction": "ascending"}],
+    ):
+        yield page_record(page, properties)
+
+
+async def export_lines(notion: "NotionWrapper", fmt: str = "jsonl", properties: Optional[List[str]] = None) -> AsyncIterator[str]:
+    """Export as JSONL or CSV text, one line (CSV: one row) at a time."""
+    if fmt == "jsonl":
+        async for record in export_records(notion, properties):
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+        return
+    if fmt != "csv":
+        raise ValueError(f"Unknown export format: {fmt!r}")
+    columns = META_COLUMNS + (properties or list(await database_schema(notion)))
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction="ignore")
+    writer.writeheader()
+    async for record in export_records(notion, properties):
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow({name: _csv_cell(record.get(name)) for name in columns})
+    yield buffer.getvalue()
+
+
+# -- import ----------------------------------------------------------------------
+class ImportReport:
+    """Counters and throughput of one import run."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.records = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.failed = 0
+        self.properties_written = 0
+        self.retries = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.ignored_columns: set = set()
+
+    def as_dict(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "records": self.records,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "propertiesWritten": self.properties_written,
+            "retries": self.retries,
+            "seconds": round(elapsed, 2),
+            "recordsPerSecond": round(self.records / elapsed, 2) if elapsed else 0.0,
+            "ignoredColumns": sorted(self.ignored_columns),
+            # First few only, so a bad file does not produce a huge report
+            "errors": self.errors[:20],
+        }
+
+
+async def _load_existing(notion: "NotionWrapper", schema: Dict[str, str]) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+    """Canonical LinkedIn URL -> (page id, plain values of writable properties); the oldest page wins."""
+    writable = [name for name, kind in schema.items() if kind in WRITABLE_TYPES]
+    existing: Dict[str, Tuple[str, Dict[str, Any]]] = {}
+    async for record in export_records(notion, writable):
+        key = canonicalize_linkedin_url(record.get(URL_PROPERTY))
+        if key and key not in existing:
+            existing[key] = (record["pageId"], record)
+    return existing
+
+
+def changed_properties(
+    record: Dict[str, Any],
+    schema: Dict[str, str],
+    current: Optional[Dict[str, Any]],
+    report: ImportReport,
+) -> Dict[str, Any]:
+    """Notion payloads for the record's properties that differ from ``current`` (all of them when None)."""
+    props: Dict[str, Any] = {}
+    for name, raw in record.items():
+        if name in META_COLUMNS:
+            continue
+        kind = schema.get(name)
+        if kind not in WRITABLE_TYPES:
+            report.ignored_columns.add(name)
+            continue
+        value = coerce_value(kind, raw)
+        if name == URL_PROPERTY and value:
+            value = canonicalize_linkedin_url(value) or value
+        if current is not None and value == coerce_value(kind, current.get(name)):
+            continue
+        if current is None and value in (None, "", []):
+            continue
+        props[name] = property_payload(kind, value)
+    return props
+
+
+async def _with_retries(notion: "NotionWrapper", report: ImportReport, fn) -> Dict[str, Any]:
+    """Run one Notion call, retrying 429 (after pausing the shared limiter) and 5xx responses."""
+    for attempt in range(1, _MAX_RETRIES + 1):
+        try:
+            return await fn()
+        except APIResponseError as e:
+            if attempt == _MAX_RETRIES or not (e.status == 429 or e.status >= 500):
+                raise
+            retry_after = parse_retry_after(e.headers) if e.status == 429 else None
+            if retry_after is not None:
+                notion.limiter.pause(retry_after)
+            report.retries += 1
+            await asyncio.sleep(backoff_delay(attempt, 1.0, 30.0, retry_after))
+    raise AssertionError("unreachable")
+
+
+async def import_records(
+    notion: "NotionWrapper",
+    records: AsyncIterable[Dict[str, Any]],
+    concurrency: int = 3,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Create or update a page per record, sending only changed properties; returns the report.
+
+    Records are matched to pages by canonical LinkedIn URL; records without one are skipped.
+    At most ``concurrency`` writes are in flight, and every call takes a token from the
+    wrapper's shared rate limiter.
+    """
+    report = ImportReport()
+    schema = await database_schema(notion)
+    existing = await _load_existing(notion, schema)
+    logger.info(f"📥 Import: {len(existing)} existing profiles loaded")
+    semaphore = asyncio.Semaphore(max(concurrency, 1))
+    # Two records for the same profile in one file must not race to create two pages
+    in_progress: Dict[str, asyncio.Task] = {}
+
+    async def apply(index: int, record: Dict[str, Any], key: Optional[str], earlier: Optional[asyncio.Task]) -> None:
+        if not key:
+            report.skipped += 1
+            return
+        if earlier is not None:
+            await asyncio.gather(earlier, return_exceptions=True)
+        page_id, current = existing.get(key, (None, None))
+        try:
+            props = changed_properties(record, schema, current, report)
+            if not props:
+                report.unchanged += 1
+                return
+            async with semaphore:
+                if dry_run:
+                    response = {"id": page_id or f"dry-run-{index}"}
+                elif page_id:
+                    response = await _with_retries(
+                        notion, report, lambda: notion.client.pages.update(page_id=page_id, properties=props)
+                    )
+                else:
+                    response = await _with_retries(notion, report, lambda: notion.create_page(props, key))
+        except Exception as e:
+            report.failed += 1
+            report.errors.append({"index": index, "linkedinUrl": key, "error": str(e)})
+            return
+        if page_id:
+            report.updated += 1
+        else:
+            report.created += 1
+        report.properties_written += len(props)
+        merged = {**(current or {}), **{name: record[name] for name in props}}
+        existing[key] = (response["id"], merged)
+
+    def forget(key: str, task: asyncio.Task) -> None:
+        if in_progress.get(key) is task:
+            del in_progress[key]
+
+    pending: set = set()
+    index = 0
+    try:
+        async for record in records:
+            report.records += 1
+            key = canonicalize_linkedin_url(record.get(URL_PROPERTY))
+            task = asyncio.create_task(apply(index, record, key, in_progress.get(key) if key else None))
+            if key:
+                in_progress[key] = task
+                task.add_done_callback(lambda task, key=key: forget(key, task))
+            pending.add(task)
+            index += 1
+            # Bound how many records are read ahead of the writes
+            if len(pending) >= concurrency * 4:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+    except BaseException:
+        # Bad line or client gone: stop the writes nobody will get a report of
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        result = report.as_dict()
+        logger.warning(f"⚠️ Import aborted: {json.dumps({k: v for k, v in result.items() if k != 'errors'})}")
+        raise
+    if pending:
+        await asyncio.wait(pending)
+    result = report.as_dict()
+    logger.info(f"📥 Import done: {json.dumps({k: v for k, v in result.items() if k != 'errors'})}")
+    return result
+
+
+async def iter_jsonl(lines: AsyncIterable[str]) -> AsyncIterator[Dict[str, Any]]:
+    async for line in lines:
+        if line.strip():
+            yield json.loads(line)
+
+
+async def iter_text_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into lines without holding more than one line at a time."""
+    tail = b""
+    async for chunk in chunks:
+        tail += chunk
+        *lines, tail = tail.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if tail:
+        yield tail.decode("utf-8")
+
+
+async def _iter_file(path: Path) -> AsyncIterator[Dict[str, Any]]:
+    with path.open(encoding="utf-8", newline="") as fh:
+        rows: Iterable[Dict[str, Any]]
+        if path.suffix.lower() == ".csv":
+            rows = csv.DictReader(fh)
+        else:
+            rows = (json.loads(line) for line in fh if line.strip())
+        for row in rows:
+            yield row
+
+
+# -- CLI -------------------------------------------------------------------------
+async def _run(args: argparse.Namespace) -> None:
+    from . import config
+    from .notion_client import close_notion, start_notion
+
+    notion = start_notion()
+    if notion is None:
+        sys.exit("NOTION_API_KEY and NOTION_DATABASE_ID must be set")
+    try:
+        if args.command == "export":
+            fmt = "csv" if args.path.suffix.lower() == ".csv" else "jsonl"
+            properties = [p.strip() for p in args.properties.split(",")] if args.properties else None
+            started = time.perf_counter()
+            rows = 0
+            with args.path.open("w", encoding="utf-8", newline="") as fh:
+                async for chunk in export_lines(notion, fmt, properties):
+                    fh.write(chunk)
+                    rows += 1
+            elapsed = time.perf_counter() - started
+            rows -= 1 if fmt == "csv" else 0  # header
+            print(json.dumps({"records": rows, "seconds": round(elapsed, 2), "recordsPerSecond": round(rows / elapsed, 2) if elapsed else 0.0}))
+        else:
+            concurrency = args.concurrency or config.NOTION_IMPORT_CONCURRENCY
+            report = await import_records(notion, _iter_file(args.path), concurrency, args.dry_run)
+            print(json.dumps(report, indent=2))
+    finally:
+        await close_notion()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="write every page to a .jsonl or .csv file")
+    export.add_argument("path", type=Path)
+    export.add_argument("--properties", help="comma-separated property names (default: all)")
+    imp = commands.add_parser("import", help="create/update pages from a .jsonl or .csv file")
+    imp.add_argument("path", type=Path)
+    imp.add_argument("--concurrency", type=int, help="writes in flight (default NOTION_IMPORT_CONCURRENCY)")
+    imp.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    asyncio.run(_run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
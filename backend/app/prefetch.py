@@ -0,0 +1,116 @@
+from __future__ import annotations
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .llm_client import BackgroundPriority, LLMUnavailableError, background_priority
+from .logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class _Job:
+    task: "asyncio.Task[Any]"
+    # The same work for an interactive request taking over a job that has not started
+    inline: Optional[Callable[[], Awaitable[Any]]] = None
+    running: bool = False
+    priority: Optional[BackgroundPriority] = None
+    # Interactive requests awaiting this job's result; a job with waiters is not cancelled
+    waiters: int = 0
+
+
+class Prefetcher:
+    """Speculative background work (profile extraction ahead of a click), keyed like the profile handles.
+
+    At most ``max_concurrency`` jobs run at once, at background LLM priority,
+    and at most ``max_pending`` are kept; further ones are rejected. A failed
+    job only leaves the caches cold, and one that finds OpenAI unavailable
+    gives up quietly. An interactive request that needs a job's result
+    ``join``s it: a running job is awaited at normal priority from then on,
+    a queued one is replaced by its ``inline`` version run in the request.
+    """
+
+    def __init__(self, max_concurrency: int, max_pending: int) -> None:
+        self.max_pending = max_pending
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._jobs: Dict[str, _Job] = {}
+        self.counts = {"started": 0, "completed": 0, "failed": 0, "cancelled": 0, "rejected": 0, "joined": 0}
+
+    def start(
+        self, key: str, fn: Callable[[], Awaitable[Any]], inline: Optional[Callable[[], Awaitable[Any]]] = None
+    ) -> str:
+        """Start ``fn`` in the background: "started", "running" (already pending) or "rejected" (too many)."""
+        if key in self._jobs:
+            return "running"
+        if len(self._jobs) >= self.max_pending:
+            self.counts["rejected"] += 1
+            return "rejected"
+        self.counts["started"] += 1
+        job = _Job(asyncio.create_task(self._run(key, fn)), inline)
+        self._jobs[key] = job
+        job.task.add_done_callback(lambda _, job=job: self._forget(key, job))
+        return "started"
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            async with self._semaphore:
+                job = self._jobs[key]
+                job.running = True
+                with background_priority() as job.priority:
+                    if job.waiters:
+                        job.priority.boost()
+                    result = await fn()
+        except asyncio.CancelledError:
+            self.counts["cancelled"] += 1
+            raise
+        except LLMUnavailableError as e:
+            # Speculative: not worth a retry, and the click will try again anyway
+            self.counts["cancelled"] += 1
+            logger.info(f"🔮 Prefetch {key[:12]} dropped: {e}")
+            return None
+        except Exception as e:
+            self.counts["failed"] += 1
+            logger.warning(f"⚠️ Prefetch {key[:12]} failed: {e}")
+            return None
+        self.counts["completed"] += 1
+        return result
+
+    def _forget(self, key: str, job: _Job) -> None:
+        if self._jobs.get(key) is job:
+            del self._jobs[key]
+
+    async def join(self, key: str) -> Optional[Any]:
+        """Result of the pending job for ``key``, or None when there is none (or it failed)."""
+        job = self._jobs.get(key)
+        if job is None:
+            return None
+        self.counts["joined"] += 1
+        if not job.running and job.inline is not None:
+            # Still waiting for a slot: don't make an interactive request wait behind other prefetches
+            job.task.cancel()
+            return await job.inline()
+        job.waiters += 1
+        if job.priority is not None:
+            job.priority.boost()
+        try:
+            # Shield so a joiner going away does not cancel the job for the others
+            return await asyncio.shield(job.task)
+        finally:
+            job.waiters -= 1
+
+    def cancel(self, key: str) -> bool:
+        """Cancel the pending job for ``key`` unless a request is waiting on it; True if it was cancelled."""
+        job = self._jobs.get(key)
+        if job is None or job.waiters:
+            return False
+        job.task.cancel()
+        return True
+
+    def cancel_all(self) -> None:
+        for job in list(self._jobs.values()):
+            job.task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        running = sum(1 for job in self._jobs.values() if job.running)
+        return {**self.counts, "running": running, "queued": len(self._jobs) - running}
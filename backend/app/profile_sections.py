@@ -0,0 +1,80 @@
+from __future__ import annotations
+import hashlib
+import json
+from dataclasses import dataclass
+from typing import Dict, List
+
+from .compaction import count_tokens, truncate_to_tokens
+from .normalization import canonicalize_profile_text
+from .schemas import Profile
+
+# Profile fields each tracked section is the source of; a changed section re-extracts only these
+SECTION_FIELDS: Dict[str, List[str]] = {
+    "top_card": ["name", "headline", "location"],
+    "about": ["bio"],
+    "experience": ["role", "currentCompany", "companies", "field", "experience_details"],
+    "education": ["schools", "highestDegree"],
+}
+
+
+@dataclass
+class SectionSnapshot:
+    """The last extracted profile for a LinkedIn URL and the section fingerprints it came from."""
+    profile: Profile
+    fingerprints: Dict[str, str]
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "profile": self.profile.model_dump(mode="json", exclude={"htmlContent"}),
+            "fingerprints": self.fingerprints,
+        })
+
+    @classmethod
+    def from_json(cls, raw: str) -> "SectionSnapshot":
+        data = json.loads(raw)
+        return cls(profile=Profile.model_validate(data["profile"]), fingerprints=data["fingerprints"])
+
+
+def fingerprint_sections(sections: Dict[str, str]) -> Dict[str, str]:
+    """Hash of the canonicalized text of each tracked section present on the page.
+
+    Canonicalized like the profile cache key, so follower / connection counts
+    and other volatile fragments do not make a section look edited.
+    """
+    return {
+        name: hashlib.blake2b(canonicalize_profile_text(sections[name]).encode(), digest_size=8).hexdigest()
+        for name in SECTION_FIELDS
+        if sections.get(name, "").strip()
+    }
+
+
+def changed_sections(previous: Dict[str, str], current: Dict[str, str]) -> List[str]:
+    """Tracked sections added, removed or edited since ``previous``."""
+    return [name for name in SECTION_FIELDS if previous.get(name) != current.get(name)]
+
+
+def section_fields(names: List[str]) -> List[str]:
+    return [field for name in names for field in SECTION_FIELDS[name]]
+
+
+def section_prompt_text(sections: Dict[str, str], names: List[str], budget_tokens: int) -> str:
+    """Text of ``names`` (plus the top card, for context) in page-independent order, within ``budget_tokens``."""
+    wanted = ["top_card"] + [name for name in names if name != "top_card"]
+    parts: List[str] = []
+    remaining = budget_tokens
+    for name in wanted:
+        text = sections.get(name, "")
+        if not text or remaining <= 0:
+            continue
+        tokens = count_tokens(text)
+        if tokens > remaining:
+            text = truncate_to_tokens(text, remaining - 1) + "..."
+            tokens = remaining
+        parts.append(text)
+        remaining -= tokens
+    return "\n\n".join(parts)
+
+
+def apply_section_updates(previous: Profile, extracted: Profile, fields: List[str]) -> Profile:
+    """``previous`` with ``fields`` taken from ``extracted`` (a removed section clears its fields)."""
+    return previous.model_copy(update={name: getattr(extracted, name) for name in fields}, deep=True)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+import asyncio
+import time
+
+
+class TokenBucket:
+    """Async token bucket: ``rate`` acquisitions per second on average, bursts up to ``burst``.
+
+    Waiters are served in arrival order; a rate of 0 or less disables limiting.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            self._refill()
+            # Loop: a pause() while we slept pushes the next token further out
+            while self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+                self.waited += wait
+                await asyncio.sleep(wait)
+                self._refill()
+            self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """Hold every acquirer back for ``seconds`` (e.g. a 429's Retry-After)."""
+        if self.rate <= 0 or seconds <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
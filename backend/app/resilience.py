@@ -0,0 +1,110 @@
+from __future__ import annotations
+import email.utils
+import random
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Iterator, Mapping, Optional
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"circuit open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Fails fast after ``failure_threshold`` consecutive upstream failures.
+
+    closed: calls go through. open: calls raise CircuitOpenError until
+    ``reset_seconds`` have passed. half_open: one probe call goes through;
+    its success closes the circuit, its failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._probing = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def before_call(self) -> None:
+        if self.failure_threshold <= 0 or self.state == "closed":
+            return
+        if self.state == "open" and self.retry_after() == 0:
+            self.state = "half_open"
+        if self.state == "open" or self._probing:
+            self.rejected += 1
+            raise CircuitOpenError(self.retry_after() or self.reset_seconds)
+        self._probing = True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == "half_open" or self.failures >= self.failure_threshold > 0:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    @contextmanager
+    def call(self, is_failure: Callable[[BaseException], bool]) -> Iterator[None]:
+        """Guard one upstream call; exceptions for which ``is_failure`` is false (cancellation, 4xx) give no verdict."""
+        self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            if is_failure(e):
+                self.record_failure()
+            else:
+                self._probing = False
+            raise
+        self.record_success()
+
+
+class LatencyTracker:
+    """Recent call durations, for percentile-based hedging."""
+
+    def __init__(self, size: int = 200, min_samples: int = 20) -> None:
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, p: float) -> Optional[float]:
+        """The ``p``-th percentile (0-100), or None until ``min_samples`` calls have been seen."""
+        if len(self._samples) < max(self.min_samples, 1):
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """Seconds to wait before retry ``attempt`` (1-based): full-jitter exponential, or the server's Retry-After."""
+    if retry_after is not None:
+        return retry_after
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+def parse_retry_after(headers: Optional[Mapping[str, str]]) -> Optional[float]:
+    """Seconds from a Retry-After header (delta-seconds or HTTP date), if present."""
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Optional, Literal
+from typing import Dict, List, Optional, Literal
 from pydantic import BaseModel, HttpUrl, Field
 
 
@@ -21,6 +21,8 @@ class Profile(BaseModel):
     linkedinUrl: Optional[HttpUrl] = None
     # Optional HTML content for LLM parsing
     htmlContent: Optional[str] = None
+    # Handle from POST /extract, sent instead of htmlContent once the server has the page
+    handle: Optional[str] = None
     
     # Richer profile data for text generation (not saved to Notion)
     bio: Optional[str] = None
@@ -39,6 +41,8 @@ class DraftOptions(BaseModel):
     messageType: Optional[Literal["linkedin", "email"]] = None
     linkedinMessage: Optional[str] = None
     emailMessage: Optional[str] = None
+    # Skip the draft cache and ask gpt-4o for a fresh draft
+    regenerate: bool = False
 
 
 class DraftRequest(BaseModel):
@@ -48,13 +52,39 @@ class DraftRequest(BaseModel):
 
 
 class NotionResult(BaseModel):
-    pageId: str
+    # None while a queued page create has not been sent yet
+    pageId: Optional[str] = None
     url: Optional[str] = None
     savedFields: dict = Field(default_factory=dict)
+    # Set when the write was queued: poll GET /notion/writes/{writeId}
+    status: Optional[Literal["pending"]] = None
+    writeId: Optional[str] = None
 
 
 class DraftResponse(BaseModel):
     notion: Optional[NotionResult] = None
     draft: Optional[Draft] = None
     provider: Optional[str] = None
-    message: Optional[str] = None 
\ No newline at end of file
+    message: Optional[str] = None 
+
+class ExtractResponse(BaseModel):
+    # SHA-256 of htmlContent (hex), so clients can compute it and check GET /extract/{handle} before uploading
+    handle: str
+    profile: Profile
+
+
+class BatchDraftRequest(BaseModel):
+    requests: List[DraftRequest]
+
+
+class BatchDraftItem(BaseModel):
+    """One NDJSON line of a /draft/batch response."""
+    index: int
+    linkedinUrl: Optional[str] = None
+    # Index of the earlier request for the same profile; this one is not processed
+    duplicateOf: Optional[int] = None
+    status: int = 200
+    response: Optional[DraftResponse] = None
+    error: Optional[str] = None
+    timings: Optional[str] = None
+    tokens: Optional[Dict[str, int]] = None
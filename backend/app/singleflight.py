@@ -0,0 +1,56 @@
+from __future__ import annotations
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class _Call(Generic[T]):
+    def __init__(self, task: "asyncio.Task[T]") -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls with the same key into one.
+
+    The first caller for a key starts ``fn()`` in a task; callers arriving
+    while it runs await the same task and get the same result (or exception).
+    Once every waiter has gone away (e.g. clients disconnected) the task is
+    cancelled. Nothing is remembered after the call finishes - that is the
+    caches' job.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[str, _Call[T]] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None or call.waiters == 0:
+            # No call, or one abandoned by all its waiters and being cancelled
+            self.calls += 1
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _, call=call: self._forget(key, call))
+        else:
+            self.shared += 1
+        call.waiters += 1
+        try:
+            # Shield so one waiter being cancelled does not cancel the others' result
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _forget(self, key: str, call: _Call[T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "shared": self.shared, "inFlight": self.in_flight()}
@@ -0,0 +1,63 @@
+from __future__ import annotations
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Dict, Iterator, Optional, TypeVar
+
+from .metrics import registry
+
+T = TypeVar("T")
+
+_current: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """Wall-clock durations of the named stages of one request."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        # Non-time quantities, e.g. LLM tokens per model
+        self.counts: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    async def timed(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await ``awaitable`` as stage ``name`` (handy for asyncio.create_task)."""
+        with self.stage(name):
+            return await awaitable
+
+    def record(self, name: str, seconds: float) -> None:
+        # Repeated stages (e.g. two Notion writes) accumulate
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        registry.observe("connoction_stage_seconds", seconds, stage=name)
+
+    def count(self, name: str, amount: int) -> None:
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def counts_header_value(self) -> str:
+        return ", ".join(f"{name}={amount}" for name, amount in self.counts.items())
+
+    def header_value(self) -> str:
+        """``name;dur=<ms>`` pairs in Server-Timing syntax, plus the request total."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items()]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def start_timer() -> StageTimer:
+    """Create a timer for the current request; tasks spawned afterwards inherit it."""
+    timer = StageTimer()
+    _current.set(timer)
+    return timer
+
+
+def current_timer() -> StageTimer:
+    """The current request's timer (a throwaway one outside a request)."""
+    return _current.get() or StageTimer()
@@ -0,0 +1,87 @@
+"""Compare profile cache hit rates for the old raw-HTML key and the text key.
+
+Replays a corpus of saved profile visits in order and counts how many
+would have been served from the cache under each keying scheme.
+
+Usage (from the repo root):
+    python -m backend.benchmarks.cache_hit_rate visits.jsonl
+    python -m backend.benchmarks.cache_hit_rate saved_pages/
+
+A JSONL corpus has one ``{"linkedinUrl": ..., "htmlContent": ...}`` object per
+line (the ``profile`` payload the extension sends). A directory corpus is read
+as ``*.html`` files in name order; the URL comes from the page's canonical link,
+falling back to the file name.
+"""
+from __future__ import annotations
+import argparse
+import hashlib
+import json
+import re
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Tuple
+
+from backend.app.email import extract_profile_text
+from backend.app.main import get_cache_key
+
+_CANONICAL_LINK = re.compile(r'<link[^>]+rel="canonical"[^>]+href="([^"]+)"', re.IGNORECASE)
+
+
+def legacy_cache_key(linkedin_url: str, html_content: str) -> str:
+    """The original key: MD5 of the raw HTML payload."""
+    content_hash = hashlib.md5(html_content.encode()).hexdigest()[:12]
+    return f"{linkedin_url}_{content_hash}"
+
+
+def text_cache_key(linkedin_url: str, html_content: str) -> str:
+    return get_cache_key(linkedin_url, extract_profile_text(html_content))
+
+
+def iter_corpus(path: Path) -> Iterator[Tuple[str, str]]:
+    if path.is_dir():
+        for page in sorted(path.glob("*.html")):
+            html = page.read_text(encoding="utf-8", errors="replace")
+            match = _CANONICAL_LINK.search(html)
+            yield (match.group(1) if match else page.stem), html
+        return
+    with path.open(encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                record = json.loads(line)
+                yield record["linkedinUrl"], record["htmlContent"]
+
+
+def replay(visits: list, key_fn: Callable[[str, str], str]) -> dict:
+    seen = set()
+    hits = 0
+    start = time.perf_counter()
+    for url, html in visits:
+        key = key_fn(url, html)
+        if key in seen:
+            hits += 1
+        seen.add(key)
+    elapsed = time.perf_counter() - start
+    return {
+        "visits": len(visits),
+        "hits": hits,
+        "hitRate": round(hits / len(visits), 4) if visits else 0.0,
+        "distinctKeys": len(seen),
+        "keyTimeMsPerVisit": round(elapsed * 1000 / len(visits), 3) if visits else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=Path, help="JSONL file or directory of saved .html pages")
+    args = parser.parse_args()
+
+    visits = list(iter_corpus(args.corpus))
+    distinct_urls = len({url for url, _ in visits})
+    print(f"Corpus: {len(visits)} visits, {distinct_urls} distinct profiles "
+          f"(best possible hit rate {1 - distinct_urls / len(visits):.2%})" if visits else "Corpus is empty")
+    for name, key_fn in [("raw HTML md5 (before)", legacy_cache_key), ("canonical text (after)", text_cache_key)]:
+        print(f"{name:>24}: {json.dumps(replay(visits, key_fn))}")
+
+
+if __name__ == "__main__":
+    main()
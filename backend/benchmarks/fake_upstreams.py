@@ -0,0 +1,202 @@
+"""Local stand-ins for the OpenAI and Notion APIs, for load tests.
+
+One app serves both: ``/v1/chat/completions`` (streaming too) answers profile
+parsing, field classification and drafting prompts with canned but
+well-formed output, and ``/v1/databases/...`` / ``/v1/pages`` keep pages in
+memory so lookups by LinkedIn URL find earlier creates.
+
+Latency and failures are injected per upstream from the environment:
+``FAKE_OPENAI_LATENCY`` / ``FAKE_NOTION_LATENCY`` (mean seconds, +-50% jitter),
+``FAKE_OPENAI_ERROR_RATE`` / ``FAKE_NOTION_ERROR_RATE`` (fraction of 500s) and
+``FAKE_OPENAI_429_RATE`` / ``FAKE_NOTION_429_RATE`` (fraction of 429s, with
+Retry-After: 1).
+
+Usage (from the repo root):
+    FAKE_OPENAI_LATENCY=0.8 uvicorn backend.benchmarks.fake_upstreams:app --port 8100
+"""
+from __future__ import annotations
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="Fake OpenAI + Notion")
+
+_pages: Dict[str, Dict[str, Any]] = {}
+_stats: Dict[str, int] = {"openai": 0, "notion": 0, "errors": 0, "rateLimited": 0}
+
+DATABASE_PROPERTIES = {
+    "Name": "title", "Company": "select", "Prev Companies": "multi_select", "Role": "rich_text",
+    "School(s)": "multi_select", "Highest Degree": "select", "Field": "select", "LinkedIn URL": "url",
+    "Date Contacted": "date", "Last Interaction Date": "date", "Status": "status",
+    "LinkedIn Message": "rich_text", "Email Message": "rich_text", "Email Subject": "rich_text",
+    "LinkedIn Reached Out": "checkbox", "Email Reached Out": "checkbox",
+}
+
+
+def _env(name: str, default: float = 0.0) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+async def _inject(upstream: str) -> Optional[JSONResponse]:
+    """Sleep for the upstream's latency; return an error response for the injected fraction of calls."""
+    _stats[upstream] += 1
+    latency = _env(f"FAKE_{upstream.upper()}_LATENCY")
+    if latency > 0:
+        await asyncio.sleep(random.uniform(latency * 0.5, latency * 1.5))
+    roll = random.random()
+    rate_limited = _env(f"FAKE_{upstream.upper()}_429_RATE")
+    if roll < rate_limited:
+        _stats["rateLimited"] += 1
+        body = {"object": "error", "status": 429, "code": "rate_limited", "message": "Rate limited"}
+        return JSONResponse({"error": body} if upstream == "openai" else body, status_code=429, headers={"Retry-After": "1"})
+    if roll < rate_limited + _env(f"FAKE_{upstream.upper()}_ERROR_RATE"):
+        _stats["errors"] += 1
+        body = {"object": "error", "status": 500, "code": "internal_server_error", "message": "Injected failure"}
+        return JSONResponse({"error": body} if upstream == "openai" else body, status_code=500)
+    return None
+
+
+# -- OpenAI ---------------------------------------------------------------------
+def _completion_text(messages: List[Dict[str, str]], json_mode: bool) -> str:
+    prompt = " ".join(m.get("content", "") for m in messages)
+    if json_mode:
+        # Profile parsing and field classification (which reads "field") both ask for JSON
+        return json.dumps({
+            "name": "Jane Doe",
+            "role": "Senior ML Engineer",
+            "currentCompany": "Acme",
+            "companies": ["Acme", "Google"],
+            "highestDegree": "MS",
+            "field": "industry - AI/ML",
+            "schools": ["Stanford University", "UC Berkeley"],
+            "location": "San Francisco Bay Area",
+            "headline": "Senior ML Engineer at Acme | ex-Google",
+            "bio": "I build ML systems.",
+            "experience_details": [{"company": "Acme", "title": "Senior ML Engineer", "description": "Worked on things."}],
+        })
+    if "outreach email" in prompt:
+        return "Subject: Quick question about ML at Acme\n\nHi Jane,\n\n" + "I enjoyed reading about your work. " * 12 + "\n\nBest,\nSam"
+    return "Hi Jane, " + "I enjoyed reading about your work on ML systems. " * 6
+
+
+def _usage(messages: List[Dict[str, str]], text: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+    completion_tokens = len(text) // 4
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+
+async def _stream(model: str, text: str, usage: Dict[str, int]) -> AsyncIterator[str]:
+    created = int(time.time())
+    chunk_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    words = text.split(" ")
+    for i, word in enumerate(words):
+        delta = word if i == 0 else " " + word
+        chunk = {"id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                 "choices": [{"index": 0, "delta": {"content": delta}, "finish_reason": None}]}
+        yield f"data: {json.dumps(chunk)}\n\n"
+        # Roughly gpt-4o's token rate
+        await asyncio.sleep(0.005)
+    final = {"id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [], "usage": usage}
+    yield f"data: {json.dumps(final)}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request) -> Any:
+    error = await _inject("openai")
+    if error is not None:
+        return error
+    body = await request.json()
+    model = body.get("model", "gpt-4o")
+    messages = body.get("messages", [])
+    text = _completion_text(messages, (body.get("response_format") or {}).get("type") == "json_object")
+    usage = _usage(messages, text)
+    if body.get("stream"):
+        return StreamingResponse(_stream(model, text, usage), media_type="text/event-stream")
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": usage,
+    }
+
+
+# -- Notion ---------------------------------------------------------------------
+def _page_response(page_id: str) -> Dict[str, Any]:
+    return {"object": "page", "id": page_id, "url": f"https://www.notion.so/{page_id.replace('-', '')}", "properties": _pages[page_id]}
+
+
+def _matches(page: Dict[str, Any], query_filter: Optional[Dict[str, Any]]) -> bool:
+    if not query_filter:
+        return True
+    url = (page.get("LinkedIn URL") or {}).get("url")
+    conditions = query_filter.get("or", [query_filter])
+    return any(url == c.get("url", {}).get("equals") for c in conditions)
+
+
+@app.get("/v1/databases/{database_id}")
+async def retrieve_database(database_id: str) -> Any:
+    error = await _inject("notion")
+    if error is not None:
+        return error
+    return {
+        "object": "database",
+        "id": database_id,
+        "properties": {name: {"id": name[:4], "name": name, "type": kind} for name, kind in DATABASE_PROPERTIES.items()},
+    }
+
+
+@app.post("/v1/databases/{database_id}/query")
+async def query_database(database_id: str, request: Request) -> Any:
+    error = await _inject("notion")
+    if error is not None:
+        return error
+    body = await request.json() if await request.body() else {}
+    ids = [page_id for page_id, page in _pages.items() if _matches(page, body.get("filter"))]
+    start = int(body.get("start_cursor") or 0)
+    size = int(body.get("page_size") or 100)
+    chunk = ids[start:start + size]
+    has_more = start + size < len(ids)
+    return {
+        "object": "list",
+        "results": [_page_response(page_id) for page_id in chunk],
+        "has_more": has_more,
+        "next_cursor": str(start + size) if has_more else None,
+    }
+
+
+@app.post("/v1/pages")
+async def create_page(request: Request) -> Any:
+    error = await _inject("notion")
+    if error is not None:
+        return error
+    body = await request.json()
+    page_id = str(uuid.uuid4())
+    _pages[page_id] = body.get("properties", {})
+    return _page_response(page_id)
+
+
+@app.patch("/v1/pages/{page_id}")
+async def update_page(page_id: str, request: Request) -> Any:
+    error = await _inject("notion")
+    if error is not None:
+        return error
+    if page_id not in _pages:
+        return JSONResponse({"object": "error", "status": 404, "code": "object_not_found", "message": "Not found"}, status_code=404)
+    body = await request.json()
+    _pages[page_id].update(body.get("properties", {}))
+    return _page_response(page_id)
+
+
+@app.get("/stats")
+def stats() -> Dict[str, int]:
+    return {**_stats, "pages": len(_pages)}
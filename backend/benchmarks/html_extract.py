@@ -0,0 +1,124 @@
+"""Micro-benchmark: regex-chain HTML cleanup vs the single-pass extractor.
+
+Reports CPU time per page and peak traced memory for each implementation
+over synthetic LinkedIn-like pages (scripts, hidden JSON blobs, duplicated
+screen-reader text, recommendation rails) and, optionally, saved pages.
+
+Usage (from the repo root):
+    python -m backend.benchmarks.html_extract
+    python -m backend.benchmarks.html_extract --pages saved_pages/ --repeat 20
+"""
+from __future__ import annotations
+import argparse
+import re
+import time
+import tracemalloc
+from html import unescape
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+from backend.app.email import PROFILE_TEXT_MAX_CHARS
+from backend.app.html_text import extract_text
+
+
+def regex_chain(html_content: str) -> str:
+    """The original four-pass cleanup from parse_linkedin_profile_with_llm."""
+    text_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    text_content = re.sub(r'<style[^>]*>.*?</style>', '', text_content, flags=re.DOTALL | re.IGNORECASE)
+    text_content = re.sub(r'<[^>]+>', ' ', text_content)
+    text_content = unescape(text_content)
+    text_content = re.sub(r'\s+', ' ', text_content).strip()
+    if len(text_content) > PROFILE_TEXT_MAX_CHARS:
+        text_content = text_content[:PROFILE_TEXT_MAX_CHARS] + "..."
+    return text_content
+
+
+def single_pass(html_content: str) -> str:
+    return extract_text(html_content, PROFILE_TEXT_MAX_CHARS).text
+
+
+def _entry(title: str, subtitle: str, dates: str, description: str) -> str:
+    spans = "".join(
+        f'<span aria-hidden="true">{text}</span><span class="visually-hidden">{text}</span>'
+        for text in (title, subtitle, dates)
+    )
+    return (
+        '<li class="artdeco-list__item pvs-list__item--line-separated">'
+        f'<div class="display-flex flex-column">{spans}</div>'
+        f'<div class="inline-show-more-text"><span aria-hidden="true">{description}</span></div></li>'
+    )
+
+
+def _section(anchor: str, heading: str, items: List[str]) -> str:
+    return (
+        f'<section class="artdeco-card pv-profile-card"><div id="{anchor}" class="pv-profile-card__anchor"></div>'
+        f'<div class="pvs-header__container"><h2 class="pvs-header__title"><span aria-hidden="true">{heading}</span>'
+        f'<span class="visually-hidden">{heading}</span></h2></div><ul>{"".join(items)}</ul></section>'
+    )
+
+
+def synthetic_page(experiences: int, blob_kb: int, rail_entries: int) -> str:
+    """A LinkedIn-shaped profile page; ``blob_kb`` controls script/JSON payload size."""
+    script = "<script>window.__data = '" + ("x" * 1024 + "</div>") * (blob_kb // 2) + "';</script>"
+    style = "<style>" + ".a{color:red}" * (blob_kb * 40) + "</style>"
+    blob = '<code style="display: none" id="bpr-guid-1">' + ("{&quot;k&quot;:&quot;v&quot;}" * (blob_kb * 30)) + "</code>"
+    top = (
+        '<section class="artdeco-card"><h1 class="text-heading-xlarge">Jane Doe</h1>'
+        '<div class="text-body-medium break-words">Senior ML Engineer at Acme | ex-Google</div>'
+        '<span class="text-body-small inline t-black--light break-words">San Francisco Bay Area</span></section>'
+    )
+    about = _section("about", "About", ['<li><span aria-hidden="true">' + "I build ML systems. " * 40 + "</span></li>"])
+    experience = _section("experience", "Experience", [
+        _entry(f"Engineer {i}", f"Company {i} · Full-time", f"Jan {2000 + i} - Dec {2001 + i}", "Worked on things. " * 30)
+        for i in range(experiences)
+    ])
+    education = _section("education", "Education", [
+        _entry("Stanford University", "Master of Science - MS, Computer Science", "2010 - 2012", "Research on NLP."),
+        _entry("UC Berkeley", "Bachelor of Science - BS, EECS", "2006 - 2010", "Activities: robotics."),
+    ])
+    rail = _section("browsemap", "People also viewed", [
+        _entry(f"Person {i}", f"Headline {i}", "2nd", "Connect") for i in range(rail_entries)
+    ])
+    return (
+        f"<html><head><title>Jane Doe | LinkedIn</title>{style}{script}</head><body>{blob}"
+        f'<main class="scaffold-layout__main">{top}{about}{experience}{education}{rail}</main>'
+        f"{script}</body></html>"
+    )
+
+
+def measure(fn: Callable[[str], str], html: str, repeat: int) -> Tuple[float, float, int]:
+    """(CPU ms per call, peak traced MiB, output chars)."""
+    start = time.process_time()
+    for _ in range(repeat):
+        out = fn(html)
+    cpu_ms = (time.process_time() - start) * 1000 / repeat
+    tracemalloc.start()
+    fn(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu_ms, peak / (1024 * 1024), len(out)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=Path, help="Directory of saved profile .html files to include")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    pages = [
+        ("small (10 jobs, 64KB blobs)", synthetic_page(10, 64, 10)),
+        ("medium (20 jobs, 512KB blobs)", synthetic_page(20, 512, 20)),
+        ("large (40 jobs, 2MB blobs)", synthetic_page(40, 2048, 40)),
+    ]
+    if args.pages:
+        pages += [(p.name, p.read_text(encoding="utf-8", errors="replace")) for p in sorted(args.pages.glob("*.html"))]
+
+    print(f"{'page':<32} {'size':>9} {'impl':<12} {'cpu ms':>9} {'peak MiB':>9} {'chars':>7}")
+    for name, html in pages:
+        for impl, fn in [("regex chain", regex_chain), ("single pass", single_pass)]:
+            cpu_ms, peak_mib, chars = measure(fn, html, args.repeat)
+            print(f"{name:<32} {len(html) / 1024:>7.0f}KB {impl:<12} {cpu_ms:>9.2f} {peak_mib:>9.2f} {chars:>7}")
+
+
+if __name__ == "__main__":
+    main()
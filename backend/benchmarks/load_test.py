@@ -0,0 +1,266 @@
+"""End-to-end load test of /draft against local OpenAI and Notion stand-ins.
+
+Boots ``fake_upstreams`` and the backend (uvicorn subprocesses on free
+ports, the backend pointed at the fakes), sends concurrent /draft requests
+with LinkedIn-sized profile HTML, and reports latency percentiles,
+requests/second, per-stage timings (from Server-Timing) and event-loop lag
+(from /metrics).
+
+Usage (from the repo root):
+    python -m backend.benchmarks.load_test --requests 200 --concurrency 16
+    python -m backend.benchmarks.load_test --openai-latency 1.5 --notion-error-rate 0.05 --out after.json --baseline before.json
+
+Settings in the project-root .env override the ones passed to the backend
+(config.py loads it with override=True), so move it aside for a clean run.
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from backend.benchmarks.html_extract import synthetic_page
+
+_SERVER_TIMING = re.compile(r"([\w-]+);dur=([\d.]+)")
+_LAG_BUCKET = re.compile(r'^connoction_event_loop_lag_seconds_bucket\{le="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app: str, port: int, env: Dict[str, str], workers: int = 1) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env={**os.environ, **env},
+    )
+
+
+async def wait_ready(url: str, timeout: float = 30.0) -> None:
+    give_up_at = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while True:
+            try:
+                if (await client.get(url)).status_code < 500:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > give_up_at:
+                raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+            await asyncio.sleep(0.2)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    """p50 / p95 / p99 / max in milliseconds."""
+    return {
+        "p50": round(percentile(values, 50) * 1000, 1),
+        "p95": round(percentile(values, 95) * 1000, 1),
+        "p99": round(percentile(values, 99) * 1000, 1),
+        "max": round(max(values, default=0.0) * 1000, 1),
+    }
+
+
+def lag_buckets(metrics_text: str) -> List[Tuple[float, float]]:
+    return [(float("inf") if le == "+Inf" else float(le), float(count)) for le, count in _LAG_BUCKET.findall(metrics_text)]
+
+
+def lag_summary(before: str, after: str) -> Dict[str, Any]:
+    """Event-loop lag percentiles (upper bucket bounds, ms) over the run, from two /metrics scrapes."""
+    start = dict(lag_buckets(before))
+    buckets = [(le, count - start.get(le, 0.0)) for le, count in lag_buckets(after)]
+    total = buckets[-1][1] if buckets else 0.0
+    result: Dict[str, Any] = {"samples": int(total)}
+    for p in (50, 95, 99):
+        bound = next((le for le, count in buckets if total and count >= total * p / 100), None)
+        result[f"p{p}"] = None if bound is None or bound == float("inf") else round(bound * 1000, 2)
+    return result
+
+
+def build_payload(index: int, html: str, ask: str, message_type: str) -> Dict[str, Any]:
+    name = f"Person {index}"
+    return {
+        "profile": {
+            "linkedinUrl": f"https://www.linkedin.com/in/load-test-{index}",
+            "htmlContent": html.replace("Jane Doe", name),
+        },
+        "ask": ask,
+        "options": {"saveDraftToNotion": True, "messageType": message_type},
+    }
+
+
+async def run_load(args: argparse.Namespace, base_url: str) -> Dict[str, Any]:
+    html = synthetic_page(args.experiences, args.blob_kb, 20)
+    distinct = max(1, int(args.requests * (1 - args.repeat_fraction)))
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    stages: Dict[str, List[float]] = {}
+    queue: "asyncio.Queue[int]" = asyncio.Queue()
+    for i in range(args.warmup + args.requests):
+        queue.put_nowait(i)
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            # Warmup requests use their own profiles; after that, repeat_fraction of requests revisit one
+            index = i if i < args.warmup else args.warmup + (i - args.warmup) % distinct
+            body = json.dumps(build_payload(index, html, args.ask, args.message_type)).encode()
+            headers = {"Content-Type": "application/json"}
+            if args.gzip:
+                body = gzip.compress(body)
+                headers["Content-Encoding"] = "gzip"
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{base_url}/draft", content=body, headers=headers)
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                response = None
+                status = e.__class__.__name__
+            elapsed = time.perf_counter() - started
+            if i < args.warmup:
+                continue
+            latencies.append(elapsed)
+            statuses[status] = statuses.get(status, 0) + 1
+            if response is not None:
+                for stage, ms in _SERVER_TIMING.findall(response.headers.get("server-timing", "")):
+                    stages.setdefault(stage, []).append(float(ms) / 1000)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        before = (await client.get(f"{base_url}/metrics")).text
+        # Warmup first, alone, so the measured window starts with warm pools
+        if args.warmup:
+            await asyncio.gather(*(worker(client) for _ in range(min(args.concurrency, args.warmup))))
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        after = (await client.get(f"{base_url}/metrics")).text
+
+    return {
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "payloadKB": round(len(html) / 1024),
+        "seconds": round(elapsed, 2),
+        "requestsPerSecond": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "statuses": statuses,
+        "latencyMs": summarize(latencies),
+        "stagesMs": {stage: summarize(values) for stage, values in sorted(stages.items())},
+        "eventLoopLagMs": lag_summary(before, after),
+    }
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Relative change of the headline numbers against a saved run (negative latency = faster)."""
+    def delta(new: float, old: float) -> Optional[str]:
+        return f"{(new - old) / old:+.1%}" if old else None
+
+    return {
+        "requestsPerSecond": delta(result["requestsPerSecond"], baseline["requestsPerSecond"]),
+        **{f"latency{key.upper()}": delta(result["latencyMs"][key], baseline["latencyMs"][key]) for key in ("p50", "p95", "p99")},
+    }
+
+
+async def main_async(args: argparse.Namespace) -> Dict[str, Any]:
+    fake_port, app_port = free_port(), free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    base_url = f"http://127.0.0.1:{app_port}"
+    with tempfile.TemporaryDirectory() as data_dir:
+        fake_env = {
+            "FAKE_OPENAI_LATENCY": str(args.openai_latency),
+            "FAKE_NOTION_LATENCY": str(args.notion_latency),
+            "FAKE_OPENAI_ERROR_RATE": str(args.openai_error_rate),
+            "FAKE_NOTION_ERROR_RATE": str(args.notion_error_rate),
+            "FAKE_OPENAI_429_RATE": str(args.openai_429_rate),
+            "FAKE_NOTION_429_RATE": str(args.notion_429_rate),
+        }
+        app_env = {
+            "OPENAI_API_KEY": "load-test",
+            "OPENAI_BASE_URL": f"{fake_url}/v1",
+            "EMAIL_PROVIDER": "openai",
+            "NOTION_API_KEY": "load-test",
+            "NOTION_DATABASE_ID": "load-test-db",
+            "NOTION_BASE_URL": fake_url,
+            "DATA_DIR": data_dir,
+            "LOG_DIR": str(Path(data_dir) / "logs"),
+            "LOG_LEVEL": args.log_level,
+        }
+        if args.llm_parse:
+            # Above 1, so the local parser never short-circuits the gpt-4o-mini call
+            app_env["LOCAL_PARSE_MIN_CONFIDENCE"] = "1.1"
+        if args.notion_rps is not None:
+            app_env["NOTION_REQUESTS_PER_SECOND"] = str(args.notion_rps)
+        processes = [start_server("backend.benchmarks.fake_upstreams:app", fake_port, fake_env)]
+        try:
+            await wait_ready(f"{fake_url}/stats")
+            processes.append(start_server("backend.app.main:app", app_port, app_env, args.workers))
+            await wait_ready(f"{base_url}/healthz")
+            result = await run_load(args, base_url)
+            async with httpx.AsyncClient() as client:
+                result["upstreams"] = (await client.get(f"{fake_url}/stats")).json()
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=10)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100, help="measured requests")
+    parser.add_argument("--warmup", type=int, default=5, help="unmeasured requests sent first")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers (/metrics only covers the one scraped)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--message-type", choices=["email", "linkedin"], default="email")
+    parser.add_argument("--ask", default="Would love to hear about your path into ML.")
+    parser.add_argument("--experiences", type=int, default=20, help="Experience entries per synthetic page")
+    parser.add_argument("--blob-kb", type=int, default=512, help="script/JSON payload per page (512 ~ a real profile)")
+    parser.add_argument("--repeat-fraction", type=float, default=0.0, help="share of requests revisiting a profile (cache hits)")
+    parser.add_argument("--gzip", action="store_true", help="gzip request bodies like the extension does")
+    parser.add_argument("--llm-parse", action="store_true", help="always parse with the LLM (skip the local parser)")
+    parser.add_argument("--notion-rps", type=float, help="override NOTION_REQUESTS_PER_SECOND (0 = unlimited)")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--openai-latency", type=float, default=0.5, help="mean seconds per OpenAI call")
+    parser.add_argument("--notion-latency", type=float, default=0.2, help="mean seconds per Notion call")
+    parser.add_argument("--openai-error-rate", type=float, default=0.0)
+    parser.add_argument("--notion-error-rate", type=float, default=0.0)
+    parser.add_argument("--openai-429-rate", type=float, default=0.0)
+    parser.add_argument("--notion-429-rate", type=float, default=0.0)
+    parser.add_argument("--out", type=Path, help="save the result as JSON")
+    parser.add_argument("--baseline", type=Path, help="earlier --out file to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    if args.baseline:
+        result["vsBaseline"] = compare(result, json.loads(args.baseline.read_text()))
+    print(json.dumps(result, indent=2))
+    if args.out:
+        args.out.write_text(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Micro-benchmark: per-request logging cost on the request thread, before and after.
+
+"before" is the original setup: root logger at DEBUG, console plus two
+FileHandlers written synchronously, the full LLM response and parsed dict at
+INFO and a line per profile field. "after" is ``setup_logging()``: records go
+on a queue drained by a background thread, and payloads are DEBUG, sampled
+and truncated. Console output goes to /dev/null in both, so only the cost of
+producing and writing log lines is measured.
+
+Usage (from the repo root):
+    python -m backend.benchmarks.logging_overhead
+    python -m backend.benchmarks.logging_overhead --requests 2000 --level DEBUG
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from backend.app import config
+from backend.app.logging_config import build_handlers, log_payload, setup_logging, stop_logging
+
+logger = logging.getLogger("backend.app.email")
+
+RAW_RESPONSE = json.dumps({
+    "name": "Jane Doe",
+    "role": "Staff Software Engineer",
+    "currentCompany": "Acme",
+    "companies": ["Acme", "Globex", "Initech"],
+    "schools": ["MIT", "Stanford University"],
+    "highestDegree": "MS",
+    "field": "industry - SWE",
+    "bio": "Building distributed systems. " * 40,
+    "experience_details": [
+        {"company": c, "title": "Engineer", "description": "Worked on infrastructure and tooling. " * 10}
+        for c in ("Acme", "Globex", "Initech")
+    ],
+})
+
+
+def request_before() -> None:
+    """The log calls of one /draft request as originally written."""
+    result = json.loads(RAW_RESPONSE)
+    logger.info("📨 POST /draft")
+    logger.info("🔍 Starting LLM profile parsing for URL: https://www.linkedin.com/in/jane")
+    logger.debug("📄 Original HTML content length: 812345 characters")
+    logger.debug(f"📝 First 500 chars of cleaned content: {'x' * 500}...")
+    logger.info("🤖 Sending request to GPT-4o-mini...")
+    logger.info(f"📥 GPT-4o-mini raw response: {RAW_RESPONSE}")
+    logger.info(f"✅ Successfully parsed JSON response: {result}")
+    logger.info("🎯 Created Profile object:")
+    for key in ("name", "role", "currentCompany", "companies", "location", "schools", "highestDegree", "field", "bio", "headline"):
+        logger.info(f"   {key}: {str(result.get(key))[:100]}")
+    for exp in result["experience_details"]:
+        logger.info(f"     {exp['title']} at {exp['company']}")
+        logger.info(f"         Description: {exp['description'][:100]}...")
+    logger.info("📤 Response: 200 | Time: 4.210s")
+
+
+def request_after() -> None:
+    """The same request with the current log calls."""
+    result = json.loads(RAW_RESPONSE)
+    logger.info("📨 POST /draft")
+    logger.info("🔍 Starting LLM profile parsing for URL: https://www.linkedin.com/in/jane")
+    logger.debug("📄 Original HTML content length: 812345 characters")
+    log_payload(logger, "📝 Cleaned content", "x" * 20000)
+    logger.info("🤖 Sending request to GPT-4o-mini...")
+    log_payload(logger, "📥 GPT-4o-mini raw response", RAW_RESPONSE)
+    logger.info(f"🎯 Parsed profile: {result['name']!r}, {result['role']!r} at {result['currentCompany']!r} (3 companies)")
+    log_payload(logger, "🎯 Parsed profile fields", result)
+    logger.info("📤 Response: 200 | Time: 4.210s")
+
+
+def setup_before(log_dir: Path) -> None:
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(logging.DEBUG)
+    for handler in build_handlers(log_dir):
+        root.addHandler(handler)
+
+
+def run(name: str, request, requests: int) -> None:
+    started = time.perf_counter()
+    for _ in range(requests):
+        request()
+    on_thread = time.perf_counter() - started
+    stop_logging()  # waits for the background writer, if any
+    total = time.perf_counter() - started
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+    print(json.dumps({
+        "setup": name,
+        "requests": requests,
+        "requestThreadUsPerRequest": round(on_thread * 1e6 / requests, 1),
+        "totalUsPerRequest": round(total * 1e6 / requests, 1),
+    }))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--level", default="INFO", help="LOG_LEVEL for the 'after' run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        setup_before(Path(tmp) / "before")
+        with contextlib.redirect_stdout(sys.__stdout__):
+            run("before: sync handlers, DEBUG, full payloads", request_before, args.requests)
+
+        setup_logging(args.level, async_mode=True, log_dir=Path(tmp) / "after")
+        with contextlib.redirect_stdout(sys.__stdout__):
+            run(
+                f"after: queued, {args.level}, payload sample rate {config.LOG_PAYLOAD_SAMPLE_RATE:g}",
+                request_after, args.requests,
+            )
+
+
+if __name__ == "__main__":
+    main()
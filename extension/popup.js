@@ -3,11 +3,54 @@
   // src/popup.ts
   var BACKEND_URL = "http://127.0.0.1:8000";
   var extractedProfile = null;
+  var profileHandle = null;
+  var prefetchDone = null;
+  var prefetchPending = false;
+  var generatedTypes = /* @__PURE__ */ new Set();
   async function getActiveTab() {
     const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
     if (!tab || !tab.id) throw new Error("No active tab");
     return tab;
   }
+  async function postJson(path, payload) {
+    const json = JSON.stringify(payload);
+    const headers = { "Content-Type": "application/json" };
+    let body = json;
+    if (typeof CompressionStream !== "undefined" && json.length > 1024) {
+      body = await new Response(new Blob([json]).stream().pipeThrough(new CompressionStream("gzip"))).blob();
+      headers["Content-Encoding"] = "gzip";
+    }
+    return fetch(`${BACKEND_URL}${path}`, { method: "POST", headers, body });
+  }
+  async function sha256Hex(text) {
+    const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, "0")).join("");
+  }
+  async function ensureProfileHandle(profile) {
+    if (prefetchDone) await prefetchDone;
+    if (profileHandle) return profileHandle;
+    const handle = await sha256Hex(profile.htmlContent);
+    const known = await fetch(`${BACKEND_URL}/extract/${handle}`);
+    if (known.ok) {
+      profileHandle = handle;
+      return handle;
+    }
+    const response = await postJson("/extract", profile);
+    if (!response.ok) {
+      const errorData = await response.json().catch(() => ({ detail: "Unknown error" }));
+      throw new Error(`Server error: ${errorData.detail || response.statusText}`);
+    }
+    profileHandle = (await response.json()).handle;
+    return profileHandle;
+  }
+  async function postForProfile(path, profile, payload) {
+    const handle = await ensureProfileHandle(profile);
+    prefetchPending = false;
+    const response = await postJson(path, { ...payload, profile: { linkedinUrl: profile.linkedinUrl, handle } });
+    if (response.status !== 404) return response;
+    profileHandle = null;
+    return postJson(path, { ...payload, profile });
+  }
   function setStatus(msg, type = "loading") {
     const el = document.getElementById("status");
     el.textContent = msg;
@@ -154,8 +197,16 @@
       }, 500);
     });
   }
-  async function extractProfile() {
-    if (extractedProfile) return extractedProfile;
+  function extractProfile() {
+    if (!extractedProfile) {
+      extractedProfile = readProfileFromTab().catch((error) => {
+        extractedProfile = null;
+        throw error;
+      });
+    }
+    return extractedProfile;
+  }
+  async function readProfileFromTab() {
     const tab = await getActiveTab();
     if (!tab.url?.includes("linkedin.com")) {
       throw new Error("Please navigate to a LinkedIn profile page");
@@ -164,8 +215,18 @@
       target: { tabId: tab.id },
       func: extractLinkedInProfile
     });
-    extractedProfile = await result.result;
-    return extractedProfile;
+    return await result.result;
+  }
+  function startPrefetch() {
+    prefetchDone = (async () => {
+      const profile = await extractProfile();
+      if (!profile.htmlContent) return;
+      const response = await postJson("/prefetch", profile);
+      if (!response.ok) return;
+      const { handle, status } = await response.json();
+      profileHandle = handle;
+      prefetchPending = status !== "done";
+    })().catch((error) => console.log("Prefetch skipped:", error));
   }
   async function handleAddToNotion() {
     const buttonId = "addToNotionBtn";
@@ -189,7 +250,6 @@
       }
       setStatus("Saving to Notion database...", "loading");
       const payload = {
-        profile,
         ask: "Add to Notion",
         options: {
           saveDraftToNotion: true,
@@ -197,11 +257,7 @@
           emailMessage
         }
       };
-      const response = await fetch(`${BACKEND_URL}/draft`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(payload)
-      });
+      const response = await postForProfile("/draft", profile, payload);
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({ detail: "Unknown error" }));
         throw new Error(`Server error: ${errorData.detail || response.statusText}`);
@@ -230,6 +286,32 @@
       setButtonLoading(buttonId, false);
     }
   }
+  async function readEventStream(response, onEvent) {
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    try {
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += value;
+        let end;
+        while ((end = buffer.indexOf("\n\n")) !== -1) {
+          const block = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          let event = "message";
+          let data = "";
+          for (const line of block.split("\n")) {
+            if (line.startsWith("event: ")) event = line.slice(7);
+            else if (line.startsWith("data: ")) data += line.slice(6);
+          }
+          if (data) onEvent(event, JSON.parse(data));
+        }
+      }
+    } finally {
+      reader.cancel().catch(() => {
+      });
+    }
+  }
   async function handleGenerateMessage(type) {
     const buttonId = type === "linkedin" ? "generateLinkedInDraftBtn" : "generateEmailDraftBtn";
     try {
@@ -246,33 +328,45 @@
       }
       setStatus(`Generating ${type} message with AI...`, "loading");
       const payload = {
-        profile,
         ask,
         options: {
           saveDraftToNotion: false,
-          messageType: type
+          messageType: type,
+          regenerate: generatedTypes.has(type)
         }
       };
-      const response = await fetch(`${BACKEND_URL}/draft`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(payload)
-      });
+      const response = await postForProfile("/draft/stream", profile, payload);
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({ detail: "Unknown error" }));
         throw new Error(`Server error: ${errorData.detail || response.statusText}`);
       }
-      const data = await response.json();
+      const subjectSection = document.getElementById("subjectSection");
+      const draftSubject = document.getElementById("draftSubject");
+      const draftBody = document.getElementById("draftBody");
+      subjectSection.classList.add("hidden");
+      draftSubject.value = "";
+      draftBody.value = "";
+      showSection("draftResult");
+      let data = null;
+      await readEventStream(response, (event, payload2) => {
+        if (event === "subject") {
+          subjectSection.classList.remove("hidden");
+          draftSubject.value = payload2.subject;
+        } else if (event === "delta") {
+          draftBody.value += payload2.text;
+        } else if (event === "done") {
+          data = payload2;
+        } else if (event === "error") {
+          throw new Error(`Server error: ${payload2.detail}`);
+        }
+      });
       console.log("Backend response:", data);
-      if (!data.draft) {
+      if (!data?.draft) {
         throw new Error("No draft generated. Make sure OpenAI is configured in your .env file.");
       }
       if (data.notion && data.notion.savedFields?.updated_with_message) {
         setStatus(`${type === "linkedin" ? "LinkedIn" : "Email"} message generated and Notion entry updated!`, "success");
       }
-      const subjectSection = document.getElementById("subjectSection");
-      const draftSubject = document.getElementById("draftSubject");
-      const draftBody = document.getElementById("draftBody");
       if (type === "email" && data.draft.subject) {
         subjectSection.classList.remove("hidden");
         draftSubject.value = data.draft.subject;
@@ -280,10 +374,10 @@
         subjectSection.classList.add("hidden");
       }
       draftBody.value = data.draft.body;
-      showSection("draftResult");
       if (!(data.notion && data.notion.savedFields?.updated_with_message)) {
         setStatus(`${type === "linkedin" ? "LinkedIn" : "Email"} message generated successfully!`, "success");
       }
+      generatedTypes.add(type);
       setButtonLoading(buttonId, false, "Generated!");
       setTimeout(() => {
         const btn = document.getElementById(buttonId);
@@ -359,6 +453,13 @@ ${bodyEl.value}`;
     document.getElementById("generateEmailDraftBtn")?.addEventListener("click", () => handleGenerateMessage("email"));
     document.getElementById("copyBtn")?.addEventListener("click", copyDraft);
     setupQuickOptions();
+    startPrefetch();
+  });
+  window.addEventListener("pagehide", () => {
+    if (profileHandle && prefetchPending) {
+      fetch(`${BACKEND_URL}/prefetch/${profileHandle}`, { method: "DELETE", keepalive: true }).catch(() => {
+      });
+    }
   });
 })();
 //# sourceMappingURL=popup.js.map
@@ -1,6 +1,14 @@
 const BACKEND_URL = "http://127.0.0.1:8000";
 
-let extractedProfile: any = null;
+// Shared by the prefetch on open and the buttons, so the page is only scrolled through once
+let extractedProfile: Promise<any> | null = null;
+// Server-side handle of the extracted page (POST /prefetch or /extract), sent instead of the HTML
+let profileHandle: string | null = null;
+let prefetchDone: Promise<void> | null = null;
+// True while our /prefetch may still be running on the server and no request has joined it
+let prefetchPending = false;
+// Message types already generated in this popup: clicking again asks for a fresh draft instead of the cached one
+const generatedTypes = new Set<string>();
 
 async function getActiveTab(): Promise<chrome.tabs.Tab> {
   const [tab] = await chrome.tabs.query({ active: true, currentWindow: true });
@@ -8,6 +16,53 @@ async function getActiveTab(): Promise<chrome.tabs.Tab> {
   return tab;
 }
 
+// POSTs JSON to the backend, gzip-compressed when the browser supports it (profile HTML shrinks ~10x)
+async function postJson(path: string, payload: any): Promise<Response> {
+  const json = JSON.stringify(payload);
+  const headers: Record<string, string> = { "Content-Type": "application/json" };
+  let body: BodyInit = json;
+  if (typeof CompressionStream !== "undefined" && json.length > 1024) {
+    body = await new Response(new Blob([json]).stream().pipeThrough(new CompressionStream("gzip"))).blob();
+    headers["Content-Encoding"] = "gzip";
+  }
+  return fetch(`${BACKEND_URL}${path}`, { method: "POST", headers, body });
+}
+
+async function sha256Hex(text: string): Promise<string> {
+  const digest = await crypto.subtle.digest("SHA-256", new TextEncoder().encode(text));
+  return Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, "0")).join("");
+}
+
+// Uploads the page only if the server doesn't already have it, returning its handle
+async function ensureProfileHandle(profile: any): Promise<string> {
+  if (prefetchDone) await prefetchDone;
+  if (profileHandle) return profileHandle;
+  const handle = await sha256Hex(profile.htmlContent);
+  const known = await fetch(`${BACKEND_URL}/extract/${handle}`);
+  if (known.ok) {
+    profileHandle = handle;
+    return handle;
+  }
+  const response = await postJson("/extract", profile);
+  if (!response.ok) {
+    const errorData = await response.json().catch(() => ({ detail: "Unknown error" }));
+    throw new Error(`Server error: ${errorData.detail || response.statusText}`);
+  }
+  profileHandle = (await response.json()).handle;
+  return profileHandle!;
+}
+
+// POSTs a request about the profile by handle; re-sends the full page if the server has since dropped it
+async function postForProfile(path: string, profile: any, payload: any): Promise<Response> {
+  const handle = await ensureProfileHandle(profile);
+  // The server joins a pending prefetch for this handle, so there is nothing left to cancel
+  prefetchPending = false;
+  const response = await postJson(path, { ...payload, profile: { linkedinUrl: profile.linkedinUrl, handle } });
+  if (response.status !== 404) return response;
+  profileHandle = null;
+  return postJson(path, { ...payload, profile });
+}
+
 function setStatus(msg: string, type: 'loading' | 'success' | 'error' = 'loading') {
   const el = document.getElementById("status")!;
   el.textContent = msg;
@@ -197,9 +252,17 @@ function extractLinkedInProfile(): any {
   });
 }
 
-async function extractProfile(): Promise<any> {
-  if (extractedProfile) return extractedProfile;
-  
+function extractProfile(): Promise<any> {
+  if (!extractedProfile) {
+    extractedProfile = readProfileFromTab().catch(error => {
+      extractedProfile = null;
+      throw error;
+    });
+  }
+  return extractedProfile;
+}
+
+async function readProfileFromTab(): Promise<any> {
   const tab = await getActiveTab();
   if (!tab.url?.includes("linkedin.com")) {
     throw new Error("Please navigate to a LinkedIn profile page");
@@ -211,8 +274,20 @@ async function extractProfile(): Promise<any> {
   });
   
   // The function now returns a Promise, so we need to await it
-  extractedProfile = await result.result;
-  return extractedProfile;
+  return await result.result;
+}
+
+// Starts parsing the profile (and its Notion lookup) on the server while the user reads the popup
+function startPrefetch() {
+  prefetchDone = (async () => {
+    const profile = await extractProfile();
+    if (!profile.htmlContent) return;
+    const response = await postJson("/prefetch", profile);
+    if (!response.ok) return;
+    const { handle, status } = await response.json();
+    profileHandle = handle;
+    prefetchPending = status !== "done";
+  })().catch(error => console.log("Prefetch skipped:", error));
 }
 
 async function handleAddToNotion() {
@@ -246,7 +321,6 @@ async function handleAddToNotion() {
     setStatus("Saving to Notion database...", 'loading');
     
     const payload = {
-      profile,
       ask: "Add to Notion",
       options: {
         saveDraftToNotion: true,
@@ -255,11 +329,7 @@ async function handleAddToNotion() {
       },
     };
     
-    const response = await fetch(`${BACKEND_URL}/draft`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
+    const response = await postForProfile("/draft", profile, payload);
     
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({ detail: "Unknown error" }));
@@ -298,6 +368,33 @@ async function handleAddToNotion() {
     }
 }
 
+// Reads a Server-Sent Events response, calling onEvent with each event's name and parsed data
+async function readEventStream(response: Response, onEvent: (event: string, data: any) => void) {
+  const reader = response.body!.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  try {
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += value;
+      let end;
+      while ((end = buffer.indexOf("\n\n")) !== -1) {
+        const block = buffer.slice(0, end);
+        buffer = buffer.slice(end + 2);
+        let event = "message";
+        let data = "";
+        for (const line of block.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+        }
+        if (data) onEvent(event, JSON.parse(data));
+      }
+    }
+  } finally {
+    reader.cancel().catch(() => {});
+  }
+}
+
 async function handleGenerateMessage(type: 'linkedin' | 'email') {
   const buttonId = type === 'linkedin' ? 'generateLinkedInDraftBtn' : 'generateEmailDraftBtn';
   
@@ -322,29 +419,47 @@ async function handleGenerateMessage(type: 'linkedin' | 'email') {
     setStatus(`Generating ${type} message with AI...`, 'loading');
     
     const payload = {
-      profile,
       ask,
       options: {
         saveDraftToNotion: false,
         messageType: type,
+        regenerate: generatedTypes.has(type),
       },
     };
     
-    const response = await fetch(`${BACKEND_URL}/draft`, {
-      method: "POST",
-      headers: { "Content-Type": "application/json" },
-      body: JSON.stringify(payload),
-    });
+    const response = await postForProfile("/draft/stream", profile, payload);
     
     if (!response.ok) {
       const errorData = await response.json().catch(() => ({ detail: "Unknown error" }));
       throw new Error(`Server error: ${errorData.detail || response.statusText}`);
     }
     
-    const data = await response.json();
+    const subjectSection = document.getElementById("subjectSection")!;
+    const draftSubject = document.getElementById("draftSubject") as HTMLInputElement;
+    const draftBody = document.getElementById("draftBody") as HTMLTextAreaElement;
+    
+    // Show the draft while it is being written
+    subjectSection.classList.add('hidden');
+    draftSubject.value = "";
+    draftBody.value = "";
+    showSection("draftResult");
+    
+    let data: any = null;
+    await readEventStream(response, (event, payload) => {
+      if (event === "subject") {
+        subjectSection.classList.remove('hidden');
+        draftSubject.value = payload.subject;
+      } else if (event === "delta") {
+        draftBody.value += payload.text;
+      } else if (event === "done") {
+        data = payload;
+      } else if (event === "error") {
+        throw new Error(`Server error: ${payload.detail}`);
+      }
+    });
     console.log("Backend response:", data);
     
-    if (!data.draft) {
+    if (!data?.draft) {
       throw new Error("No draft generated. Make sure OpenAI is configured in your .env file.");
     }
     
@@ -353,11 +468,7 @@ async function handleGenerateMessage(type: 'linkedin' | 'email') {
       setStatus(`${type === 'linkedin' ? 'LinkedIn' : 'Email'} message generated and Notion entry updated!`, 'success');
     }
     
-    // Show draft result
-    const subjectSection = document.getElementById("subjectSection")!;
-    const draftSubject = document.getElementById("draftSubject") as HTMLInputElement;
-    const draftBody = document.getElementById("draftBody") as HTMLTextAreaElement;
-    
+    // Replace the streamed text with the final draft
     if (type === 'email' && data.draft.subject) {
       subjectSection.classList.remove('hidden');
       draftSubject.value = data.draft.subject;
@@ -367,14 +478,13 @@ async function handleGenerateMessage(type: 'linkedin' | 'email') {
     
     draftBody.value = data.draft.body;
     
-    showSection("draftResult");
-    
     // Only show the basic success message if we didn't already show the Notion update message
     if (!(data.notion && data.notion.savedFields?.updated_with_message)) {
       setStatus(`${type === 'linkedin' ? 'LinkedIn' : 'Email'} message generated successfully!`, 'success');
     }
     
     // Show success feedback on button
+    generatedTypes.add(type);
     setButtonLoading(buttonId, false, "Generated!");
     setTimeout(() => {
       const btn = document.getElementById(buttonId) as HTMLButtonElement;
@@ -470,4 +580,13 @@ document.addEventListener("DOMContentLoaded", () => {
   
   // Setup quick options
   setupQuickOptions();
+  
+  startPrefetch();
+});
+
+// Popup closed: stop a prefetch nobody will use (the server keeps it if a request is waiting on it)
+window.addEventListener("pagehide", () => {
+  if (profileHandle && prefetchPending) {
+    fetch(`${BACKEND_URL}/prefetch/${profileHandle}`, { method: "DELETE", keepalive: true }).catch(() => {});
+  }
 }); 
\ No newline at end of file